@@ -10,12 +10,22 @@ contract Administration {
     // VARIABLES
 
     address payable public admin;
-    address public ethUsdPriceFeed;
+    address public immutable ethUsdPriceFeed;
+    uint8 public immutable priceFeedDecimals;
+
+    // ETH/USD price reused by conversions until the cache window is elapsed
+    PriceCache public priceCache;
+    uint256 public priceCacheWindow = 1 minutes;
 
     address public marketContractAddress;
     address public storeFactoryAddress;
     address public auctionMarketContractAddress;
 
+    struct PriceCache {
+        uint128 price;
+        uint128 timestamp;
+    }
+
     //--------------------------------------------------------------------
     // MODIFIERS
 
@@ -30,6 +40,7 @@ contract Administration {
     constructor(address _ethUsdPriceFeed) {
         admin = payable(msg.sender);
         ethUsdPriceFeed = _ethUsdPriceFeed;
+        priceFeedDecimals = AggregatorV3Interface(_ethUsdPriceFeed).decimals();
     }
 
     // Allow factory contract to recieve ether
@@ -59,6 +70,10 @@ contract Administration {
         auctionMarketContractAddress = _auctionsContractAddress;
     }
 
+    function setPriceCacheWindow(uint256 _window) external onlyAdmin {
+        priceCacheWindow = _window;
+    }
+
     function changeMarketFee(uint256 _newFee) external onlyAdmin {
         IMarket(marketContractAddress).changeFee(_newFee);
     }
@@ -76,17 +91,48 @@ contract Administration {
     }
 
     /**
-     * @dev Get current ETH/USD price using ChainLink price feed
+     * @dev Withdraw the ETH credited to `_payee` by several marketplace contracts
+     * (market, auction market, stores) in one transaction, contracts owing nothing are skipped.
+     * Fees are credited to this contract so the admin can collect them with
+     * claimPayments(factory, contracts) before calling withdrawBalance
+     */
+    function claimPayments(address payable _payee, address[] memory _contracts)
+        public
+    {
+        for (uint256 i; i < _contracts.length; i++) {
+            IPullPayment payments = IPullPayment(_contracts[i]);
+            if (payments.credits(_payee) > 0) {
+                payments.withdrawFor(_payee);
+            }
+        }
+    }
+
+    /**
+     * @dev Get current ETH/USD price, the cached price is reused within the cache window
+     * otherwise it's refreshed from the ChainLink price feed
      * @return the ETH/USD price , the number of decimals used for this price
      */
 
     function getPrice() public returns (uint256, uint256) {
-        AggregatorV3Interface priceFeed = AggregatorV3Interface(
-            ethUsdPriceFeed
-        );
-        (, int256 price, , , ) = priceFeed.latestRoundData();
-        uint256 decimals = priceFeed.decimals();
-        return (uint256(price), decimals);
+        PriceCache memory cache = priceCache;
+        if (_isFresh(cache)) {
+            return (cache.price, priceFeedDecimals);
+        }
+        uint256 price = _readPriceFeed();
+        priceCache = PriceCache(uint128(price), uint128(block.timestamp));
+        return (price, priceFeedDecimals);
+    }
+
+    /**
+     * @dev Same as getPrice but never updates the cache, used for quotes
+     * @return the ETH/USD price , the number of decimals used for this price
+     */
+    function getLatestPrice() public view returns (uint256, uint256) {
+        PriceCache memory cache = priceCache;
+        if (_isFresh(cache)) {
+            return (cache.price, priceFeedDecimals);
+        }
+        return (_readPriceFeed(), priceFeedDecimals);
     }
 
     function convertUSDToETH(uint256 amountInUSD) public returns (uint256) {
@@ -94,4 +140,26 @@ contract Administration {
         uint256 convertedPrice = (amountInUSD * 10**decimals) / price;
         return convertedPrice;
     }
+
+    /**
+     * @dev View only version of convertUSDToETH, returns the amount a conversion
+     * sent in the next transaction would give (unless the price feed is updated meanwhile)
+     */
+    function quoteUSDToETH(uint256 amountInUSD) public view returns (uint256) {
+        (uint256 price, uint256 decimals) = getLatestPrice();
+        uint256 convertedPrice = (amountInUSD * 10**decimals) / price;
+        return convertedPrice;
+    }
+
+    function _isFresh(PriceCache memory _cache) internal view returns (bool) {
+        return
+            _cache.timestamp != 0 &&
+            block.timestamp < _cache.timestamp + priceCacheWindow;
+    }
+
+    function _readPriceFeed() internal view returns (uint256) {
+        (, int256 price, , , ) = AggregatorV3Interface(ethUsdPriceFeed)
+            .latestRoundData();
+        return uint256(price);
+    }
 }
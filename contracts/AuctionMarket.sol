@@ -3,8 +3,11 @@
 pragma solidity ^0.8.0;
 
 import "./IFactory.sol";
+import "./Pagination.sol";
+import "./Packing.sol";
+import "./PullPayment.sol";
 
-contract AuctionMarket {
+contract AuctionMarket is PullPayment {
     //--------------------------------------------------------------------
     // VARIABLES
 
@@ -13,29 +16,74 @@ contract AuctionMarket {
 
     Auction[] public auctionsList;
 
+    // packed in 4 slots: [id, seller] [itemInformation] [highestBid, highestBidder]
+    // [startPrice, endTimstamp, status], a bid only writes the highest bid slot
     struct Auction {
-        uint256 id;
+        uint32 id;
         address payable seller;
         string itemInformation;
-        uint256 startPrice;
-        uint256 highestBid;
+        uint96 highestBid;
         address highestBidder;
-        uint256 endTimstamp;
+        uint96 startPrice;
+        uint40 endTimstamp;
         Status status;
     }
 
     mapping(uint256 => mapping(address => uint256)) public auctionBidsMapping;
 
+    // auctions ids each bidder placed a bid on, an auction is pushed on the first
+    // bid of the bidder and stays after the bid is withdrawn
+    mapping(address => uint256[]) public bidderAuctions;
+    mapping(uint256 => mapping(address => bool)) private hasBidOn;
+
+    // end times index: auctions ids grouped by the bucket their end time falls in
+    // with the number of auctions still open in each bucket, buckets before
+    // firstOpenBucket only hold ended auctions
+    uint256 public constant END_TIME_BUCKET = 1 hours;
+    mapping(uint256 => uint256[]) public auctionsEndingIn;
+    mapping(uint256 => uint256) public openAuctionsEndingIn;
+    uint256 public firstOpenBucket;
+
+    // maximum number of settled buckets skipped by a settlement
+    uint256 private constant MAX_BUCKETS_SKIPPED = 48;
+    // maximum number of buckets read by one getExpiredAuctions call
+    uint256 public constant MAX_BUCKETS_SCANNED = 168;
+
     enum Status {
         OPEN,
         ENDED
     }
 
+    enum Filter {
+        SELLER,
+        STATUS
+    }
+
     //--------------------------------------------------------------------
     // EVENTS
 
-    event AuctionStarted(uint256 id, address seller, uint256 timestamp);
-    event AuctionEnded(uint256 id, uint256 timestamp);
+    event AuctionStarted(
+        uint256 indexed id,
+        address indexed seller,
+        string itemInformation,
+        uint256 startPrice,
+        uint256 startBid,
+        uint256 endTimestamp,
+        uint256 timestamp
+    );
+    event BidPlaced(uint256 indexed id, address indexed bidder, uint256 amount);
+    event BidWithdrawn(
+        uint256 indexed id,
+        address indexed bidder,
+        uint256 amount
+    );
+    event AuctionEnded(
+        uint256 indexed id,
+        address indexed winner,
+        uint256 highestBid,
+        uint256 timestamp
+    );
+    event FeeChanged(uint256 fee);
 
     //--------------------------------------------------------------------
     // MODIFIERS
@@ -58,6 +106,7 @@ contract AuctionMarket {
 
     constructor(address _factory) {
         factory = payable(_factory);
+        firstOpenBucket = block.timestamp / END_TIME_BUCKET;
     }
 
     //--------------------------------------------------------------------
@@ -75,43 +124,147 @@ contract AuctionMarket {
 
         auctionsList.push(
             Auction(
-                _id,
+                Packing.toUint32(_id),
                 payable(msg.sender),
                 _itemInfo,
-                _initialPrice,
-                highestBidETH,
+                Packing.toUint96(highestBidETH),
                 address(0),
-                end,
+                Packing.toUint96(_initialPrice),
+                Packing.toUint40(end),
                 Status.OPEN
             )
         );
 
-        emit AuctionStarted(_id, msg.sender, start);
+        uint256 bucket = end / END_TIME_BUCKET;
+        auctionsEndingIn[bucket].push(_id);
+        openAuctionsEndingIn[bucket]++;
+
+        emit AuctionStarted(
+            _id,
+            msg.sender,
+            _itemInfo,
+            _initialPrice,
+            highestBidETH,
+            end,
+            start
+        );
     }
 
+    /**
+     * @dev A bid reads the auction end time and only writes the highest bid slot
+     * (highestBid, highestBidder) and the bidder balance, a bidder raising their bid
+     * only sends the difference. The first bid of a bidder also adds the auction to
+     * their bidder index
+     */
     function bid(uint256 _auctionId) public payable {
-        Auction memory auction = auctionsList[_auctionId];
+        Auction storage auction = auctionsList[_auctionId];
         require(block.timestamp < auction.endTimstamp, "Auction Ended");
 
-        bool isInAuctionBidders = _isBidder(msg.sender, _auctionId);
-        if (isInAuctionBidders) {
-            require(
-                auctionBidsMapping[_auctionId][msg.sender] + msg.value >
-                    auction.highestBid,
-                "insuffisant amount"
-            );
-            auctionBidsMapping[_auctionId][msg.sender] += msg.value;
-        } else {
-            require(msg.value > auction.highestBid, "insuffisant amount");
-            auctionBidsMapping[_auctionId][msg.sender] = msg.value;
+        uint256 bidAmount = auctionBidsMapping[_auctionId][msg.sender] +
+            msg.value;
+        require(bidAmount > auction.highestBid, "insuffisant amount");
+
+        if (!hasBidOn[_auctionId][msg.sender]) {
+            hasBidOn[_auctionId][msg.sender] = true;
+            bidderAuctions[msg.sender].push(_auctionId);
         }
 
-        auction.highestBid = auctionBidsMapping[_auctionId][msg.sender];
+        auctionBidsMapping[_auctionId][msg.sender] = bidAmount;
+        auction.highestBid = Packing.toUint96(bidAmount);
         auction.highestBidder = msg.sender;
-        auctionsList[_auctionId] = auction;
+
+        emit BidPlaced(_auctionId, msg.sender, bidAmount);
     }
 
     function withdrawBid(uint256 _auctionId) public {
+        _sendBids(_withdrawBid(_auctionId));
+    }
+
+    /**
+     * @dev Withdraw the outbid bids of the caller on several auctions with a single payment
+     */
+    function withdrawBids(uint256[] memory _auctionIds) public {
+        uint256 total;
+        for (uint256 i; i < _auctionIds.length; i++) {
+            total += _withdrawBid(_auctionIds[i]);
+        }
+        _sendBids(total);
+    }
+
+    function endAuction(uint256 _auctionId) public onlySeller(_auctionId) {
+        Auction storage auction = auctionsList[_auctionId];
+        require(
+            block.timestamp >= auction.endTimstamp,
+            "Auction Period not reached yet"
+        );
+        require(auction.status == Status.OPEN, "Auction already ended");
+
+        _endAuction(_auctionId, auction);
+        _skipSettledBuckets();
+    }
+
+    /**
+     * @dev Permissionless settlement of expired auctions (used by the keeper), the
+     * auctions not expired yet or already ended are skipped so concurrent settlements don't revert
+     * @return the number of auctions settled
+     */
+    function settleExpired(uint256[] memory _auctionIds)
+        public
+        returns (uint256)
+    {
+        uint256 settled;
+        for (uint256 i; i < _auctionIds.length; i++) {
+            Auction storage auction = auctionsList[_auctionIds[i]];
+            if (
+                auction.status == Status.OPEN &&
+                block.timestamp >= auction.endTimstamp
+            ) {
+                _endAuction(_auctionIds[i], auction);
+                settled++;
+            }
+        }
+        _skipSettledBuckets();
+        return settled;
+    }
+
+    function _endAuction(uint256 _auctionId, Auction storage _auction)
+        internal
+    {
+        _auction.status = Status.ENDED;
+        openAuctionsEndingIn[_auction.endTimstamp / END_TIME_BUCKET]--;
+
+        uint256 highestBid = _auction.highestBid;
+        // without any bid the highest bid is only the start price, nothing to pay
+        if (_auction.highestBidder != address(0)) {
+            _credit(_auction.seller, (highestBid * (1000 - fee)) / 1000);
+            _credit(factory, (highestBid * fee) / 1000);
+        }
+
+        emit AuctionEnded(
+            _auctionId,
+            _auction.highestBidder,
+            highestBid,
+            block.timestamp
+        );
+    }
+
+    /**
+     * @dev Move firstOpenBucket past the buckets without open auctions, the current
+     * bucket can still receive new auctions so it's never skipped
+     */
+    function _skipSettledBuckets() internal {
+        uint256 bucket = firstOpenBucket;
+        uint256 lastBucket = block.timestamp / END_TIME_BUCKET;
+        if (lastBucket > bucket + MAX_BUCKETS_SKIPPED) {
+            lastBucket = bucket + MAX_BUCKETS_SKIPPED;
+        }
+        while (bucket < lastBucket && openAuctionsEndingIn[bucket] == 0) {
+            bucket++;
+        }
+        firstOpenBucket = bucket;
+    }
+
+    function _withdrawBid(uint256 _auctionId) internal returns (uint256) {
         uint256 amount = auctionBidsMapping[_auctionId][msg.sender];
 
         require(amount > 0, "No Bid found on this auction");
@@ -121,22 +274,16 @@ contract AuctionMarket {
         );
 
         auctionBidsMapping[_auctionId][msg.sender] = 0;
-        payable(msg.sender).transfer(amount);
-    }
 
-    function endAuction(uint256 _auctionId) public onlySeller(_auctionId) {
-        Auction memory auction = auctionsList[_auctionId];
-        require(
-            block.timestamp >= auction.endTimstamp,
-            "Auction Period not reached yet"
-        );
+        emit BidWithdrawn(_auctionId, msg.sender, amount);
 
-        auction.status = Status.ENDED;
-        auctionsList[_auctionId] = auction;
-        auction.seller.transfer((auction.highestBid * (1000 - fee)) / 1000);
-        factory.transfer((auction.highestBid * fee) / 1000);
+        return amount;
+    }
 
-        emit AuctionEnded(_auctionId, block.timestamp);
+    function _sendBids(uint256 _amount) internal {
+        // bids are already pulled by their bidder, only the caller can be paid here
+        (bool sent, ) = payable(msg.sender).call{value: _amount}("");
+        require(sent, "withdraw failed");
     }
 
     function _isBidder(address _user, uint256 _auctionId)
@@ -163,14 +310,194 @@ contract AuctionMarket {
         return auctionsList;
     }
 
+    function getAuctionsCount() public view returns (uint256) {
+        return auctionsList.length;
+    }
+
+    function getBidderAuctionsCount(address _bidder)
+        public
+        view
+        returns (uint256)
+    {
+        return bidderAuctions[_bidder].length;
+    }
+
+    /**
+     * @dev Get the expired auctions still open from the end times index, at most
+     * MAX_BUCKETS_SCANNED buckets are read from `_fromBucket` (or firstOpenBucket when it's
+     * later) so the call stays bounded when firstOpenBucket lags behind. The walk goes on
+     * from the returned bucket and is over once that bucket is past the current one
+     * @return at most `_limit` expired auctions ids ordered by end time bucket, the bucket
+     * to read from on the next call
+     */
+    function getExpiredAuctions(uint256 _fromBucket, uint256 _limit)
+        public
+        view
+        returns (uint256[] memory, uint256)
+    {
+        require(_limit > 0, "invalid limit");
+        uint256[] memory expired = new uint256[](_limit);
+        uint256 count;
+        uint256 bucket = _fromBucket > firstOpenBucket
+            ? _fromBucket
+            : firstOpenBucket;
+        uint256 lastBucket = block.timestamp / END_TIME_BUCKET;
+        if (lastBucket >= bucket + MAX_BUCKETS_SCANNED) {
+            lastBucket = bucket + MAX_BUCKETS_SCANNED - 1;
+        }
+        for (; bucket <= lastBucket; bucket++) {
+            if (openAuctionsEndingIn[bucket] == 0) {
+                continue;
+            }
+            uint256[] storage ids = auctionsEndingIn[bucket];
+            for (uint256 i; i < ids.length; i++) {
+                Auction storage auction = auctionsList[ids[i]];
+                if (
+                    auction.status == Status.OPEN &&
+                    block.timestamp >= auction.endTimstamp
+                ) {
+                    // the page is full, the next call resumes in this bucket
+                    if (count == _limit) {
+                        return (_trimIds(expired, count), bucket);
+                    }
+                    expired[count] = ids[i];
+                    count++;
+                }
+            }
+        }
+        return (_trimIds(expired, count), bucket);
+    }
+
+    function _trimIds(uint256[] memory _ids, uint256 _count)
+        internal
+        pure
+        returns (uint256[] memory)
+    {
+        uint256[] memory trimmed = new uint256[](_count);
+        for (uint256 j; j < _count; j++) {
+            trimmed[j] = _ids[j];
+        }
+        return trimmed;
+    }
+
+    /**
+     * @dev Get a page of at most `_limit` auctions starting at index `_cursor`
+     * @return the auctions page, the cursor to use for the next page
+     */
+    function getAuctions(uint256 _cursor, uint256 _limit)
+        public
+        view
+        returns (Auction[] memory, uint256)
+    {
+        uint256 end = Pagination.pageEnd(_cursor, _limit, auctionsList.length);
+        Auction[] memory page = new Auction[](end - _cursor);
+        for (uint256 i = _cursor; i < end; i++) {
+            page[i - _cursor] = auctionsList[i];
+        }
+        return (page, end);
+    }
+
+    function getAuctionsBySeller(
+        address _seller,
+        uint256 _cursor,
+        uint256 _limit
+    ) public view returns (Auction[] memory, uint256) {
+        return
+            _filterAuctions(
+                Filter.SELLER,
+                _seller,
+                Status.OPEN,
+                _cursor,
+                _limit
+            );
+    }
+
+    /**
+     * @dev Get a page of the auctions `_bidder` placed a bid on, whether they are
+     * still the highest bidder or not, `_cursor` is a position in the bidder index
+     * not an auction id
+     * @return the auctions page, the cursor to use for the next page
+     */
+    function getAuctionsByBidder(
+        address _bidder,
+        uint256 _cursor,
+        uint256 _limit
+    ) public view returns (Auction[] memory, uint256) {
+        uint256[] storage ids = bidderAuctions[_bidder];
+        uint256 end = Pagination.pageEnd(_cursor, _limit, ids.length);
+        Auction[] memory page = new Auction[](end - _cursor);
+        for (uint256 i = _cursor; i < end; i++) {
+            page[i - _cursor] = auctionsList[ids[i]];
+        }
+        return (page, end);
+    }
+
+    function getAuctionsByStatus(
+        Status _status,
+        uint256 _cursor,
+        uint256 _limit
+    ) public view returns (Auction[] memory, uint256) {
+        return
+            _filterAuctions(
+                Filter.STATUS,
+                address(0),
+                _status,
+                _cursor,
+                _limit
+            );
+    }
+
+    /**
+     * @dev Scan at most `_limit` auctions from `_cursor` and collect those matching the filter,
+     * a page may hold fewer matches than `_limit` (even none), the walk is over when the returned cursor doesn't move
+     * @return the matching auctions, the cursor to use for the next page
+     */
+    function _filterAuctions(
+        Filter _filter,
+        address _account,
+        Status _status,
+        uint256 _cursor,
+        uint256 _limit
+    ) internal view returns (Auction[] memory, uint256) {
+        uint256 end = Pagination.pageEnd(_cursor, _limit, auctionsList.length);
+        Auction[] memory matches = new Auction[](end - _cursor);
+
+        uint256 count;
+        for (uint256 i = _cursor; i < end; i++) {
+            Auction storage auction = auctionsList[i];
+            bool isMatch;
+            if (_filter == Filter.SELLER) {
+                isMatch = auction.seller == _account;
+            } else {
+                isMatch = auction.status == _status;
+            }
+            if (isMatch) {
+                matches[count] = auction;
+                count++;
+            }
+        }
+
+        Auction[] memory page = new Auction[](count);
+        for (uint256 j; j < count; j++) {
+            page[j] = matches[j];
+        }
+        return (page, end);
+    }
+
     function _convertUSDToETH(uint256 amountInUSD) public returns (uint256) {
         return IFactory(factory).convertUSDToETH(amountInUSD);
     }
 
+    function quoteUSDToETH(uint256 amountInUSD) public view returns (uint256) {
+        return IFactory(factory).quoteUSDToETH(amountInUSD);
+    }
+
     //--------------------------------------------------------------------
     // ADMIN FUNCTIONS
 
     function changeFee(uint256 _newFee) public onlyAdmin {
         fee = _newFee;
+
+        emit FeeChanged(_newFee);
     }
 }
@@ -0,0 +1,83 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+/**
+ * @dev EIP-1167 minimal proxies: a 45 bytes contract delegating every call to an implementation
+ */
+library Clones {
+    /**
+     * @dev Deploy a minimal proxy of `_implementation` with CREATE
+     * @return instance the proxy address
+     */
+    function clone(address _implementation)
+        internal
+        returns (address instance)
+    {
+        assembly {
+            let ptr := mload(0x40)
+            mstore(
+                ptr,
+                0x3d602d80600a3d3981f3363d3d373d3d3d363d73000000000000000000000000
+            )
+            mstore(add(ptr, 0x14), shl(0x60, _implementation))
+            mstore(
+                add(ptr, 0x28),
+                0x5af43d82803e903d91602b57fd5bf30000000000000000000000000000000000
+            )
+            instance := create(0, ptr, 0x37)
+        }
+        require(instance != address(0), "clone failed");
+    }
+
+    /**
+     * @dev Deploy a minimal proxy of `_implementation` with CREATE2, the same salt can only be used once
+     * @return instance the proxy address, given by predictDeterministicAddress
+     */
+    function cloneDeterministic(address _implementation, bytes32 _salt)
+        internal
+        returns (address instance)
+    {
+        assembly {
+            let ptr := mload(0x40)
+            mstore(
+                ptr,
+                0x3d602d80600a3d3981f3363d3d373d3d3d363d73000000000000000000000000
+            )
+            mstore(add(ptr, 0x14), shl(0x60, _implementation))
+            mstore(
+                add(ptr, 0x28),
+                0x5af43d82803e903d91602b57fd5bf30000000000000000000000000000000000
+            )
+            instance := create2(0, ptr, 0x37, _salt)
+        }
+        require(instance != address(0), "clone failed");
+    }
+
+    /**
+     * @dev Compute the address of a proxy of `_implementation` deployed by `_deployer` with `_salt`
+     * @return predicted the proxy address
+     */
+    function predictDeterministicAddress(
+        address _implementation,
+        bytes32 _salt,
+        address _deployer
+    ) internal pure returns (address predicted) {
+        assembly {
+            let ptr := mload(0x40)
+            mstore(
+                ptr,
+                0x3d602d80600a3d3981f3363d3d373d3d3d363d73000000000000000000000000
+            )
+            mstore(add(ptr, 0x14), shl(0x60, _implementation))
+            mstore(
+                add(ptr, 0x28),
+                0x5af43d82803e903d91602b57fd5bf3ff00000000000000000000000000000000
+            )
+            mstore(add(ptr, 0x38), shl(0x60, _deployer))
+            mstore(add(ptr, 0x4c), _salt)
+            mstore(add(ptr, 0x6c), keccak256(ptr, 0x37))
+            predicted := keccak256(add(ptr, 0x37), 0x55)
+        }
+    }
+}
@@ -3,5 +3,9 @@
 pragma solidity ^0.8.0;
 
 interface IFactory {
+    function getPrice() external returns (uint256, uint256);
+
     function convertUSDToETH(uint256 amountInUSD) external returns (uint256);
+
+    function quoteUSDToETH(uint256 amountInUSD) external view returns (uint256);
 }
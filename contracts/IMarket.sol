@@ -9,3 +9,9 @@ interface IStoreFactory {
 interface IMarket {
     function changeFee(uint256 _newFee) external;
 }
+
+interface IPullPayment {
+    function credits(address _payee) external view returns (uint256);
+
+    function withdrawFor(address payable _payee) external;
+}
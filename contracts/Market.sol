@@ -3,15 +3,29 @@
 pragma solidity ^0.8.0;
 
 import "./IFactory.sol";
+import "./Pagination.sol";
+import "./Packing.sol";
+import "./PullPayment.sol";
 
-contract Market {
+contract Market is PullPayment {
     //--------------------------------------------------------------------
     // VARIABLES
 
     address public factory;
     uint256 public fee = 5;
 
-    Product[] public products;
+    // products by id, ids are never reused so they stay valid after removals
+    mapping(uint256 => Product) public products;
+    uint256 public productIds;
+    // ids of the products not removed, in no particular order: a removal moves
+    // the last id into the freed position
+    uint32[] private activeProducts;
+
+    // products ids listed by each seller and bought by each buyer
+    mapping(address => uint256[]) public sellerProducts;
+    mapping(address => uint256[]) public buyerProducts;
+    // position of a product id in its current buyer index
+    mapping(uint256 => uint256) private buyerProductPosition;
 
     enum Status {
         REMOVED,
@@ -21,23 +35,43 @@ contract Market {
         SOLD
     }
 
+    // packed in 4 slots: [id, seller] [metadataHash] [priceInUSD, buyPriceInETH]
+    // [buyer, status, listed_on, activePosition], a purchase only writes the last two slots
     struct Product {
-        uint256 id;
+        uint32 id;
         address payable seller;
-        string name;
-        string description;
-        string image;
-        uint256 priceInUSD;
-        uint256 buyPriceInETH;
+        // sha256 of the product metadata JSON (name, description, image) stored on IPFS
+        bytes32 metadataHash;
+        uint96 priceInUSD;
+        uint96 buyPriceInETH;
         address payable buyer;
         Status status;
-        uint256 listed_on;
+        uint40 listed_on;
+        // position of the product id in activeProducts
+        uint32 activePosition;
     }
 
     //--------------------------------------------------------------------
     // EVENTS
 
-    event ProductAdded(uint256 id, address seller, uint256 timestamp);
+    event ProductAdded(
+        uint256 indexed id,
+        address indexed seller,
+        bytes32 metadataHash,
+        uint256 priceInUSD,
+        uint256 timestamp
+    );
+    event PriceChanged(uint256 indexed id, uint256 priceInUSD);
+    event ProductPurchased(
+        uint256 indexed id,
+        address indexed buyer,
+        uint256 priceInETH
+    );
+    event ProductSent(uint256 indexed id);
+    event ProductSold(uint256 indexed id, address indexed buyer);
+    event PurchaseCancelled(uint256 indexed id, address indexed buyer);
+    event ProductRemoved(uint256 indexed id);
+    event FeeChanged(uint256 fee);
 
     //--------------------------------------------------------------------
     // MODIFIERS
@@ -72,44 +106,46 @@ contract Market {
     //--------------------------------------------------------------------
     // FUNCTIONS
 
-    function addProduct(
-        string memory _name,
-        string memory _description,
-        string memory _image,
-        uint256 _price
+    function addProduct(bytes32 _metadataHash, uint256 _price) public {
+        _addProduct(_metadataHash, _price);
+    }
+
+    function addProducts(
+        bytes32[] memory _metadataHashes,
+        uint256[] memory _prices
     ) public {
-        uint256 productId = products.length;
-        products.push(
-            Product(
-                productId,
-                payable(msg.sender),
-                _name,
-                _description,
-                _image,
-                _price,
-                0,
-                payable(address(0)),
-                Status.INSALE,
-                block.timestamp
-            )
-        );
+        require(_metadataHashes.length == _prices.length, "invalid batch");
+        for (uint256 i; i < _metadataHashes.length; i++) {
+            _addProduct(_metadataHashes[i], _prices[i]);
+        }
     }
 
     function purchase(uint256 _id) public payable {
-        Product memory product = products[_id];
-
-        require(
-            msg.sender != product.seller && product.status == Status.INSALE,
-            "Invalid purchase"
-        );
-
-        uint256 priceInETH = _convertUSDToETH(product.priceInUSD);
+        uint256 priceInETH = _convertUSDToETH(products[_id].priceInUSD);
+        _purchase(_id, priceInETH);
         require(msg.value == priceInETH, "insuffisant amount");
+    }
 
-        product.buyer = payable(msg.sender);
-        product.buyPriceInETH = priceInETH;
-        product.status = Status.PENDING;
-        products[_id] = product;
+    /**
+     * @dev Buy several products in one transaction, the ETH/USD price is fetched once
+     * for the whole batch and any amount sent above the batch total is credited back
+     * to the buyer (withdrawn like any other credit)
+     */
+    function purchaseBatch(uint256[] memory _ids) public payable {
+        (uint256 price, uint256 decimals) = IFactory(factory).getPrice();
+
+        uint256 total;
+        for (uint256 i; i < _ids.length; i++) {
+            uint256 priceInETH = (products[_ids[i]].priceInUSD * 10**decimals) /
+                price;
+            _purchase(_ids[i], priceInETH);
+            total += priceInETH;
+        }
+
+        require(msg.value >= total, "insuffisant amount");
+        if (msg.value > total) {
+            _credit(msg.sender, msg.value - total);
+        }
     }
 
     function sendProduct(uint256 _id)
@@ -118,39 +154,48 @@ contract Market {
         inStatus(_id, Status.PENDING)
     {
         products[_id].status = Status.SENT;
+
+        emit ProductSent(_id);
     }
 
     function confirmRecieved(uint256 _id) public {
-        Product memory product = products[_id];
+        Product storage product = products[_id];
 
         require(
             msg.sender == product.buyer && product.status == Status.SENT,
             "Confirmation not allowed"
         );
 
-        uint256 priceMinusFee = (product.buyPriceInETH * (1000 - fee)) / 1000;
-        uint256 totalFee = (product.buyPriceInETH * fee) / 1000;
+        uint256 buyPriceInETH = product.buyPriceInETH;
+        uint256 priceMinusFee = (buyPriceInETH * (1000 - fee)) / 1000;
+        uint256 totalFee = (buyPriceInETH * fee) / 1000;
 
         product.status = Status.SOLD;
-        products[_id] = product;
 
-        payable(factory).transfer(totalFee);
-        product.seller.transfer(priceMinusFee);
+        _credit(factory, totalFee);
+        _credit(product.seller, priceMinusFee);
+
+        emit ProductSold(_id, msg.sender);
     }
 
     function cancelPurchase(uint256 _id) public {
-        Product memory product = products[_id];
+        Product storage product = products[_id];
+        address payable buyer = product.buyer;
 
         require(
-            msg.sender == product.buyer && product.status == Status.PENDING,
+            msg.sender == buyer && product.status == Status.PENDING,
             "Cancel not allowed"
         );
-        product.buyer.transfer(product.buyPriceInETH);
+        uint256 buyPriceInETH = product.buyPriceInETH;
+        _removeFromBuyerIndex(buyer, _id);
 
         product.buyPriceInETH = 0;
         product.status = Status.INSALE;
         product.buyer = payable(address(0));
-        products[_id] = product;
+
+        _credit(buyer, buyPriceInETH);
+
+        emit PurchaseCancelled(_id, buyer);
     }
 
     function remove(uint256 _id)
@@ -158,7 +203,14 @@ contract Market {
         onlySeller(_id)
         inStatus(_id, Status.INSALE)
     {
-        delete products[_id];
+        _removeProduct(_id);
+    }
+
+    function removeProducts(uint256[] memory _ids) public {
+        for (uint256 i; i < _ids.length; i++) {
+            _checkSellerInSale(_ids[i]);
+            _removeProduct(_ids[i]);
+        }
     }
 
     function changePrice(uint256 _id, uint256 _newPrice)
@@ -166,21 +218,261 @@ contract Market {
         onlySeller(_id)
         inStatus(_id, Status.INSALE)
     {
-        products[_id].priceInUSD = _newPrice;
+        products[_id].priceInUSD = Packing.toUint96(_newPrice);
+
+        emit PriceChanged(_id, _newPrice);
+    }
+
+    function changePrices(uint256[] memory _ids, uint256[] memory _newPrices)
+        public
+    {
+        require(_ids.length == _newPrices.length, "invalid batch");
+        for (uint256 i; i < _ids.length; i++) {
+            _checkSellerInSale(_ids[i]);
+            products[_ids[i]].priceInUSD = Packing.toUint96(_newPrices[i]);
+
+            emit PriceChanged(_ids[i], _newPrices[i]);
+        }
     }
 
+    /**
+     * @dev Get every product not removed, in no particular order
+     */
     function getAllProducts() public view returns (Product[] memory) {
-        return products;
+        Product[] memory all = new Product[](activeProducts.length);
+        for (uint256 i; i < all.length; i++) {
+            all[i] = products[activeProducts[i]];
+        }
+        return all;
+    }
+
+    /**
+     * @dev Get the number of product ids assigned, removed products included
+     */
+    function getProductsCount() public view returns (uint256) {
+        return productIds;
+    }
+
+    function getActiveProductsCount() public view returns (uint256) {
+        return activeProducts.length;
+    }
+
+    /**
+     * @dev Get a page of at most `_limit` products not removed starting at position `_cursor`,
+     * a removal moves the last product into the freed position
+     * @return the products page, the cursor to use for the next page
+     */
+    function getProducts(uint256 _cursor, uint256 _limit)
+        public
+        view
+        returns (Product[] memory, uint256)
+    {
+        uint256 end = Pagination.pageEnd(_cursor, _limit, activeProducts.length);
+        Product[] memory page = new Product[](end - _cursor);
+        for (uint256 i = _cursor; i < end; i++) {
+            page[i - _cursor] = products[activeProducts[i]];
+        }
+        return (page, end);
+    }
+
+    function getSellerProductsCount(address _seller)
+        public
+        view
+        returns (uint256)
+    {
+        return sellerProducts[_seller].length;
+    }
+
+    function getBuyerProductsCount(address _buyer)
+        public
+        view
+        returns (uint256)
+    {
+        return buyerProducts[_buyer].length;
+    }
+
+    /**
+     * @dev Get a page of the products listed by `_seller`,
+     * `_cursor` is a position in the seller index not a product id,
+     * removed products stay in the index but are skipped
+     * @return the products page, the cursor to use for the next page
+     */
+    function getProductsBySeller(
+        address _seller,
+        uint256 _cursor,
+        uint256 _limit
+    ) public view returns (Product[] memory, uint256) {
+        return _getIndexedProducts(sellerProducts[_seller], _cursor, _limit);
+    }
+
+    /**
+     * @dev Get a page of the products bought by `_buyer`,
+     * `_cursor` is a position in the buyer index not a product id
+     * @return the products page, the cursor to use for the next page
+     */
+    function getProductsByBuyer(
+        address _buyer,
+        uint256 _cursor,
+        uint256 _limit
+    ) public view returns (Product[] memory, uint256) {
+        return _getIndexedProducts(buyerProducts[_buyer], _cursor, _limit);
+    }
+
+    /**
+     * @dev Scan at most `_limit` products not removed from position `_cursor` and collect
+     * those in `_status`. A page may hold fewer matches than `_limit` (even none), the walk
+     * is over when the returned cursor doesn't move
+     * @return the matching products, the cursor to use for the next page
+     */
+    function getProductsByStatus(
+        Status _status,
+        uint256 _cursor,
+        uint256 _limit
+    ) public view returns (Product[] memory, uint256) {
+        uint256 end = Pagination.pageEnd(_cursor, _limit, activeProducts.length);
+        Product[] memory matches = new Product[](end - _cursor);
+
+        uint256 count;
+        for (uint256 i = _cursor; i < end; i++) {
+            Product storage product = products[activeProducts[i]];
+            if (product.status == _status) {
+                matches[count] = product;
+                count++;
+            }
+        }
+
+        Product[] memory page = new Product[](count);
+        for (uint256 j; j < count; j++) {
+            page[j] = matches[j];
+        }
+        return (page, end);
+    }
+
+    function _addProduct(bytes32 _metadataHash, uint256 _price) internal {
+        uint256 productId = productIds;
+        products[productId] = Product(
+            Packing.toUint32(productId),
+            payable(msg.sender),
+            _metadataHash,
+            Packing.toUint96(_price),
+            0,
+            payable(address(0)),
+            Status.INSALE,
+            uint40(block.timestamp),
+            Packing.toUint32(activeProducts.length)
+        );
+        activeProducts.push(uint32(productId));
+        sellerProducts[msg.sender].push(productId);
+        productIds++;
+
+        emit ProductAdded(
+            productId,
+            msg.sender,
+            _metadataHash,
+            _price,
+            block.timestamp
+        );
+    }
+
+    /**
+     * @dev Same checks as the onlySeller and inStatus(INSALE) modifiers for batch operations
+     */
+    function _checkSellerInSale(uint256 _id) internal view {
+        Product storage product = products[_id];
+        require(msg.sender == product.seller, "only seller call");
+        require(product.status == Status.INSALE, "Wrong status");
+    }
+
+    function _purchase(uint256 _id, uint256 _priceInETH) internal {
+        Product storage product = products[_id];
+
+        require(
+            msg.sender != product.seller && product.status == Status.INSALE,
+            "Invalid purchase"
+        );
+
+        product.buyer = payable(msg.sender);
+        product.buyPriceInETH = Packing.toUint96(_priceInETH);
+        product.status = Status.PENDING;
+
+        buyerProductPosition[_id] = buyerProducts[msg.sender].length;
+        buyerProducts[msg.sender].push(_id);
+
+        emit ProductPurchased(_id, msg.sender, _priceInETH);
+    }
+
+    /**
+     * @dev Scan at most `_limit` entries of the `_ids` index from `_cursor`, removed
+     * products are skipped so a page may hold fewer products than `_limit` (even none)
+     * @return the products page, the cursor to use for the next page
+     */
+    function _getIndexedProducts(
+        uint256[] storage _ids,
+        uint256 _cursor,
+        uint256 _limit
+    ) internal view returns (Product[] memory, uint256) {
+        uint256 end = Pagination.pageEnd(_cursor, _limit, _ids.length);
+        Product[] memory matches = new Product[](end - _cursor);
+
+        uint256 count;
+        for (uint256 i = _cursor; i < end; i++) {
+            Product storage product = products[_ids[i]];
+            if (product.status != Status.REMOVED) {
+                matches[count] = product;
+                count++;
+            }
+        }
+
+        Product[] memory page = new Product[](count);
+        for (uint256 j; j < count; j++) {
+            page[j] = matches[j];
+        }
+        return (page, end);
+    }
+
+    /**
+     * @dev Delete `_id` and swap and pop it out of the active products in O(1)
+     */
+    function _removeProduct(uint256 _id) internal {
+        uint256 position = products[_id].activePosition;
+        uint32 lastId = activeProducts[activeProducts.length - 1];
+
+        activeProducts[position] = lastId;
+        products[lastId].activePosition = Packing.toUint32(position);
+        activeProducts.pop();
+        delete products[_id];
+
+        emit ProductRemoved(_id);
+    }
+
+    /**
+     * @dev Swap and pop `_id` out of the buyer index in O(1)
+     */
+    function _removeFromBuyerIndex(address _buyer, uint256 _id) internal {
+        uint256[] storage ids = buyerProducts[_buyer];
+        uint256 position = buyerProductPosition[_id];
+        uint256 lastId = ids[ids.length - 1];
+
+        ids[position] = lastId;
+        buyerProductPosition[lastId] = position;
+        ids.pop();
+        delete buyerProductPosition[_id];
     }
 
     function _convertUSDToETH(uint256 amountInUSD) public returns (uint256) {
         return IFactory(factory).convertUSDToETH(amountInUSD);
     }
 
+    function quoteUSDToETH(uint256 amountInUSD) public view returns (uint256) {
+        return IFactory(factory).quoteUSDToETH(amountInUSD);
+    }
+
     //--------------------------------------------------------------------
     // ADMIN FUNCTIONS
 
     function changeFee(uint256 _newFee) public onlyAdmin {
         fee = _newFee;
+
+        emit FeeChanged(_newFee);
     }
 }
@@ -0,0 +1,24 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+library Packing {
+    /**
+     * @dev Checked downcasts used to store values in packed struct fields,
+     * explicit conversions would silently truncate the values that don't fit
+     */
+    function toUint96(uint256 _value) internal pure returns (uint96) {
+        require(_value <= type(uint96).max, "value doesn't fit in 96 bits");
+        return uint96(_value);
+    }
+
+    function toUint40(uint256 _value) internal pure returns (uint40) {
+        require(_value <= type(uint40).max, "value doesn't fit in 40 bits");
+        return uint40(_value);
+    }
+
+    function toUint32(uint256 _value) internal pure returns (uint32) {
+        require(_value <= type(uint32).max, "value doesn't fit in 32 bits");
+        return uint32(_value);
+    }
+}
@@ -0,0 +1,24 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+library Pagination {
+    /**
+     * @dev Get the end index (exclusive) of a page of at most `_limit` items
+     * starting at `_cursor` in an array of `_length` items
+     * @return the page end index, equal to `_cursor` when the page is empty
+     */
+    function pageEnd(
+        uint256 _cursor,
+        uint256 _limit,
+        uint256 _length
+    ) internal pure returns (uint256) {
+        if (_cursor >= _length) {
+            return _cursor;
+        }
+        if (_limit > _length - _cursor) {
+            return _length;
+        }
+        return _cursor + _limit;
+    }
+}
@@ -0,0 +1,42 @@
+// SPDX-License-Identifier: MIT
+
+pragma solidity ^0.8.0;
+
+abstract contract PullPayment {
+    //--------------------------------------------------------------------
+    // VARIABLES
+
+    // ETH owed to each address, settlements only credit it and payees pull it
+    mapping(address => uint256) public credits;
+
+    //--------------------------------------------------------------------
+    // EVENTS
+
+    event PaymentWithdrawn(address indexed payee, uint256 amount);
+
+    //--------------------------------------------------------------------
+    // FUNCTIONS
+
+    function withdraw() public {
+        withdrawFor(payable(msg.sender));
+    }
+
+    /**
+     * @dev Send all the ETH credited to `_payee`, anyone can trigger it as the funds
+     * always go to the payee which allows claiming from several contracts in one transaction
+     */
+    function withdrawFor(address payable _payee) public {
+        uint256 amount = credits[_payee];
+        require(amount > 0, "nothing to withdraw");
+
+        credits[_payee] = 0;
+        (bool sent, ) = _payee.call{value: amount}("");
+        require(sent, "withdraw failed");
+
+        emit PaymentWithdrawn(_payee, amount);
+    }
+
+    function _credit(address _payee, uint256 _amount) internal {
+        credits[_payee] += _amount;
+    }
+}
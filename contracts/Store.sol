@@ -3,8 +3,11 @@
 pragma solidity ^0.8.0;
 
 import "./IFactory.sol";
+import "./Pagination.sol";
+import "./Packing.sol";
+import "./PullPayment.sol";
 
-contract Store {
+contract Store is PullPayment {
     //--------------------------------------------------------------------
     // VARIABLES
 
@@ -15,9 +18,27 @@ contract Store {
     uint256 public productIds;
     uint256 public orderIds;
 
-    StoreProduct[] public storeProducts;
+    // live counter read by the store directory: orders not completed or cancelled yet
+    uint32 public openOrdersCount;
+
+    // products by id, ids are never reused so they stay valid after removals
+    mapping(uint256 => StoreProduct) public storeProducts;
+    // ids of the products not removed, in no particular order: a removal moves
+    // the last id into the freed position
+    uint32[] private activeProducts;
+    // position of a product id in activeProducts
+    mapping(uint256 => uint256) private activeProductPosition;
     ProductOrder[] public storeOrders;
     mapping(uint256 => ProductReview[]) productsReviewMapping;
+
+    // orders ids created by each buyer
+    mapping(address => uint256[]) public buyerOrders;
+    // position of an order id in its buyer index
+    mapping(uint256 => uint256) private buyerOrderPosition;
+
+    // FIFO queue of the orders in each status, completed orders stay queued
+    // until they are reviewed
+    mapping(Status => OrderQueue) private orderQueues;
     
     uint256 constant private FEE = 3; // fee = 0.3%
 
@@ -28,29 +49,43 @@ contract Store {
     enum Status {
         PENDING,
         SENT,
-        COMPLETED
+        COMPLETED,
+        CANCELLED
     }
 
+    // packed in 2 slots: every field except metadataHash shares the first slot
     struct StoreProduct {
-        uint256 productId;
-        string name;
-        string description;
-        string image;
-        uint256 priceInUSD;
-        uint256 quantity;
-        uint256 activeOrders;
+        uint32 productId;
+        uint96 priceInUSD;
+        // stock left once the pending orders quantities are reserved
+        uint32 quantity;
+        uint32 activeOrders;
         Type productType;
-        uint256 listed_on;
+        uint40 listed_on;
+        // sha256 of the product metadata JSON (name, description, image) stored on IPFS
+        bytes32 metadataHash;
     }
 
+    // packed in 2 slots: [orderId, productId, buyer, orderQuantity]
+    // [orderTotalBuyPriceInETH, hasBeenReviewed, orderStatus, previousInQueue, nextInQueue]
     struct ProductOrder {
-        uint256 orderId;
-        uint256 productId;
+        uint32 orderId;
+        uint32 productId;
         address payable buyer;
-        uint256 orderQuantity;
-        uint256 orderTotalBuyPriceInETH;
+        uint32 orderQuantity;
+        uint96 orderTotalBuyPriceInETH;
         bool hasBeenReviewed;
         Status orderStatus;
+        // links of the order in its status queue: order id + 1, 0 at the ends
+        uint32 previousInQueue;
+        uint32 nextInQueue;
+    }
+
+    // doubly linked list of orders (order id + 1, 0 when the queue is empty)
+    struct OrderQueue {
+        uint32 head;
+        uint32 tail;
+        uint32 length;
     }
 
     struct ProductReview {
@@ -59,6 +94,38 @@ contract Store {
         string review;
     }
 
+    //--------------------------------------------------------------------
+    // EVENTS
+
+    event ProductAdded(
+        uint256 indexed productId,
+        bytes32 metadataHash,
+        uint256 priceInUSD,
+        uint256 quantity,
+        Type productType,
+        uint256 timestamp
+    );
+    event PriceChanged(uint256 indexed productId, uint256 priceInUSD);
+    event ProductRemoved(uint256 indexed productId);
+    event OrderCreated(
+        uint256 indexed orderId,
+        uint256 indexed productId,
+        address indexed buyer,
+        uint256 quantity,
+        uint256 totalPriceInETH,
+        uint256 timestamp
+    );
+    event OrderSent(uint256 indexed orderId);
+    event OrderCompleted(uint256 indexed orderId);
+    event OrderCancelled(uint256 indexed orderId);
+    event ReviewAdded(
+        uint256 indexed productId,
+        uint256 indexed orderId,
+        address indexed buyer,
+        string rating,
+        string review
+    );
+
     //--------------------------------------------------------------------
     // MODIFIERS
 
@@ -70,11 +137,18 @@ contract Store {
     //--------------------------------------------------------------------
     // CONSTRUCTOR
 
-    constructor(
+    // stores are minimal proxies of this contract initialized by the StoreFactory,
+    // the implementation itself is locked
+    constructor() {
+        factory = address(this);
+    }
+
+    function initialize(
         address _factory,
         address _owner,
         string memory _storeMetaData
-    ) {
+    ) public {
+        require(factory == address(0), "store already initialized");
         owner = payable(_owner);
         storeMetaData = _storeMetaData;
         factory = _factory;
@@ -84,107 +158,113 @@ contract Store {
     // FUNCTIONS
 
     function addProduct(
-        string memory _name,
-        string memory _description,
-        string memory _image,
+        bytes32 _metadataHash,
         uint256 _price,
         uint256 _quantity,
         Type _type
     ) public onlyOwner {
-        if (_type == Type.FIXED) {
-            storeProducts.push(
-                StoreProduct(
-                    productIds,
-                    _name,
-                    _description,
-                    _image,
-                    _price,
-                    _quantity,
-                    0,
-                    Type.FIXED,
-                    block.timestamp
-                )
-            );
-        } else {
-            storeProducts.push(
-                StoreProduct(
-                    productIds,
-                    _name,
-                    _description,
-                    _image,
-                    _price,
-                    1,
-                    0,
-                    Type.UNLIMITED,
-                    block.timestamp
-                )
+        _addProduct(_metadataHash, _price, _quantity, _type);
+    }
+
+    function addProducts(
+        bytes32[] memory _metadataHashes,
+        uint256[] memory _prices,
+        uint256[] memory _quantities,
+        Type[] memory _types
+    ) public onlyOwner {
+        uint256 length = _metadataHashes.length;
+        require(
+            length == _prices.length &&
+                length == _quantities.length &&
+                length == _types.length,
+            "invalid batch"
+        );
+        for (uint256 i; i < length; i++) {
+            _addProduct(
+                _metadataHashes[i],
+                _prices[i],
+                _quantities[i],
+                _types[i]
             );
         }
-        productIds++;
+    }
+
+    function changePrices(
+        uint256[] memory _productIds,
+        uint256[] memory _newPrices
+    ) public onlyOwner {
+        require(_productIds.length == _newPrices.length, "invalid batch");
+        for (uint256 i; i < _productIds.length; i++) {
+            StoreProduct storage product = storeProducts[_productIds[i]];
+            // removed and never added products both have a zero metadata hash
+            require(product.metadataHash != bytes32(0), "wrong product id");
+            product.priceInUSD = Packing.toUint96(_newPrices[i]);
+
+            emit PriceChanged(_productIds[i], _newPrices[i]);
+        }
     }
 
     function createBuyOrder(uint256 _productId, uint256 _quantity)
         public
         payable
     {
-        StoreProduct memory product = storeProducts[_productId];
-
-        uint256 priceInETH = _convertUSDToETH(product.priceInUSD);
-
-        if (product.productType == Type.FIXED) {
-            require(_quantity <= product.quantity, "unsuffisant quantity");
-            require(msg.value == priceInETH * _quantity, "unsuffisant amount");
-
-            ProductOrder memory order = ProductOrder(
-                orderIds,
-                _productId,
-                payable(msg.sender),
-                _quantity,
-                priceInETH * _quantity,
-                false,
-                Status.PENDING
-            );
-            storeOrders.push(order);
-        } else {
-            require(msg.value == priceInETH, "unsuffisant amount");
+        uint256 priceInETH = _convertUSDToETH(
+            storeProducts[_productId].priceInUSD
+        );
+        uint256 orderTotal = _createBuyOrder(_productId, _quantity, priceInETH);
+        require(msg.value == orderTotal, "unsuffisant amount");
+    }
 
-            ProductOrder memory order = ProductOrder(
-                orderIds,
-                _productId,
-                payable(msg.sender),
-                0,
-                priceInETH,
-                false,
-                Status.PENDING
-            );
-            storeOrders.push(order);
+    /**
+     * @dev Create an order for each (product, quantity) pair in one transaction,
+     * the ETH/USD price is fetched once for the whole batch and any amount
+     * sent above the batch total is credited back to the buyer
+     */
+    function createBuyOrders(
+        uint256[] memory _productIds,
+        uint256[] memory _quantities
+    ) public payable {
+        require(_productIds.length == _quantities.length, "invalid batch");
+
+        (uint256 price, uint256 decimals) = IFactory(factory).getPrice();
+
+        uint256 total;
+        for (uint256 i; i < _productIds.length; i++) {
+            uint256 priceInETH = (storeProducts[_productIds[i]].priceInUSD *
+                10**decimals) / price;
+            total += _createBuyOrder(_productIds[i], _quantities[i], priceInETH);
         }
 
-        product.activeOrders++;
-        storeProducts[_productId] = product;
-
-        orderIds++;
+        require(msg.value >= total, "unsuffisant amount");
+        if (msg.value > total) {
+            _credit(msg.sender, msg.value - total);
+        }
     }
 
     function fillOrder(uint256 _orderId) public onlyOwner {
-        require(_orderId < orderIds, "wrong order id");
-
-        ProductOrder memory order = storeOrders[_orderId];
-
-        require(order.orderStatus == Status.PENDING, "invalid order status");
-
-        StoreProduct memory product = storeProducts[order.productId];
+        _fillOrder(_orderId);
+    }
 
-        product.quantity -= order.orderQuantity;
-        order.orderStatus = Status.SENT;
+    function fillOrders(uint256[] memory _orderIds) public onlyOwner {
+        for (uint256 i; i < _orderIds.length; i++) {
+            _fillOrder(_orderIds[i]);
+        }
+    }
 
-        storeOrders[_orderId] = order;
-        storeProducts[order.productId] = product;
+    /**
+     * @dev Fill the `_count` oldest pending orders (or all of them if there are fewer),
+     * in the order they were created
+     */
+    function fillNextOrders(uint256 _count) public onlyOwner {
+        OrderQueue storage pending = orderQueues[Status.PENDING];
+        for (uint256 i; i < _count && pending.head != 0; i++) {
+            _fillOrder(pending.head - 1);
+        }
     }
 
     function confirmRecieved(uint256 _orderId) public {
         require(_orderId < orderIds, "wrong order id");
-        ProductOrder memory order = storeOrders[_orderId];
+        ProductOrder storage order = storeOrders[_orderId];
 
         require(
             msg.sender == order.buyer && order.orderStatus == Status.SENT,
@@ -195,29 +275,44 @@ contract Store {
         uint256 fee = (totalAmount * FEE) / 1000;
         uint256 priceMinusFee = totalAmount - fee;
 
+        _dequeue(Status.SENT, _orderId);
         order.orderStatus = Status.COMPLETED;
-        storeOrders[_orderId] = order;
+        _enqueue(Status.COMPLETED, _orderId);
         storeProducts[order.productId].activeOrders--;
+        openOrdersCount--;
+
+        _credit(owner, priceMinusFee);
+        _credit(factory, fee);
 
-        owner.transfer(priceMinusFee);
-        payable(factory).transfer(fee);
+        emit OrderCompleted(_orderId);
     }
 
     function cancelOrder(uint256 _orderId) public {
-        ProductOrder memory order = storeOrders[_orderId];
+        ProductOrder storage order = storeOrders[_orderId];
+        address payable buyer = order.buyer;
 
         require(
-            msg.sender == order.buyer && order.orderStatus == Status.PENDING,
+            msg.sender == buyer && order.orderStatus == Status.PENDING,
             "invalid order status"
         );
 
         uint256 totalAmount = order.orderTotalBuyPriceInETH;
+        uint256 productId = order.productId;
+        uint32 quantity = order.orderQuantity;
 
-        order.buyer.transfer(totalAmount);
+        _dequeue(Status.PENDING, _orderId);
+        // cancelled orders stay listed with their own status, they're never queued
+        order.orderStatus = Status.CANCELLED;
+        _removeFromBuyerIndex(buyer, _orderId);
 
-        delete storeOrders[_orderId];
+        // unlimited products orders have no quantity, nothing was reserved
+        storeProducts[productId].quantity += quantity;
+        storeProducts[productId].activeOrders--;
+        openOrdersCount--;
 
-        storeProducts[order.productId].activeOrders--;
+        _credit(buyer, totalAmount);
+
+        emit OrderCancelled(_orderId);
     }
 
     function leaveReview(
@@ -226,35 +321,200 @@ contract Store {
         string memory _review
     ) public {
         require(_orderId < orderIds, "wrong order id");
-        ProductOrder memory order = storeOrders[_orderId];
+        ProductOrder storage order = storeOrders[_orderId];
         require(order.orderStatus == Status.COMPLETED, "invalid order status");
         require(!order.hasBeenReviewed, "already reviewed");
 
         productsReviewMapping[order.productId].push(
             ProductReview(msg.sender, _rating, _review)
         );
+        _dequeue(Status.COMPLETED, _orderId);
         order.hasBeenReviewed = true;
-        storeOrders[_orderId] = order;
+
+        emit ReviewAdded(
+            order.productId,
+            _orderId,
+            msg.sender,
+            _rating,
+            _review
+        );
     }
 
     function removeProduct(uint256 _productId) public onlyOwner {
-        require(_productId <= productIds, "wrong product id");
-
-        StoreProduct memory product = storeProducts[_productId];
+        _removeProduct(_productId);
+    }
 
-        if (product.activeOrders == 0) {
-            delete storeProducts[_productId];
+    /**
+     * @dev Remove several products, products with active orders are skipped
+     */
+    function removeProducts(uint256[] memory _productIds) public onlyOwner {
+        for (uint256 i; i < _productIds.length; i++) {
+            _removeProduct(_productIds[i]);
         }
     }
 
+    /**
+     * @dev Get every product not removed, in no particular order
+     */
     function listStoreProducts() public view returns (StoreProduct[] memory) {
-        return storeProducts;
+        StoreProduct[] memory all = new StoreProduct[](activeProducts.length);
+        for (uint256 i; i < all.length; i++) {
+            all[i] = storeProducts[activeProducts[i]];
+        }
+        return all;
+    }
+
+    function activeProductsCount() public view returns (uint256) {
+        return activeProducts.length;
     }
 
     function listStoreOrders() public view returns (ProductOrder[] memory) {
         return storeOrders;
     }
 
+    /**
+     * @dev Get a page of at most `_limit` store products not removed starting at position
+     * `_cursor`, a removal moves the last product into the freed position
+     * @return the products page, the cursor to use for the next page
+     */
+    function getStoreProducts(uint256 _cursor, uint256 _limit)
+        public
+        view
+        returns (StoreProduct[] memory, uint256)
+    {
+        uint256 end = Pagination.pageEnd(_cursor, _limit, activeProducts.length);
+        StoreProduct[] memory page = new StoreProduct[](end - _cursor);
+        for (uint256 i = _cursor; i < end; i++) {
+            page[i - _cursor] = storeProducts[activeProducts[i]];
+        }
+        return (page, end);
+    }
+
+    /**
+     * @dev Get a page of at most `_limit` store orders starting at index `_cursor`
+     * @return the orders page, the cursor to use for the next page
+     */
+    function getStoreOrders(uint256 _cursor, uint256 _limit)
+        public
+        view
+        returns (ProductOrder[] memory, uint256)
+    {
+        uint256 end = Pagination.pageEnd(_cursor, _limit, storeOrders.length);
+        ProductOrder[] memory page = new ProductOrder[](end - _cursor);
+        for (uint256 i = _cursor; i < end; i++) {
+            page[i - _cursor] = storeOrders[i];
+        }
+        return (page, end);
+    }
+
+    function getBuyerOrdersCount(address _buyer)
+        public
+        view
+        returns (uint256)
+    {
+        return buyerOrders[_buyer].length;
+    }
+
+    /**
+     * @dev Get a page of the orders created by `_buyer`,
+     * `_cursor` is a position in the buyer index not an order id
+     * @return the orders page, the cursor to use for the next page
+     */
+    function getOrdersByBuyer(
+        address _buyer,
+        uint256 _cursor,
+        uint256 _limit
+    ) public view returns (ProductOrder[] memory, uint256) {
+        uint256[] storage ids = buyerOrders[_buyer];
+        uint256 end = Pagination.pageEnd(_cursor, _limit, ids.length);
+        ProductOrder[] memory page = new ProductOrder[](end - _cursor);
+        for (uint256 i = _cursor; i < end; i++) {
+            page[i - _cursor] = storeOrders[ids[i]];
+        }
+        return (page, end);
+    }
+
+    /**
+     * @dev Scan at most `_limit` orders from `_cursor` and collect those in `_status`.
+     * A page may hold fewer matches than `_limit` (even none), the walk is over when
+     * the returned cursor doesn't move
+     * @return the matching orders, the cursor to use for the next page
+     */
+    function getOrdersByStatus(
+        Status _status,
+        uint256 _cursor,
+        uint256 _limit
+    ) public view returns (ProductOrder[] memory, uint256) {
+        uint256 end = Pagination.pageEnd(_cursor, _limit, storeOrders.length);
+        ProductOrder[] memory matches = new ProductOrder[](end - _cursor);
+
+        uint256 count;
+        for (uint256 i = _cursor; i < end; i++) {
+            ProductOrder storage order = storeOrders[i];
+            if (order.orderStatus == _status) {
+                matches[count] = order;
+                count++;
+            }
+        }
+
+        ProductOrder[] memory page = new ProductOrder[](count);
+        for (uint256 j; j < count; j++) {
+            page[j] = matches[j];
+        }
+        return (page, end);
+    }
+
+    function getOrderQueueLength(Status _status)
+        public
+        view
+        returns (uint256)
+    {
+        return orderQueues[_status].length;
+    }
+
+    /**
+     * @dev Get a page of at most `_limit` orders of the `_status` queue, oldest first
+     * (completed orders are queued until they are reviewed), `_cursor` is 0 for the
+     * first page then the cursor returned by the previous page. When the cursor order
+     * left the queue since (filled, cancelled or reviewed) an empty page is returned with
+     * the same cursor, the walk stops there and has to be restarted from the head
+     * @return the orders page, the cursor to use for the next page
+     */
+    function getOrderQueue(
+        Status _status,
+        uint256 _cursor,
+        uint256 _limit
+    ) public view returns (ProductOrder[] memory, uint256) {
+        OrderQueue storage queue = orderQueues[_status];
+
+        // the cursor is the last order returned (order id + 1)
+        uint256 node = queue.head;
+        if (_cursor != 0) {
+            require(_cursor <= orderIds, "invalid cursor");
+            if (!_isQueued(_status, storeOrders[_cursor - 1])) {
+                return (new ProductOrder[](0), _cursor);
+            }
+            node = storeOrders[_cursor - 1].nextInQueue;
+        }
+
+        uint256 size = _limit < queue.length ? _limit : queue.length;
+        ProductOrder[] memory matches = new ProductOrder[](size);
+
+        uint256 count;
+        uint256 cursor = _cursor;
+        for (; node != 0 && count < size; count++) {
+            matches[count] = storeOrders[node - 1];
+            cursor = node;
+            node = matches[count].nextInQueue;
+        }
+
+        ProductOrder[] memory page = new ProductOrder[](count);
+        for (uint256 j; j < count; j++) {
+            page[j] = matches[j];
+        }
+        return (page, cursor);
+    }
+
     function listProductReviews(uint256 _productId)
         public
         view
@@ -275,7 +535,212 @@ contract Store {
 
     */
 
+    function _addProduct(
+        bytes32 _metadataHash,
+        uint256 _price,
+        uint256 _quantity,
+        Type _type
+    ) internal {
+        // a zero hash marks removed products, they could never be removed or bought
+        require(_metadataHash != bytes32(0), "invalid metadata hash");
+        // unlimited products keep a constant quantity of 1
+        uint256 quantity = _type == Type.FIXED ? _quantity : 1;
+        storeProducts[productIds] = StoreProduct(
+            Packing.toUint32(productIds),
+            Packing.toUint96(_price),
+            Packing.toUint32(quantity),
+            0,
+            _type,
+            uint40(block.timestamp),
+            _metadataHash
+        );
+        activeProductPosition[productIds] = activeProducts.length;
+        activeProducts.push(uint32(productIds));
+        emit ProductAdded(
+            productIds,
+            _metadataHash,
+            _price,
+            quantity,
+            _type,
+            block.timestamp
+        );
+        productIds++;
+    }
+
+    function _fillOrder(uint256 _orderId) internal {
+        require(_orderId < orderIds, "wrong order id");
+
+        ProductOrder storage order = storeOrders[_orderId];
+
+        require(order.orderStatus == Status.PENDING, "invalid order status");
+
+        _dequeue(Status.PENDING, _orderId);
+        order.orderStatus = Status.SENT;
+        _enqueue(Status.SENT, _orderId);
+
+        emit OrderSent(_orderId);
+    }
+
+    function _removeProduct(uint256 _productId) internal {
+        require(_productId < productIds, "wrong product id");
+
+        StoreProduct storage product = storeProducts[_productId];
+        // products with active orders or already removed are left as is
+        if (
+            product.activeOrders == 0 && product.metadataHash != bytes32(0)
+        ) {
+            _removeFromActiveProducts(_productId);
+            delete storeProducts[_productId];
+
+            emit ProductRemoved(_productId);
+        }
+    }
+
+    /**
+     * @dev Record a pending order for `_productId` priced at `_priceInETH` per unit
+     * @return the order total price in ETH
+     */
+    function _createBuyOrder(
+        uint256 _productId,
+        uint256 _quantity,
+        uint256 _priceInETH
+    ) internal returns (uint256) {
+        StoreProduct storage product = storeProducts[_productId];
+        require(product.metadataHash != bytes32(0), "wrong product id");
+        require(_quantity > 0, "invalid quantity");
+
+        uint256 orderQuantity;
+        uint256 orderTotal;
+        if (product.productType == Type.FIXED) {
+            require(_quantity <= product.quantity, "unsuffisant quantity");
+            // the stock is reserved by the order so pending orders can always be filled,
+            // a cancellation gives it back
+            product.quantity -= uint32(_quantity);
+            orderQuantity = _quantity;
+            orderTotal = _priceInETH * _quantity;
+        } else {
+            orderTotal = _priceInETH;
+        }
+
+        storeOrders.push(
+            ProductOrder(
+                Packing.toUint32(orderIds),
+                Packing.toUint32(_productId),
+                payable(msg.sender),
+                Packing.toUint32(orderQuantity),
+                Packing.toUint96(orderTotal),
+                false,
+                Status.PENDING,
+                0,
+                0
+            )
+        );
+        _enqueue(Status.PENDING, orderIds);
+        product.activeOrders++;
+        openOrdersCount++;
+
+        buyerOrderPosition[orderIds] = buyerOrders[msg.sender].length;
+        buyerOrders[msg.sender].push(orderIds);
+
+        emit OrderCreated(
+            orderIds,
+            _productId,
+            msg.sender,
+            orderQuantity,
+            orderTotal,
+            block.timestamp
+        );
+        orderIds++;
+        return orderTotal;
+    }
+
+    /**
+     * @dev Swap and pop `_productId` out of the active products in O(1)
+     */
+    function _removeFromActiveProducts(uint256 _productId) internal {
+        uint256 position = activeProductPosition[_productId];
+        uint32 lastId = activeProducts[activeProducts.length - 1];
+
+        activeProducts[position] = lastId;
+        activeProductPosition[lastId] = position;
+        activeProducts.pop();
+        delete activeProductPosition[_productId];
+    }
+
+    /**
+     * @dev Swap and pop `_orderId` out of the buyer index in O(1)
+     */
+    function _removeFromBuyerIndex(address _buyer, uint256 _orderId) internal {
+        uint256[] storage ids = buyerOrders[_buyer];
+        uint256 position = buyerOrderPosition[_orderId];
+        uint256 lastId = ids[ids.length - 1];
+
+        ids[position] = lastId;
+        buyerOrderPosition[lastId] = position;
+        ids.pop();
+        delete buyerOrderPosition[_orderId];
+    }
+
+    /**
+     * @dev Append `_orderId` at the tail of the `_status` queue in O(1)
+     */
+    function _enqueue(Status _status, uint256 _orderId) internal {
+        OrderQueue storage queue = orderQueues[_status];
+        ProductOrder storage order = storeOrders[_orderId];
+        uint32 node = Packing.toUint32(_orderId + 1);
+
+        order.previousInQueue = queue.tail;
+        order.nextInQueue = 0;
+        if (queue.tail == 0) {
+            queue.head = node;
+        } else {
+            storeOrders[queue.tail - 1].nextInQueue = node;
+        }
+        queue.tail = node;
+        queue.length++;
+    }
+
+    /**
+     * @dev Unlink `_orderId` from the `_status` queue in O(1)
+     */
+    function _dequeue(Status _status, uint256 _orderId) internal {
+        OrderQueue storage queue = orderQueues[_status];
+        ProductOrder storage order = storeOrders[_orderId];
+        uint32 previous = order.previousInQueue;
+        uint32 next = order.nextInQueue;
+
+        if (previous == 0) {
+            queue.head = next;
+        } else {
+            storeOrders[previous - 1].nextInQueue = next;
+        }
+        if (next == 0) {
+            queue.tail = previous;
+        } else {
+            storeOrders[next - 1].previousInQueue = previous;
+        }
+        order.previousInQueue = 0;
+        order.nextInQueue = 0;
+        queue.length--;
+    }
+
+    function _isQueued(Status _status, ProductOrder storage _order)
+        internal
+        view
+        returns (bool)
+    {
+        // cancelled orders are never queued and reviewed orders leave the completed queue
+        return
+            _status != Status.CANCELLED &&
+            _order.orderStatus == _status &&
+            !_order.hasBeenReviewed;
+    }
+
     function _convertUSDToETH(uint256 amountInUSD) public returns (uint256) {
         return IFactory(factory).convertUSDToETH(amountInUSD);
     }
+
+    function quoteUSDToETH(uint256 amountInUSD) public view returns (uint256) {
+        return IFactory(factory).quoteUSDToETH(amountInUSD);
+    }
 }
@@ -3,14 +3,20 @@
 pragma solidity ^0.8.0;
 
 import "./Store.sol";
+import "./Pagination.sol";
+import "./Clones.sol";
 
 contract StoreFactory {
     //--------------------------------------------------------------------
     // VARIABLES
 
     address public factory;
+    // every store is a minimal proxy (EIP-1167) of this implementation
+    address public immutable storeImplementation;
 
     StoreInfo[] public stores;
+    // stores created by each owner, in creation order
+    mapping(address => address[]) private ownerStores;
 
     // fee for creating store = 5$
     uint256 public createStoreFee = 5 * 10**18;
@@ -20,10 +26,30 @@ contract StoreFactory {
         address owner;
     }
 
+    struct StoreSummary {
+        address storeAddress;
+        address owner;
+        string storeMetaData;
+        uint256 productsCount;
+        uint256 ordersCount;
+        // products still listed and orders not completed or cancelled yet
+        uint256 activeProductsCount;
+        uint256 openOrdersCount;
+        // first orders of the requested buyer and the metadata hash of each ordered product
+        Store.ProductOrder[] buyerOrders;
+        bytes32[] buyerOrdersMetadata;
+    }
+
     //--------------------------------------------------------------------
     // EVENTS
 
-    event StoreCreated(address storeAddress, address owner, uint256 timestamp);
+    event StoreCreated(
+        address indexed storeAddress,
+        address indexed owner,
+        string storeMetaData,
+        uint256 timestamp
+    );
+    event CreateStoreFeeChanged(uint256 fee);
 
     //--------------------------------------------------------------------
     // MODIFIERS
@@ -38,36 +64,187 @@ contract StoreFactory {
 
     constructor(address _factory) {
         factory = _factory;
+        storeImplementation = address(new Store());
     }
 
     //--------------------------------------------------------------------
     // FUNCTIONS
 
     function createStore(string memory _storeMetaData) public payable {
+        _checkCreateStoreFee();
+        _initializeStore(
+            Clones.clone(storeImplementation),
+            _storeMetaData
+        );
+    }
+
+    /**
+     * @dev Same as createStore but the store is deployed with CREATE2 so its address
+     * is known before the transaction is mined (see predictStoreAddress), the salt
+     * is combined with the sender address so nobody else can take it
+     */
+    function createStoreDeterministic(
+        string memory _storeMetaData,
+        bytes32 _salt
+    ) public payable {
+        _checkCreateStoreFee();
+        _initializeStore(
+            Clones.cloneDeterministic(
+                storeImplementation,
+                _ownerSalt(msg.sender, _salt)
+            ),
+            _storeMetaData
+        );
+    }
+
+    /**
+     * @dev Get the address of the store `_owner` would create with createStoreDeterministic and `_salt`
+     */
+    function predictStoreAddress(address _owner, bytes32 _salt)
+        public
+        view
+        returns (address)
+    {
+        return
+            Clones.predictDeterministicAddress(
+                storeImplementation,
+                _ownerSalt(_owner, _salt),
+                address(this)
+            );
+    }
+
+    function getAllStores() public view returns (StoreInfo[] memory) {
+        return stores;
+    }
+
+    function getStoresCount() public view returns (uint256) {
+        return stores.length;
+    }
+
+    /**
+     * @dev Get the stores created by `_owner` without scanning the whole stores list
+     * @return the stores addresses in creation order
+     */
+    function getStoresByOwner(address _owner)
+        public
+        view
+        returns (address[] memory)
+    {
+        return ownerStores[_owner];
+    }
+
+    /**
+     * @dev Paginated version of getAllStores
+     * @return the stores page, the cursor to use for the next page
+     */
+    function getStores(uint256 _cursor, uint256 _limit)
+        public
+        view
+        returns (StoreInfo[] memory, uint256)
+    {
+        uint256 end = Pagination.pageEnd(_cursor, _limit, stores.length);
+        StoreInfo[] memory page = new StoreInfo[](end - _cursor);
+        for (uint256 i = _cursor; i < end; i++) {
+            page[i - _cursor] = stores[i];
+        }
+        return (page, end);
+    }
+
+    /**
+     * @dev Lens over a page of stores returning in one call what the store directory
+     * would otherwise fetch with one call per store and per order: the store metadata,
+     * its products and orders counts and at most `_maxOrders` orders of `_buyer`
+     * (no orders are collected for the zero address)
+     * @return the stores summaries page, the cursor to use for the next page
+     */
+    function getStoresSummaries(
+        address _buyer,
+        uint256 _maxOrders,
+        uint256 _cursor,
+        uint256 _limit
+    ) public view returns (StoreSummary[] memory, uint256) {
+        uint256 end = Pagination.pageEnd(_cursor, _limit, stores.length);
+        StoreSummary[] memory page = new StoreSummary[](end - _cursor);
+        for (uint256 i = _cursor; i < end; i++) {
+            page[i - _cursor] = _getStoreSummary(stores[i], _buyer, _maxOrders);
+        }
+        return (page, end);
+    }
+
+    function _checkCreateStoreFee() internal {
         require(
             msg.value == _convertUSDToETH(createStoreFee),
             "insuffisant amount"
         );
-        Store newStore = new Store(factory, msg.sender, _storeMetaData);
-        stores.push(StoreInfo(address(newStore), msg.sender));
+    }
+
+    function _initializeStore(address _store, string memory _storeMetaData)
+        internal
+    {
+        Store(_store).initialize(factory, msg.sender, _storeMetaData);
+        stores.push(StoreInfo(_store, msg.sender));
+        ownerStores[msg.sender].push(_store);
 
         payable(factory).transfer(msg.value);
 
-        emit StoreCreated(address(newStore), msg.sender, block.timestamp);
+        emit StoreCreated(_store, msg.sender, _storeMetaData, block.timestamp);
     }
 
-    function getAllStores() public view returns (StoreInfo[] memory) {
-        return stores;
+    function _ownerSalt(address _owner, bytes32 _salt)
+        internal
+        pure
+        returns (bytes32)
+    {
+        return keccak256(abi.encodePacked(_owner, _salt));
+    }
+
+    function _getStoreSummary(
+        StoreInfo memory _info,
+        address _buyer,
+        uint256 _maxOrders
+    ) internal view returns (StoreSummary memory summary) {
+        Store store = Store(_info.storeAddress);
+
+        summary.storeAddress = _info.storeAddress;
+        summary.owner = _info.owner;
+        summary.storeMetaData = store.storeMetaData();
+        summary.productsCount = store.productIds();
+        summary.ordersCount = store.orderIds();
+        summary.activeProductsCount = store.activeProductsCount();
+        summary.openOrdersCount = store.openOrdersCount();
+
+        if (_buyer != address(0) && _maxOrders != 0) {
+            (summary.buyerOrders, ) = store.getOrdersByBuyer(
+                _buyer,
+                0,
+                _maxOrders
+            );
+            summary.buyerOrdersMetadata = new bytes32[](
+                summary.buyerOrders.length
+            );
+            for (uint256 j; j < summary.buyerOrders.length; j++) {
+                (, , , , , , bytes32 metadataHash) = store.storeProducts(
+                    summary.buyerOrders[j].productId
+                );
+                summary.buyerOrdersMetadata[j] = metadataHash;
+            }
+        }
     }
 
     function _convertUSDToETH(uint256 amountInUSD) public returns (uint256) {
         return IFactory(factory).convertUSDToETH(amountInUSD);
     }
 
+    function quoteUSDToETH(uint256 amountInUSD) public view returns (uint256) {
+        return IFactory(factory).quoteUSDToETH(amountInUSD);
+    }
+
     //--------------------------------------------------------------------
     // ADMIN FUNCTIONS
 
     function changeCreateStoreFee(uint256 _newFee) public onlyAdmin {
         createStoreFee = _newFee;
+
+        emit CreateStoreFeeChanged(_newFee);
     }
 }
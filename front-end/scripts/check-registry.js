@@ -0,0 +1,14 @@
+// Run before `start` and `build`: src/utils/registry.js imports the deployment registry
+// of the local network, which is generated and not committed
+const fs = require("fs");
+const path = require("path");
+
+const REGISTRY = path.join(__dirname, "..", "src", "artifacts", "deployments", "5777.json");
+
+if (!fs.existsSync(REGISTRY)) {
+  console.error(
+    "Missing the deployment registry src/artifacts/deployments/5777.json, deploy the contracts " +
+      "then run `brownie run scripts/update_front_end.py` from the project root"
+  );
+  process.exit(1);
+}
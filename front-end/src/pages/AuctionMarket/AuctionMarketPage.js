@@ -15,11 +15,11 @@ import {
 } from "react-bootstrap";
 
 import { IPFS_GATEWAY } from "./../../utils/ipfsStorage";
-import AuctionContract from "../../artifacts/contracts/AuctionMarket.json";
-import contractsAddress from "../../artifacts/deployments/map.json";
+import { getAllPages } from "../../utils/pagination";
+import { getAbi, getAddress } from "../../utils/registry";
 import networks from "../../utils/networksMap.json";
 
-const auctionContractAddress = contractsAddress["5777"]["AuctionMarket"][0];
+const auctionContractAddress = getAddress("AuctionMarket");
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
 
 const auctionStatusMap = { OPEN: 0, ENDED: 1 };
@@ -45,26 +45,25 @@ function AuctionMarketPage() {
     const signer = provider.getSigner();
     const market = new ethers.Contract(
       auctionContractAddress,
-      AuctionContract.abi,
+      getAbi("AuctionMarket"),
       signer
     );
-    const allAuctions = await market.getAuctionsList();
-
-    const openAuctions = allAuctions.filter(
-      (p) => p[7] === auctionStatusMap["OPEN"]
+    const openAuctions = await getAllPages(
+      market.getAuctionsByStatus,
+      auctionStatusMap["OPEN"]
     );
     if (openAuctions !== undefined) {
       const items = await Promise.all(
         openAuctions.map(async (auction) => {
-          const metadataUrl = auction[2].replace("ipfs://", IPFS_GATEWAY);
+          const metadataUrl = auction.itemInformation.replace("ipfs://", IPFS_GATEWAY);
           let metaData = await axios.get(metadataUrl);
           const imgUrl = metaData.data.image.replace("ipfs://", IPFS_GATEWAY);
 
           let item = {
-            auctionId: Number(auction[0]),
+            auctionId: Number(auction.id),
             name: metaData.data.name,
             image: imgUrl,
-            price: utils.formatUnits(auction[4].toString(), "ether"),
+            price: utils.formatUnits(auction.highestBid.toString(), "ether"),
           };
           return item;
         })
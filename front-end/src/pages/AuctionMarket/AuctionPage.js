@@ -10,11 +10,10 @@ import { CircularProgress } from "@material-ui/core";
 import { useParams } from "react-router-dom";
 
 import { IPFS_GATEWAY } from "./../../utils/ipfsStorage";
-import AuctionContract from "../../artifacts/contracts/AuctionMarket.json";
-import contractsAddress from "../../artifacts/deployments/map.json";
+import { getAbi, getAddress } from "../../utils/registry";
 
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
-const auctionContractAddress = contractsAddress["5777"]["AuctionMarket"][0];
+const auctionContractAddress = getAddress("AuctionMarket");
 
 const auctionStatusMap = { 0: "OPEN", 1: "ENDED" };
 
@@ -53,34 +52,33 @@ function AuctionPage() {
     if (id !== undefined) {
       const market = new ethers.Contract(
         auctionContractAddress,
-        AuctionContract.abi,
+        getAbi("AuctionMarket"),
         provider
       );
-      const auctions = await market.getAuctionsList();
-      const details = auctions[auctionId];
+      const details = await market.auctionsList(auctionId);
       const _userBid = await market.getUserBidAmount(data.account, auctionId);
       setUserBid(utils.formatUnits(_userBid));
 
       const _isBidder = Number(utils.formatUnits(_userBid)) !== 0;
       setIsBidder(_isBidder);
 
-      const metadataUrl = details[2].replace("ipfs://", IPFS_GATEWAY);
+      const metadataUrl = details.itemInformation.replace("ipfs://", IPFS_GATEWAY);
       let metaData = await axios.get(metadataUrl);
       const imgUrl = metaData.data.image.replace("ipfs://", IPFS_GATEWAY);
 
-      convertPrice(utils.formatUnits(details[5])).then((res) => {
+      convertPrice(utils.formatUnits(details.highestBid)).then((res) => {
         setAuctionState({
           ...auctionState,
-          seller: details[1],
+          seller: details.seller,
           name: metaData.data.name,
           description: metaData.data.description,
           image: imgUrl,
-          startPrice: utils.formatUnits(details[3]),
-          highest_bid_in_ETH: utils.formatUnits(details[4]),
-          highest_bid_in_USD: utils.formatUnits(details[4]),
-          highestBidder: details[5],
-          endTime: Number(details[6]),
-          status: auctionStatusMap[details[7]],
+          startPrice: utils.formatUnits(details.startPrice),
+          highest_bid_in_ETH: utils.formatUnits(details.highestBid),
+          highest_bid_in_USD: utils.formatUnits(details.highestBid),
+          highestBidder: details.highestBidder,
+          endTime: Number(details.endTimstamp),
+          status: auctionStatusMap[details.status],
         });
       });
     }
@@ -94,7 +92,7 @@ function AuctionPage() {
         const signer = provider.getSigner();
         const market = new ethers.Contract(
           auctionContractAddress,
-          AuctionContract.abi,
+          getAbi("AuctionMarket"),
           signer
         );
 
@@ -120,7 +118,7 @@ function AuctionPage() {
         const signer = provider.getSigner();
         const market = new ethers.Contract(
           auctionContractAddress,
-          AuctionContract.abi,
+          getAbi("AuctionMarket"),
           signer
         );
         const withdraw_tx = await market.withdrawBid(id);
@@ -143,7 +141,7 @@ function AuctionPage() {
         const signer = provider.getSigner();
         const market = new ethers.Contract(
           auctionContractAddress,
-          AuctionContract.abi,
+          getAbi("AuctionMarket"),
           signer
         );
         const end_tx = await market.endAuction(id);
@@ -162,10 +160,10 @@ function AuctionPage() {
   async function convertPrice(amount) {
     const market = new ethers.Contract(
       auctionContractAddress,
-      AuctionContract.abi,
+      getAbi("AuctionMarket"),
       provider
     );
-    const price_in_eth = await market.callStatic._convertUSDToETH(
+    const price_in_eth = await market.quoteUSDToETH(
       utils.parseEther(amount, "ether")
     );
     return price_in_eth;
@@ -7,12 +7,11 @@ import { Form, Button } from "react-bootstrap";
 import { makeStyles, CircularProgress } from "@material-ui/core";
 import { File } from "web3.storage";
 import { ipfsSaveContent } from "./../../utils/ipfsStorage";
-import AuctionContract from "../../artifacts/contracts/AuctionMarket.json";
-import contractsAddress from "../../artifacts/deployments/map.json";
+import { getAbi, getAddress } from "../../utils/registry";
 import networks from "../../utils/networksMap.json";
 
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
-const auctionContractAddress = contractsAddress["5777"]["AuctionMarket"][0];
+const auctionContractAddress = getAddress("AuctionMarket");
 
 const useStyles = makeStyles((theme) => ({
   Container: {
@@ -69,7 +68,7 @@ function CreateAuction() {
         const signer = provider.getSigner();
         const auctionContract = new ethers.Contract(
           auctionContractAddress,
-          AuctionContract.abi,
+          getAbi("AuctionMarket"),
           signer
         );
 
@@ -7,18 +7,19 @@ import { useSelector } from "react-redux";
 import { Card, Container, Row, Col } from "react-bootstrap";
 
 import { IPFS_GATEWAY } from "../utils/ipfsStorage";
-import MarketContract from "../artifacts/contracts/Market.json";
-import StoreFactoryContract from "../artifacts/contracts/StoreFactory.json";
-import AuctionContract from "../artifacts/contracts/AuctionMarket.json";
-import StoreContract from "../artifacts/contracts/Store.json";
-import contractsAddress from "../artifacts/deployments/map.json";
+import { fetchProductMetadata } from "../utils/metadata";
+import { getAllPages } from "../utils/pagination";
+import { getAbi, getAddress } from "../utils/registry";
 import networks from "../utils/networksMap.json";
 
-const Marketaddress = contractsAddress["5777"]["Market"][0];
-const factoryAddress = contractsAddress["5777"]["StoreFactory"][0];
-const auctionContractAddress = contractsAddress["5777"]["AuctionMarket"][0];
+const Marketaddress = getAddress("Market");
+const factoryAddress = getAddress("StoreFactory");
+const auctionContractAddress = getAddress("AuctionMarket");
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
 
+const productStatusMap = { INSALE: 1 };
+const auctionStatusMap = { OPEN: 0, ENDED: 1 };
+
 const useStyles = makeStyles((theme) => ({
   Container: {
     display: "flex",
@@ -41,17 +42,18 @@ function Home() {
     const signer = provider.getSigner();
     const market = new ethers.Contract(
       auctionContractAddress,
-      AuctionContract.abi,
+      getAbi("AuctionMarket"),
       signer
     );
-    const allAuctions = await market.getAuctionsList();
-
-    const openAuctions = allAuctions.filter((p) => p[7] === 0);
+    const openAuctions = await getAllPages(
+      market.getAuctionsByStatus,
+      auctionStatusMap["OPEN"]
+    );
 
     if (openAuctions !== undefined) {
       const items = await Promise.all(
         openAuctions.map(async (auction) => {
-          const metadataUrl = auction[2].replace("ipfs://", IPFS_GATEWAY);
+          const metadataUrl = auction.itemInformation.replace("ipfs://", IPFS_GATEWAY);
           let itemMetaData = await axios.get(metadataUrl);
 
           const imgUrl = itemMetaData.data.image.replace(
@@ -60,10 +62,10 @@ function Home() {
           );
 
           let item = {
-            auctionId: Number(auction[0]),
+            auctionId: Number(auction.id),
             name: itemMetaData.data.name,
             image: imgUrl,
-            price: utils.formatUnits(auction[4].toString(), "ether"),
+            price: utils.formatUnits(auction.highestBid.toString(), "ether"),
           };
           return item;
         })
@@ -76,54 +78,61 @@ function Home() {
     const signer = provider.getSigner();
     const market = new ethers.Contract(
       Marketaddress,
-      MarketContract.abi,
+      getAbi("Market"),
       signer
     );
-    const products = await market.getAllProducts();
-
-    const inSaleProducts = products.filter((p) => p[8] === 1);
+    const inSaleProducts = await getAllPages(
+      market.getProductsByStatus,
+      productStatusMap["INSALE"]
+    );
 
-    const _marketProducts = inSaleProducts.map((p) => {
-      const imgUrl = p[4].replace("ipfs://", IPFS_GATEWAY);
-      let item = {
-        productId: Number(p[0]),
-        name: p[2],
-        image: imgUrl,
-        price: utils.formatUnits(p[5].toString(), "ether"),
-        date: Number(p[9]),
-      };
-      return item;
-    });
+    const _marketProducts = await Promise.all(
+      inSaleProducts.map(async (p) => {
+        const metadata = await fetchProductMetadata(p.metadataHash);
+        let item = {
+          productId: Number(p.id),
+          name: metadata.name,
+          image: metadata.image,
+          price: utils.formatUnits(p.priceInUSD.toString(), "ether"),
+          date: Number(p.listed_on),
+        };
+        return item;
+      })
+    );
 
     const factory = new ethers.Contract(
       factoryAddress,
-      StoreFactoryContract.abi,
+      getAbi("StoreFactory"),
       signer
     );
-    const marketStores = await factory.getAllStores();
+    const marketStores = await getAllPages(factory.getStores);
 
     let _allStoresProducts = [];
     await Promise.all(
       marketStores.map(async (store) => {
         const productStore = new ethers.Contract(
           store.storeAddress,
-          StoreContract.abi,
+          getAbi("Store"),
           signer
         );
-        const _storeProducts = await productStore.listStoreProducts();
+        const storeInSaleProducts = await getAllPages(
+          productStore.getStoreProducts
+        );
 
-        _storeProducts.map((p) => {
-          const imgUrl = p[3].replace("ipfs://", IPFS_GATEWAY);
-          let item = {
-            store: store.storeAddress,
-            productId: Number(p[0]),
-            name: p[1],
-            image: imgUrl,
-            price: utils.formatUnits(p[4].toString(), "ether"),
-            date: Number(p[8]),
-          };
-          _allStoresProducts.push(item);
-        });
+        await Promise.all(
+          storeInSaleProducts.map(async (p) => {
+            const metadata = await fetchProductMetadata(p.metadataHash);
+            let item = {
+              store: store.storeAddress,
+              productId: Number(p.productId),
+              name: metadata.name,
+              image: metadata.image,
+              price: utils.formatUnits(p.priceInUSD.toString(), "ether"),
+              date: Number(p.listed_on),
+            };
+            _allStoresProducts.push(item);
+          })
+        );
       })
     );
 
@@ -139,7 +148,7 @@ function Home() {
         marketStores.map(async (store) => {
           const productStore = new ethers.Contract(
             store.storeAddress,
-            StoreContract.abi,
+            getAbi("Store"),
             signer
           );
           const storeDetailsURL = await productStore.callStatic.storeMetaData();
@@ -6,13 +6,15 @@ import { updateAccountData } from "../../features/blockchain";
 import { Form, Button } from "react-bootstrap";
 import { makeStyles, CircularProgress } from "@material-ui/core";
 
-import { ipfsSaveContent } from "./../../utils/ipfsStorage";
-import MarketContract from "../../artifacts/contracts/Market.json";
-import contractsAddress from "../../artifacts/deployments/map.json";
+import {
+  ipfsSaveContent,
+  ipfsSaveProductMetadata,
+} from "./../../utils/ipfsStorage";
+import { getAbi, getAddress } from "../../utils/registry";
 import networks from "../../utils/networksMap.json";
 
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
-const Marketaddress = contractsAddress["5777"]["Market"][0];
+const Marketaddress = getAddress("Market");
 
 const useStyles = makeStyles((theme) => ({
   Container: {
@@ -68,17 +70,21 @@ function AddProduct() {
         const signer = provider.getSigner();
         const market = new ethers.Contract(
           Marketaddress,
-          MarketContract.abi,
+          getAbi("Market"),
           signer
         );
 
         const cid = await ipfsSaveContent(image.file);
         const imageURI = `ipfs://${cid}/${image.name}`;
 
-        const add_tx = await market.addProduct(
+        const metadataHash = await ipfsSaveProductMetadata(
           formInput.name,
           formInput.description,
-          imageURI,
+          imageURI
+        );
+
+        const add_tx = await market.addProduct(
+          metadataHash,
           utils.parseEther(formInput.price, "ether")
         );
         await add_tx.wait();
@@ -13,18 +13,18 @@ import {
   Button,
 } from "react-bootstrap";
 
-import { IPFS_GATEWAY } from "./../../utils/ipfsStorage";
-import MarketContract from "../../artifacts/contracts/Market.json";
-import StoreFactoryContract from "../../artifacts/contracts/StoreFactory.json";
-import StoreContract from "../../artifacts/contracts/Store.json";
-import contractsAddress from "../../artifacts/deployments/map.json";
+import { fetchProductMetadata } from "./../../utils/metadata";
+import { getAllPages } from "../../utils/pagination";
+import { getAbi, getAddress } from "../../utils/registry";
 import networks from "../../utils/networksMap.json";
 
-const Marketaddress = contractsAddress["5777"]["Market"][0];
-const factoryAddress = contractsAddress["5777"]["StoreFactory"][0];
+const Marketaddress = getAddress("Market");
+const factoryAddress = getAddress("StoreFactory");
 
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
 
+const productStatusMap = { INSALE: 1 };
+
 const useStyles = makeStyles((theme) => ({
   Container: {
     display: "flex",
@@ -46,54 +46,61 @@ function MarketPage() {
     const signer = provider.getSigner();
     const market = new ethers.Contract(
       Marketaddress,
-      MarketContract.abi,
+      getAbi("Market"),
       signer
     );
-    const products = await market.getAllProducts();
-
-    const inSaleProducts = products.filter((p) => p[8] === 1);
-
-    const _marketProducts = inSaleProducts.map((p) => {
-      const imgUrl = p[4].replace("ipfs://", IPFS_GATEWAY);
-      let item = {
-        productId: Number(p[0]),
-        name: p[2],
-        image: imgUrl,
-        price: utils.formatUnits(p[5].toString(), "ether"),
-        date: Number(p[9]),
-      };
-      return item;
-    });
+    const inSaleProducts = await getAllPages(
+      market.getProductsByStatus,
+      productStatusMap["INSALE"]
+    );
+
+    const _marketProducts = await Promise.all(
+      inSaleProducts.map(async (p) => {
+        const metadata = await fetchProductMetadata(p.metadataHash);
+        let item = {
+          productId: Number(p.id),
+          name: metadata.name,
+          image: metadata.image,
+          price: utils.formatUnits(p.priceInUSD.toString(), "ether"),
+          date: Number(p.listed_on),
+        };
+        return item;
+      })
+    );
 
     const factory = new ethers.Contract(
       factoryAddress,
-      StoreFactoryContract.abi,
+      getAbi("StoreFactory"),
       signer
     );
-    const marketStores = await factory.getAllStores();
+    const marketStores = await getAllPages(factory.getStores);
 
     let _allStoresProducts = [];
     await Promise.all(
       marketStores.map(async (store) => {
         const productStore = new ethers.Contract(
           store.storeAddress,
-          StoreContract.abi,
+          getAbi("Store"),
           signer
         );
-        const _storeProducts = await productStore.listStoreProducts();
-
-        _storeProducts.map((p) => {
-          const imgUrl = p[3].replace("ipfs://", IPFS_GATEWAY);
-          let item = {
-            store: store.storeAddress,
-            productId: Number(p[0]),
-            name: p[1],
-            image: imgUrl,
-            price: utils.formatUnits(p[4].toString(), "ether"),
-            date: Number(p[8]),
-          };
-          _allStoresProducts.push(item);
-        });
+        const storeInSaleProducts = await getAllPages(
+          productStore.getStoreProducts
+        );
+
+        await Promise.all(
+          storeInSaleProducts.map(async (p) => {
+            const metadata = await fetchProductMetadata(p.metadataHash);
+            let item = {
+              store: store.storeAddress,
+              productId: Number(p.productId),
+              name: metadata.name,
+              image: metadata.image,
+              price: utils.formatUnits(p.priceInUSD.toString(), "ether"),
+              date: Number(p.listed_on),
+            };
+            _allStoresProducts.push(item);
+          })
+        );
       })
     );
 
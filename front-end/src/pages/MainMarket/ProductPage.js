@@ -7,12 +7,11 @@ import { updateAccountData } from "../../features/blockchain";
 import { CircularProgress } from "@material-ui/core";
 import { useParams } from "react-router-dom";
 
-import { IPFS_GATEWAY } from "./../../utils/ipfsStorage";
-import MarketContract from "../../artifacts/contracts/Market.json";
-import contractsAddress from "../../artifacts/deployments/map.json";
+import { fetchProductMetadata } from "./../../utils/metadata";
+import { getAbi, getAddress } from "../../utils/registry";
 
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
-const Marketaddress = contractsAddress["5777"]["Market"][0];
+const Marketaddress = getAddress("Market");
 
 const statusMap = { 1: "IN SALE", 2: "PENDING", 3: "SENT", 4: "SOLD" };
 
@@ -47,25 +46,25 @@ function ProductPage() {
     if (product_id !== undefined) {
       const market = new ethers.Contract(
         Marketaddress,
-        MarketContract.abi,
+        getAbi("Market"),
         provider
       );
       const details = await market.callStatic.products(product_id);
 
-      const imgUrl = details[4].replace("ipfs://", IPFS_GATEWAY);
+      const metadata = await fetchProductMetadata(details.metadataHash);
 
-      convertPrice(utils.formatUnits(details[5])).then((res) => {
+      convertPrice(utils.formatUnits(details.priceInUSD)).then((res) => {
         setProductState({
           ...productState,
-          seller: details[1],
-          name: details[2],
-          description: details[3],
-          image: imgUrl,
-          price: utils.formatUnits(details[5]),
+          seller: details.seller,
+          name: metadata.name,
+          description: metadata.description,
+          image: metadata.image,
+          price: utils.formatUnits(details.priceInUSD),
           price_eth: utils.formatUnits(res),
-          buy_price_in_ETH: utils.formatUnits(details[6]),
-          buyer: details[7],
-          status: statusMap[details[8]],
+          buy_price_in_ETH: utils.formatUnits(details.buyPriceInETH),
+          buyer: details.buyer,
+          status: statusMap[details.status],
         });
       });
     }
@@ -79,7 +78,7 @@ function ProductPage() {
         const signer = provider.getSigner();
         const market = new ethers.Contract(
           Marketaddress,
-          MarketContract.abi,
+          getAbi("Market"),
           signer
         );
 
@@ -105,7 +104,7 @@ function ProductPage() {
         const signer = provider.getSigner();
         const market = new ethers.Contract(
           Marketaddress,
-          MarketContract.abi,
+          getAbi("Market"),
           signer
         );
         const send_tx = await market.sendProduct(product_id);
@@ -127,7 +126,7 @@ function ProductPage() {
         const signer = provider.getSigner();
         const market = new ethers.Contract(
           Marketaddress,
-          MarketContract.abi,
+          getAbi("Market"),
           signer
         );
         const confirm_tx = await market.confirmRecieved(product_id);
@@ -150,7 +149,7 @@ function ProductPage() {
         const signer = provider.getSigner();
         const market = new ethers.Contract(
           Marketaddress,
-          MarketContract.abi,
+          getAbi("Market"),
           signer
         );
         const cancel_tx = await market.cancelPurchase(product_id);
@@ -169,10 +168,10 @@ function ProductPage() {
   async function convertPrice(amount) {
     const market = new ethers.Contract(
       Marketaddress,
-      MarketContract.abi,
+      getAbi("Market"),
       provider
     );
-    const price_in_eth = await market.callStatic._convertUSDToETH(
+    const price_in_eth = await market.quoteUSDToETH(
       utils.parseEther(amount, "ether")
     );
     return price_in_eth;
@@ -6,20 +6,22 @@ import { Card, Container, Row, Col } from "react-bootstrap";
 import { TabContext, TabList, TabPanel } from "@material-ui/lab";
 import { useSelector } from "react-redux";
 
-import { IPFS_GATEWAY } from "../utils/ipfsStorage";
-import MarketContract from "../artifacts/contracts/Market.json";
-import StoreFactoryContract from "../artifacts/contracts/StoreFactory.json";
-import StoreContract from "../artifacts/contracts/Store.json";
-import contractsAddress from "../artifacts/deployments/map.json";
+import { fetchProductMetadata } from "../utils/metadata";
+import { getAllPages, getStoresSummaries } from "../utils/pagination";
+import { getAbi, getAddress } from "../utils/registry";
 import networks from "../utils/networksMap.json";
 
-const Marketaddress = contractsAddress["5777"]["Market"][0];
-const factoryAddress = contractsAddress["5777"]["StoreFactory"][0];
+const Marketaddress = getAddress("Market");
+const factoryAddress = getAddress("StoreFactory");
+const auctionContractAddress = getAddress("AuctionMarket");
+const administrationAddress = getAddress("Administration");
 
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
 
 const productStatus = { 1: "IN SALE", 2: "PENDING", 3: "SENT", 4: "SOLD" };
-const orderStatus = { 0: "PENDING", 1: "SENT", 2: "COMPLETED" };
+const orderStatus = { 0: "PENDING", 1: "SENT", 2: "COMPLETED", 3: "CANCELLED" };
+
+const MAX_ORDERS_PER_STORE = 20;
 
 const useStyles = makeStyles((theme) => ({
   Container: {
@@ -37,6 +39,7 @@ function MyProductsPage() {
   const [saleProducts, setSaleProducts] = useState([]);
   const [buyProducts, setBuyProducts] = useState([]);
   const [allMyOrders, setAllMyOrders] = useState([]);
+  const [credits, setCredits] = useState({ total: "0", contracts: [] });
 
   const [currentTab, setCurrentTab] = useState("sell");
 
@@ -48,7 +51,7 @@ function MyProductsPage() {
     const signer = provider.getSigner();
     const market = new ethers.Contract(
       Marketaddress,
-      MarketContract.abi,
+      getAbi("Market"),
       signer
     );
     const remove_tx = await market.remove(Number(id));
@@ -56,38 +59,97 @@ function MyProductsPage() {
     loadMyProducts();
   }
 
+  // sales, cancellations and auctions are paid into a credit ledger in each contract
+  async function loadMyCredits(storesAddresses) {
+    const ledgers = [
+      new ethers.Contract(Marketaddress, getAbi("Market"), provider),
+      new ethers.Contract(auctionContractAddress, getAbi("AuctionMarket"), provider),
+      ...storesAddresses.map(
+        (address) => new ethers.Contract(address, getAbi("Store"), provider)
+      ),
+    ];
+    const amounts = await Promise.all(
+      ledgers.map((ledger) => ledger.credits(data.account))
+    );
+
+    let total = ethers.BigNumber.from(0);
+    let contracts = [];
+    amounts.forEach((amount, i) => {
+      if (amount.gt(0)) {
+        total = total.add(amount);
+        contracts.push(ledgers[i].address);
+      }
+    });
+    setCredits({ total: utils.formatUnits(total, "ether"), contracts });
+  }
+
+  async function claimCredits() {
+    const signer = provider.getSigner();
+    const administration = new ethers.Contract(
+      administrationAddress,
+      getAbi("Administration"),
+      signer
+    );
+    // a single transaction withdraws from every contract owing the account
+    const claim_tx = await administration.claimPayments(
+      data.account,
+      credits.contracts
+    );
+    await claim_tx.wait();
+    setCredits({ total: "0", contracts: [] });
+  }
+
   async function loadMyOrders() {
     const signer = provider.getSigner();
     const factory = new ethers.Contract(
       factoryAddress,
-      StoreFactoryContract.abi,
+      getAbi("StoreFactory"),
       signer
     );
-    const allStores = await factory.getAllStores();
+    // the lens returns each store with the first orders of the account and their products metadata
+    const allStores = await getStoresSummaries(
+      factory,
+      data.account,
+      MAX_ORDERS_PER_STORE
+    );
+
+    loadMyCredits(allStores.map((store) => store.storeAddress));
 
     let _allMyOrders = [];
     await Promise.all(
       allStores.map(async (store) => {
-        const productStore = new ethers.Contract(
-          store.storeAddress,
-          StoreContract.abi,
-          signer
-        );
-        const orders = await productStore.listStoreOrders();
-        const my_orders = orders.filter((o) => o[2] === data.account);
+        let my_orders = store.buyerOrders;
+        let metadataHashes = store.buyerOrdersMetadata;
+
+        // rare accounts with more orders in a store load the rest from the store itself
+        if (my_orders.length === MAX_ORDERS_PER_STORE) {
+          const productStore = new ethers.Contract(
+            store.storeAddress,
+            getAbi("Store"),
+            signer
+          );
+          my_orders = await getAllPages(
+            productStore.getOrdersByBuyer,
+            data.account
+          );
+          metadataHashes = await Promise.all(
+            my_orders.map(
+              async (order) =>
+                (await productStore.callStatic.storeProducts(order[1]))
+                  .metadataHash
+            )
+          );
+        }
 
         await Promise.all(
-          my_orders.map(async (order) => {
-            const product = await productStore.callStatic.storeProducts(
-              Number(order[1])
-            );
-            const imgUrl = product[3].replace("ipfs://", IPFS_GATEWAY);
+          my_orders.map(async (order, i) => {
+            const metadata = await fetchProductMetadata(metadataHashes[i]);
             let item = {
               store: store.storeAddress,
               orderId: Number(order[0]),
               productId: Number(order[1]),
-              name: product[1],
-              image: imgUrl,
+              name: metadata.name,
+              image: metadata.image,
               price: utils.formatUnits(order[4].toString(), "ether"),
               order_status: orderStatus[order[6]],
             };
@@ -103,41 +165,53 @@ function MyProductsPage() {
     const signer = provider.getSigner();
     const market = new ethers.Contract(
       Marketaddress,
-      MarketContract.abi,
+      getAbi("Market"),
       signer
     );
 
-    const allProducts = await market.getAllProducts();
-
-    const mySaleProducts = allProducts.filter((p) => p[1] === data.account);
-    const myBoughtProducts = allProducts.filter((p) => p[7] === data.account);
+    const mySaleProducts = await getAllPages(
+      market.getProductsBySeller,
+      data.account
+    );
+    const myBoughtProducts = await getAllPages(
+      market.getProductsByBuyer,
+      data.account
+    );
 
     if (mySaleProducts !== undefined) {
-      const items = mySaleProducts.map((p) => {
-        const imgUrl = p[4].replace("ipfs://", IPFS_GATEWAY);
-        let item = {
-          productId: Number(p[0]),
-          name: p[2],
-          image: imgUrl,
-          price: utils.formatUnits(p[5].toString(), "ether"),
-          status: productStatus[p[8]],
-        };
-        return item;
-      });
+      // removed products stay in the seller index with an empty metadata hash
+      const listedProducts = mySaleProducts.filter(
+        (p) => p.metadataHash !== ethers.constants.HashZero
+      );
+      const items = await Promise.all(
+        listedProducts.map(async (p) => {
+          const metadata = await fetchProductMetadata(p.metadataHash);
+          let item = {
+            productId: Number(p.id),
+            name: metadata.name,
+            image: metadata.image,
+            price: utils.formatUnits(p.priceInUSD.toString(), "ether"),
+            status: productStatus[p.status],
+          };
+          return item;
+        })
+      );
       setSaleProducts(items.reverse());
     }
     if (myBoughtProducts !== undefined) {
-      const items = myBoughtProducts.map((p) => {
-        const imgUrl = p[4].replace("ipfs://", IPFS_GATEWAY);
-        let item = {
-          productId: Number(p[0]),
-          name: p[2],
-          image: imgUrl,
-          price: utils.formatUnits(p[5].toString(), "ether"),
-          status: p[8],
-        };
-        return item;
-      });
+      const items = await Promise.all(
+        myBoughtProducts.map(async (p) => {
+          const metadata = await fetchProductMetadata(p.metadataHash);
+          let item = {
+            productId: Number(p.id),
+            name: metadata.name,
+            image: metadata.image,
+            price: utils.formatUnits(p.priceInUSD.toString(), "ether"),
+            status: p.status,
+          };
+          return item;
+        })
+      );
       setBuyProducts(items.reverse());
     }
   }
@@ -164,6 +238,21 @@ function MyProductsPage() {
                     <Tab label="My Sales" value="sell" />
                     <Tab label="My Buyings" value="buy" />
                   </TabList>
+                  {credits.contracts.length !== 0 ? (
+                    <div>
+                      <span style={{ marginRight: "10px" }}>
+                        Available balance:{" "}
+                        {parseFloat(credits.total).toFixed(4)} ETH
+                      </span>
+                      <a
+                        className="btn btn-success"
+                        role="button"
+                        onClick={claimCredits}
+                      >
+                        Withdraw
+                      </a>
+                    </div>
+                  ) : null}
                 </div>
                 <TabPanel value="sell">
                   <Container>
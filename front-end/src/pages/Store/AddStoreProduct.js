@@ -7,8 +7,11 @@ import { Form, Button } from "react-bootstrap";
 
 import { makeStyles, CircularProgress } from "@material-ui/core";
 
-import { ipfsSaveContent } from "./../../utils/ipfsStorage";
-import StoreContract from "../../artifacts/contracts/Store.json";
+import {
+  ipfsSaveContent,
+  ipfsSaveProductMetadata,
+} from "./../../utils/ipfsStorage";
+import { getAbi } from "../../utils/registry";
 import networks from "../../utils/networksMap.json";
 
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
@@ -70,15 +73,19 @@ function AddProduct() {
         setLoading(true);
 
         const signer = provider.getSigner();
-        const my_store = new ethers.Contract(store, StoreContract.abi, signer);
+        const my_store = new ethers.Contract(store, getAbi("Store"), signer);
 
         const cid = await ipfsSaveContent(image.file);
         const imageURI = `ipfs://${cid}/${image.name}`;
 
-        const add_tx = await my_store.addProduct(
+        const metadataHash = await ipfsSaveProductMetadata(
           formInput.name,
           formInput.description,
-          imageURI,
+          imageURI
+        );
+
+        const add_tx = await my_store.addProduct(
+          metadataHash,
           utils.parseEther(String(formInput.price), "ether"),
           formInput.quantity,
           formInput.type
@@ -15,12 +15,11 @@ import {
 } from "react-bootstrap";
 
 import { IPFS_GATEWAY } from "./../../utils/ipfsStorage";
-import StoreFactoryContract from "../../artifacts/contracts/StoreFactory.json";
-import StoreContract from "../../artifacts/contracts/Store.json";
-import contractsAddress from "../../artifacts/deployments/map.json";
+import { getAbi, getAddress } from "../../utils/registry";
+import { getStoresSummaries } from "../../utils/pagination";
 import networks from "../../utils/networksMap.json";
 
-const factoryAddress = contractsAddress["5777"]["StoreFactory"][0];
+const factoryAddress = getAddress("StoreFactory");
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
 
 const useStyles = makeStyles((theme) => ({
@@ -45,21 +44,15 @@ function AllStores() {
 
     const factory = new ethers.Contract(
       factoryAddress,
-      StoreFactoryContract.abi,
+      getAbi("StoreFactory"),
       signer
     );
-    const marketStores = await factory.getAllStores();
+    const marketStores = await getStoresSummaries(factory);
 
     if (marketStores !== undefined) {
       const allStores = await Promise.all(
         marketStores.map(async (store) => {
-          const productStore = new ethers.Contract(
-            store.storeAddress,
-            StoreContract.abi,
-            signer
-          );
-          const storeDetailsURL = await productStore.callStatic.storeMetaData();
-          const metaUrl = storeDetailsURL.replace("ipfs://", IPFS_GATEWAY);
+          const metaUrl = store.storeMetaData.replace("ipfs://", IPFS_GATEWAY);
           const meta = await axios.get(metaUrl);
           const imgUrl = meta.data.image.replace("ipfs://", IPFS_GATEWAY);
           let item = {
@@ -19,17 +19,16 @@ import { updateAccountData } from "../../features/blockchain";
 import { File } from "web3.storage";
 import { ipfsSaveContent } from "./../../utils/ipfsStorage";
 
-import { IPFS_GATEWAY } from "./../../utils/ipfsStorage";
-import StoreFactoryContract from "../../artifacts/contracts/StoreFactory.json";
-import StoreContract from "../../artifacts/contracts/Store.json";
-import contractsAddress from "../../artifacts/deployments/map.json";
+import { fetchProductMetadata } from "./../../utils/metadata";
+import { getAbi, getAddress } from "../../utils/registry";
+import { getAllPages } from "../../utils/pagination";
 import networks from "../../utils/networksMap.json";
 
-const factoryAddress = contractsAddress["5777"]["StoreFactory"][0];
+const factoryAddress = getAddress("StoreFactory");
 
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
 
-const orderStatus = { 0: "PENDING", 1: "SENT", 2: "COMPLETED" };
+const orderStatus = { 0: "PENDING", 1: "SENT", 2: "COMPLETED", 3: "CANCELLED" };
 
 const useStyles = makeStyles((theme) => ({
   Container: {
@@ -90,21 +89,17 @@ function MyStore() {
 
     const factory = new ethers.Contract(
       factoryAddress,
-      StoreFactoryContract.abi,
+      getAbi("StoreFactory"),
       provider
     );
 
-    const marketStores = await factory.getAllStores();
+    const myStores = await factory.getStoresByOwner(data.account);
 
-    const myStore = marketStores.filter(
-      (storeInfo) => storeInfo[1] === data.account
-    );
-
-    if (myStore.length !== 0) {
+    if (myStores.length !== 0) {
       dispatch(
         getUserData({
           ...userMarketItems,
-          store: myStore[0][0],
+          store: myStores[0],
         })
       );
       setHasStore(true);
@@ -116,14 +111,14 @@ function MyStore() {
     const signer = provider.getSigner();
     const factory = new ethers.Contract(
       factoryAddress,
-      StoreFactoryContract.abi,
+      getAbi("StoreFactory"),
       signer
     );
 
     if (!hasStore) {
       try {
         const fee = await factory.callStatic.createStoreFee();
-        const create_store_fee = await factory.callStatic._convertUSDToETH(fee);
+        const create_store_fee = await factory.quoteUSDToETH(fee);
 
         const cid = await ipfsSaveContent(formInput.image);
         const imageURI = `ipfs://${cid}/${formInput.imageName}`;
@@ -163,7 +158,7 @@ function MyStore() {
     const myStoreAddress = userMarketItems.store;
     const Store = new ethers.Contract(
       myStoreAddress,
-      StoreContract.abi,
+      getAbi("Store"),
       signer
     );
     const remove_tx = await Store.removeProduct(Number(id));
@@ -176,26 +171,28 @@ function MyStore() {
       const myStoreAddress = userMarketItems.store;
       const productStore = new ethers.Contract(
         myStoreAddress,
-        StoreContract.abi,
+        getAbi("Store"),
         signer
       );
 
-      const storeProducts = await productStore.listStoreProducts();
-
-      const storeInSaleProducts = storeProducts.filter((p) => p[1] !== "");
+      const storeInSaleProducts = await getAllPages(
+        productStore.getStoreProducts
+      );
 
       if (storeInSaleProducts !== undefined) {
-        const items = storeInSaleProducts.map((p) => {
-          const imgUrl = p[3].replace("ipfs://", IPFS_GATEWAY);
-          let item = {
-            productId: Number(p[0]),
-            name: p[1],
-            image: imgUrl,
-            price: utils.formatUnits(p[4].toString(), "ether"),
-            productOrdersCount: Number(p[6]),
-          };
-          return item;
-        });
+        const items = await Promise.all(
+          storeInSaleProducts.map(async (p) => {
+            const metadata = await fetchProductMetadata(p.metadataHash);
+            let item = {
+              productId: Number(p.productId),
+              name: metadata.name,
+              image: metadata.image,
+              price: utils.formatUnits(p.priceInUSD.toString(), "ether"),
+              productOrdersCount: Number(p.activeOrders),
+            };
+            return item;
+          })
+        );
         setstoreInSaleProducts(items.reverse());
       }
     }
@@ -207,14 +204,14 @@ function MyStore() {
       const myStoreAddress = userMarketItems.store;
       const productStore = new ethers.Contract(
         myStoreAddress,
-        StoreContract.abi,
+        getAbi("Store"),
         signer
       );
 
-      const orders = await productStore.listStoreOrders();
-      const uncomplete_orders = orders.filter(
-        (o) => orderStatus[o[6]] !== "COMPLETED"
-      );
+      // pending and sent orders are read from their queues, oldest first
+      const pending_orders = await getAllPages(productStore.getOrderQueue, 0);
+      const sent_orders = await getAllPages(productStore.getOrderQueue, 1);
+      const uncomplete_orders = pending_orders.concat(sent_orders);
 
       if (uncomplete_orders !== undefined) {
         const items = await Promise.all(
@@ -223,11 +220,12 @@ function MyStore() {
             const product = await productStore.callStatic.storeProducts(
               product_id
             );
+            const metadata = await fetchProductMetadata(product.metadataHash);
 
             let item = {
               orderId: Number(order[0]),
               productId: product_id,
-              productName: product.name,
+              productName: metadata.name,
               buyer: order[2],
               quantity: Number(order[3]),
               TotalbuyPrice: utils.formatUnits(order[4], "ether"),
@@ -249,7 +247,7 @@ function MyStore() {
         const myStoreAddress = userMarketItems.store;
         const productStore = new ethers.Contract(
           myStoreAddress,
-          StoreContract.abi,
+          getAbi("Store"),
           signer
         );
 
@@ -7,12 +7,12 @@ import { updateAccountData } from "../../features/blockchain";
 import { CircularProgress } from "@material-ui/core";
 import { useParams, useNavigate } from "react-router-dom";
 
-import { IPFS_GATEWAY } from "./../../utils/ipfsStorage";
-import StoreContract from "../../artifacts/contracts/Store.json";
+import { fetchProductMetadata } from "./../../utils/metadata";
+import { getAbi } from "../../utils/registry";
 
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
 
-const orderStatus = { 0: "PENDING", 1: "SENT", 2: "COMPLETED" };
+const orderStatus = { 0: "PENDING", 1: "SENT", 2: "COMPLETED", 3: "CANCELLED" };
 
 function OrderPage() {
   const { store, product_id, order_id } = useParams();
@@ -53,29 +53,25 @@ function OrderPage() {
     if (Number(order_id) !== undefined) {
       const productStore = new ethers.Contract(
         store,
-        StoreContract.abi,
+        getAbi("Store"),
         provider
       );
       const storeOwner = await productStore.callStatic.owner();
 
-      const product_orders = await productStore.listStoreOrders();
-
-      const order = product_orders.filter(
-        (o) => Number(o[0]) === Number(order_id)
-      )[0];
+      const order = await productStore.callStatic.storeOrders(Number(order_id));
 
       const product_id = Number(order[1]);
       const product = await productStore.callStatic.storeProducts(product_id);
 
-      const imgUrl = product[3].replace("ipfs://", IPFS_GATEWAY);
+      const metadata = await fetchProductMetadata(product.metadataHash);
 
       if (order !== undefined) {
         setOrderState({
           ...orderState,
           seller: storeOwner,
           buyer: order[2],
-          name: product[1],
-          image: imgUrl,
+          name: metadata.name,
+          image: metadata.image,
           total_buy_price: utils.formatUnits(order[4]),
           buy_price_eth: utils.formatUnits(order[4]) / Number(order[3]),
           order_quantity: Number(order[3]),
@@ -93,7 +89,7 @@ function OrderPage() {
         const signer = provider.getSigner();
         const productStore = new ethers.Contract(
           store,
-          StoreContract.abi,
+          getAbi("Store"),
           signer
         );
 
@@ -117,7 +113,7 @@ function OrderPage() {
         const signer = provider.getSigner();
         const productStore = new ethers.Contract(
           store,
-          StoreContract.abi,
+          getAbi("Store"),
           signer
         );
 
@@ -141,7 +137,7 @@ function OrderPage() {
         const signer = provider.getSigner();
         const productStore = new ethers.Contract(
           store,
-          StoreContract.abi,
+          getAbi("Store"),
           signer
         );
 
@@ -166,7 +162,7 @@ function OrderPage() {
         const signer = provider.getSigner();
         const productStore = new ethers.Contract(
           store,
-          StoreContract.abi,
+          getAbi("Store"),
           signer
         );
 
@@ -7,7 +7,9 @@ import { useSelector } from "react-redux";
 import { Card, Container, Row, Col } from "react-bootstrap";
 
 import { IPFS_GATEWAY } from "./../../utils/ipfsStorage";
-import StoreContract from "../../artifacts/contracts/Store.json";
+import { fetchProductMetadata } from "./../../utils/metadata";
+import { getAllPages } from "../../utils/pagination";
+import { getAbi } from "../../utils/registry";
 import networks from "../../utils/networksMap.json";
 
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
@@ -34,7 +36,7 @@ function StorePage() {
     const signer = provider.getSigner();
     const _storeContract = new ethers.Contract(
       address,
-      StoreContract.abi,
+      getAbi("Store"),
       signer
     );
 
@@ -43,21 +45,23 @@ function StorePage() {
     const meta = await axios.get(metadataUrl);
     setStoreName(meta.data.name);
 
-    const products = await _storeContract.listStoreProducts();
-    const storeInSaleProducts = products.filter((p) => p[1] !== "");
+    const storeInSaleProducts = await getAllPages(
+      _storeContract.getStoreProducts
+    );
 
-    const items = storeInSaleProducts.map((p) => {
-      const imgUrl = p[3].replace("ipfs://", IPFS_GATEWAY);
-      console.log(imgUrl);
-      let item = {
-        productId: Number(p[0]),
-        name: p[1],
-        image: imgUrl,
-        price: utils.formatUnits(p[4].toString(), "ether"),
-        productOrdersCount: Number(p[6]),
-      };
-      return item;
-    });
+    const items = await Promise.all(
+      storeInSaleProducts.map(async (p) => {
+        const metadata = await fetchProductMetadata(p.metadataHash);
+        let item = {
+          productId: Number(p.productId),
+          name: metadata.name,
+          image: metadata.image,
+          price: utils.formatUnits(p.priceInUSD.toString(), "ether"),
+          productOrdersCount: Number(p.activeOrders),
+        };
+        return item;
+      })
+    );
     setAllStoresProducts(items.reverse());
   }
 
@@ -15,8 +15,8 @@ import {
 import { useParams } from "react-router-dom";
 import Identicon from "../../components/Identicon";
 
-import { IPFS_GATEWAY } from "./../../utils/ipfsStorage";
-import StoreContract from "../../artifacts/contracts/Store.json";
+import { fetchProductMetadata } from "./../../utils/metadata";
+import { getAbi } from "../../utils/registry";
 
 const provider = new ethers.providers.Web3Provider(window.ethereum, "any");
 const quantityMap = { 0: true, 1: false };
@@ -71,26 +71,26 @@ function StoreProductPage() {
     if (product_id !== undefined) {
       const productStore = new ethers.Contract(
         store,
-        StoreContract.abi,
+        getAbi("Store"),
         provider
       );
       const storeOwner = await productStore.callStatic.owner();
       const details = await productStore.callStatic.storeProducts(product_id);
 
-      const imgUrl = details[3].replace("ipfs://", IPFS_GATEWAY);
+      const metadata = await fetchProductMetadata(details.metadataHash);
 
-      convertPrice(utils.formatUnits(details[4])).then((res) => {
+      convertPrice(utils.formatUnits(details.priceInUSD)).then((res) => {
         setProductState({
           ...productState,
           seller: storeOwner,
-          name: details[1],
-          description: details[2],
-          image: imgUrl,
-          price: utils.formatUnits(details[4]),
+          name: metadata.name,
+          description: metadata.description,
+          image: metadata.image,
+          price: utils.formatUnits(details.priceInUSD),
           price_eth: utils.formatUnits(res),
-          quantity: Number(details[5]),
-          numberOrders: Number(details[6]),
-          has_quantity: quantityMap[details[7]],
+          quantity: Number(details.quantity),
+          numberOrders: Number(details.activeOrders),
+          has_quantity: quantityMap[details.productType],
         });
       });
     }
@@ -101,7 +101,7 @@ function StoreProductPage() {
       if (product_id !== undefined) {
         const productStore = new ethers.Contract(
           store,
-          StoreContract.abi,
+          getAbi("Store"),
           provider
         );
 
@@ -128,7 +128,7 @@ function StoreProductPage() {
         const signer = provider.getSigner();
         const productStore = new ethers.Contract(
           store,
-          StoreContract.abi,
+          getAbi("Store"),
           signer
         );
 
@@ -156,10 +156,10 @@ function StoreProductPage() {
   async function convertPrice(amount) {
     const productStore = new ethers.Contract(
       store,
-      StoreContract.abi,
+      getAbi("Store"),
       provider
     );
-    const price_in_eth = await productStore.callStatic._convertUSDToETH(
+    const price_in_eth = await productStore.quoteUSDToETH(
       utils.parseEther(amount.toString(), "ether")
     );
     return price_in_eth;
@@ -1,4 +1,5 @@
 import { Web3Storage } from "web3.storage";
+import { buildMetadata, metadataHash, hashToCid } from "./metadata";
 
 const web3storage_key = "YOUR-WEB3.STORAGE-API-TOKEN";
 
@@ -19,3 +20,18 @@ export const ipfsSaveContent = async (files) => {
   console.log("Stored files with cid:", cid);
   return cid;
 };
+
+// Upload a product metadata JSON as a single raw block and return its bytes32 hash
+export const ipfsSaveProductMetadata = async (name, description, image) => {
+  const content = buildMetadata(name, description, image);
+  const hash = await metadataHash(content);
+  const client = MakeStorageClient();
+  const cid = await client.put([new File([content], "metadata.json")], {
+    wrapWithDirectory: false,
+  });
+  // the contracts only store the hash, a different CID would make the product unreadable
+  if (cid !== hashToCid(hash)) {
+    throw new Error(`Unexpected metadata CID ${cid}, expected ${hashToCid(hash)}`);
+  }
+  return hash;
+};
@@ -0,0 +1,73 @@
+import { IPFS_GATEWAY } from "./ipfsStorage";
+
+// Products metadata JSON is stored on IPFS as a single raw block (CIDv1, raw codec, sha256),
+// the contracts only keep its sha256 digest as a bytes32 metadata hash
+const CID_PREFIX = [0x01, 0x55, 0x12, 0x20];
+const BASE32_ALPHABET = "abcdefghijklmnopqrstuvwxyz234567";
+
+const metadataCache = {};
+
+function base32Encode(bytes) {
+  let bits = 0;
+  let value = 0;
+  let output = "";
+  for (const byte of bytes) {
+    value = (value << 8) | byte;
+    bits += 8;
+    while (bits >= 5) {
+      output += BASE32_ALPHABET[(value >>> (bits - 5)) & 31];
+      bits -= 5;
+    }
+  }
+  if (bits > 0) output += BASE32_ALPHABET[(value << (5 - bits)) & 31];
+  return output;
+}
+
+function base32Decode(text) {
+  let bits = 0;
+  let value = 0;
+  const bytes = [];
+  for (const char of text) {
+    value = (value << 5) | BASE32_ALPHABET.indexOf(char);
+    bits += 5;
+    if (bits >= 8) {
+      bytes.push((value >>> (bits - 8)) & 255);
+      bits -= 8;
+    }
+  }
+  return bytes;
+}
+
+const toHex = (bytes) =>
+  "0x" + Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("");
+
+export const hashToCid = (metadataHash) => {
+  const digest = metadataHash
+    .slice(2)
+    .match(/.{2}/g)
+    .map((b) => parseInt(b, 16));
+  return "b" + base32Encode([...CID_PREFIX, ...digest]);
+};
+
+export const cidToHash = (cid) => toHex(base32Decode(cid.slice(1)).slice(4));
+
+// same canonical JSON as scripts/metadata.py build_metadata
+export const buildMetadata = (name, description, image) =>
+  new TextEncoder().encode(JSON.stringify({ description, image, name }));
+
+export const metadataHash = async (content) =>
+  toHex(new Uint8Array(await crypto.subtle.digest("SHA-256", content)));
+
+export const fetchProductMetadata = async (metadataHash) => {
+  if (metadataCache[metadataHash] === undefined) {
+    metadataCache[metadataHash] = fetch(
+      IPFS_GATEWAY + hashToCid(metadataHash)
+    )
+      .then((res) => res.json())
+      .then((metadata) => ({
+        ...metadata,
+        image: metadata.image.replace("ipfs://", IPFS_GATEWAY),
+      }));
+  }
+  return metadataCache[metadataHash];
+};
@@ -0,0 +1,29 @@
+export const PAGE_SIZE = 100;
+// stores summaries embed strings and orders, keep their pages small enough for the call gas limit
+export const STORES_PAGE_SIZE = 50;
+
+// Walk a cursor-paginated contract view (args..., cursor, limit) => (items, nextCursor)
+export const getAllPages = async (paginatedView, ...args) =>
+  getAllPagesBy(PAGE_SIZE, paginatedView, ...args);
+
+export const getAllPagesBy = async (pageSize, paginatedView, ...args) => {
+  let items = [];
+  let cursor = 0;
+  while (true) {
+    const [page, nextCursor] = await paginatedView(...args, cursor, pageSize);
+    items = items.concat(page);
+    // filtered views can return short or empty pages before the end,
+    // only a cursor that doesn't move means there is nothing left
+    if (Number(nextCursor) === cursor) return items;
+    cursor = Number(nextCursor);
+  }
+};
+
+// Load the store directory through the StoreFactory lens, one call per page of stores
+export const getStoresSummaries = async (factory, buyer, maxOrders) =>
+  getAllPagesBy(
+    STORES_PAGE_SIZE,
+    factory.getStoresSummaries,
+    buyer || "0x0000000000000000000000000000000000000000",
+    maxOrders || 0
+  );
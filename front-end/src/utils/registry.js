@@ -0,0 +1,8 @@
+import registry from "../artifacts/deployments/5777.json";
+
+// Compact deployment registry written by scripts/update_front_end.py (not committed,
+// run it after deploying, `yarn start` and `yarn build` stop with an explicit message while
+// it's missing): one ABI per contract name and the active address of each deployed contract
+export const getAbi = (name) => registry.contracts[name].abi;
+
+export const getAddress = (name) => registry.contracts[name].address;
@@ -0,0 +1,125 @@
+import time
+from brownie import AuctionMarket, web3
+from scripts.helper_scripts import get_account, split_to_fit
+
+"""
+    Keeper settling the expired auctions of the AuctionMarket in batches:
+        brownie run scripts/auction_keeper.py main [poll interval in seconds] --network=ganache-local
+
+    Each round reads the expired auctions from the contract end times index and
+    settles them with settleExpired, batches are sized to fit in a share of the block
+    gas limit and the keeper reports the settled auctions, gas and throughput
+"""
+
+POLL_INTERVAL = 15
+
+# share of the block gas limit that a single settlement batch is allowed to use
+BLOCK_GAS_SHARE = 0.5
+
+# expired auctions ids read from the contract per call
+EXPIRED_PAGE_SIZE = 200
+
+
+def send_settlement(auction_market, auction_ids, account, gas_budget):
+    """
+    Send and wait for the settleExpired transactions of `auction_ids`, split to fit the gas budget
+    @return the list of sent transactions
+    """
+    parts = split_to_fit(
+        auction_ids,
+        lambda part: auction_market.settleExpired.estimate_gas(part, {"from": account}),
+        gas_budget,
+    )
+    txs = []
+    for part in parts:
+        settle_tx = auction_market.settleExpired(part, {"from": account, "silent": True})
+        settle_tx.wait(1)
+        txs.append(settle_tx)
+    return txs
+
+
+def settle_expired(auction_market, account, gas_budget=None):
+    """
+    Settle every auction expired at the time of the call
+    @return the number of settled auctions, the list of sent transactions
+    """
+    if gas_budget is None:
+        gas_budget = int(web3.eth.get_block("latest").gasLimit * BLOCK_GAS_SHARE)
+
+    current_bucket = web3.eth.get_block("latest").timestamp // auction_market.END_TIME_BUCKET()
+
+    settled = 0
+    txs = []
+    bucket = 0
+    while True:
+        auction_ids, bucket = auction_market.getExpiredAuctions(bucket, EXPIRED_PAGE_SIZE)
+        auction_ids = list(auction_ids)
+        # each call reads a bounded window of buckets, an empty page only ends
+        # the walk once the window went past the current bucket
+        if not auction_ids:
+            if bucket > current_bucket:
+                break
+            continue
+        for settle_tx in send_settlement(auction_market, auction_ids, account, gas_budget):
+            if "AuctionEnded" in settle_tx.events:
+                settled += len(settle_tx.events["AuctionEnded"])
+            txs.append(settle_tx)
+    return settled, txs
+
+
+class KeeperStats:
+    """Running totals of a keeper, used for its throughput report"""
+
+    def __init__(self):
+        self.rounds = 0
+        self.settled = 0
+        self.transactions = 0
+        self.gas_used = 0
+        self.busy_time = 0.0
+
+    def record(self, settled, txs, elapsed):
+        self.rounds += 1
+        self.settled += settled
+        self.transactions += len(txs)
+        self.gas_used += sum(tx.gas_used for tx in txs)
+        self.busy_time += elapsed
+
+    @property
+    def throughput(self):
+        """Settled auctions per second of settlement work"""
+        return self.settled / self.busy_time if self.busy_time else 0.0
+
+    def report(self):
+        return "%d auctions settled in %d transactions over %d rounds, %d gas (%.0f per auction), %.1f auctions/s" % (
+            self.settled,
+            self.transactions,
+            self.rounds,
+            self.gas_used,
+            self.gas_used / self.settled if self.settled else 0,
+            self.throughput,
+        )
+
+
+def run(auction_market, account, poll_interval=POLL_INTERVAL, rounds=None):
+    """
+    Poll the chain and settle the expired auctions every `poll_interval` seconds,
+    forever or for the given number of rounds
+    @return the keeper stats
+    """
+    stats = KeeperStats()
+    while rounds is None or stats.rounds < rounds:
+        start = time.perf_counter()
+        settled, txs = settle_expired(auction_market, account)
+        stats.record(settled, txs, time.perf_counter() - start)
+        if settled:
+            print(
+                "round %d: settled %d auctions in %d transactions | %s"
+                % (stats.rounds, settled, len(txs), stats.report())
+            )
+        if rounds is None or stats.rounds < rounds:
+            time.sleep(poll_interval)
+    return stats
+
+
+def main(poll_interval=POLL_INTERVAL):
+    run(AuctionMarket[-1], get_account(), float(poll_interval))
@@ -0,0 +1,322 @@
+import json, os, time
+from brownie import Store, chain, history, network
+from scripts.deploy import deploy
+from scripts.helper_scripts import get_account, get_contract, toWei, ZERO_ADDRESS
+from scripts.benchmarks_common import (
+    PRODUCT_PRICE,
+    PAGE_SIZE,
+    product_metadata_hash,
+    measure_call,
+    print_table,
+    format_ms,
+)
+
+"""
+    Gas and latency benchmark suite covering every state-changing entry point of the contracts
+    and the heavy views as the arrays grow, the results are written to a JSON report:
+        brownie run scripts/benchmark_suite.py main [report path] --network=development
+
+    Compare a fresh run against a stored baseline report, the run fails when the gas
+    used by any entry point or view grows by more than the threshold (in %):
+        brownie run scripts/benchmark_suite.py compare <baseline path> [threshold] --network=development
+"""
+
+REPORT_PATH = "./build/benchmarks/report.json"
+DEFAULT_THRESHOLD = 5
+
+VIEW_SIZES = [10, 100, 1000]
+STORE_VIEW_SIZES = [10, 100]
+
+# arrays are grown with batched listings of this size
+LISTING_BATCH = 50
+
+AUCTION_DURATION = 3600
+
+
+def measure_entry_points():
+    """
+    Deploy the system with scripts/deploy.py and run every state-changing function
+    @return the contracts, the gas used by each entry point
+    """
+    admin = get_account()
+    seller = get_account(1)
+    buyer = get_account(2)
+    bidder = get_account(3)
+
+    start = len(history)
+    administration, market, store_factory, auction_market = deploy()
+
+    gas = {}
+    # deployment and wiring transactions sent by scripts/deploy.py
+    for tx in history[start:]:
+        gas["%s.%s" % (tx.contract_name, tx.fn_name)] = tx.gas_used
+
+    def record(name, tx):
+        gas[name] = tx.gas_used
+
+    # Market
+    record("Market.addProduct", market.addProduct(product_metadata_hash(), PRODUCT_PRICE, {"from": seller}))
+    record(
+        "Market.addProducts[10]",
+        market.addProducts([product_metadata_hash()] * 10, [PRODUCT_PRICE] * 10, {"from": seller}),
+    )
+    record("Market.changePrice", market.changePrice(0, PRODUCT_PRICE * 2, {"from": seller}))
+    record(
+        "Market.changePrices[10]",
+        market.changePrices(list(range(1, 11)), [PRODUCT_PRICE * 2] * 10, {"from": seller}),
+    )
+    record("Market._convertUSDToETH", market._convertUSDToETH(PRODUCT_PRICE, {"from": buyer}))
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE * 2)
+    record("Market.purchase", market.purchase(0, {"from": buyer, "value": price_in_eth}))
+    record(
+        "Market.purchaseBatch[5]",
+        market.purchaseBatch(list(range(1, 6)), {"from": buyer, "value": price_in_eth * 5}),
+    )
+    record("Market.sendProduct", market.sendProduct(0, {"from": seller}))
+    record("Market.confirmRecieved", market.confirmRecieved(0, {"from": buyer}))
+    record("Market.withdraw", market.withdraw({"from": seller}))
+    record("Market.cancelPurchase", market.cancelPurchase(1, {"from": buyer}))
+    record("Market.remove", market.remove(1, {"from": seller}))
+    record("Market.removeProducts[4]", market.removeProducts([6, 7, 8, 9], {"from": seller}))
+
+    # StoreFactory and Store
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+    create_tx = store_factory.createStore("ipfs://benchmark-store", {"from": seller, "value": create_store_fee})
+    record("StoreFactory.createStore", create_tx)
+    record(
+        "StoreFactory.createStoreDeterministic",
+        store_factory.createStoreDeterministic(
+            "ipfs://benchmark-store", "0x" + "00" * 32, {"from": seller, "value": create_store_fee}
+        ),
+    )
+    record("StoreFactory._convertUSDToETH", store_factory._convertUSDToETH(PRODUCT_PRICE, {"from": buyer}))
+    store = get_contract(Store, create_tx.events["StoreCreated"]["storeAddress"])
+
+    record("Store.addProduct", store.addProduct(product_metadata_hash(), PRODUCT_PRICE, 100, 0, {"from": seller}))
+    record(
+        "Store.addProducts[10]",
+        store.addProducts(
+            [product_metadata_hash()] * 10, [PRODUCT_PRICE] * 10, [100] * 10, [0] * 10, {"from": seller}
+        ),
+    )
+    record(
+        "Store.changePrices[10]",
+        store.changePrices(list(range(1, 11)), [PRODUCT_PRICE * 2] * 10, {"from": seller}),
+    )
+    record("Store._convertUSDToETH", store._convertUSDToETH(PRODUCT_PRICE, {"from": buyer}))
+    unit_price = store.quoteUSDToETH(PRODUCT_PRICE)
+    record("Store.createBuyOrder", store.createBuyOrder(0, 2, {"from": buyer, "value": unit_price * 2}))
+    unit_price = store.quoteUSDToETH(PRODUCT_PRICE * 2)
+    record(
+        "Store.createBuyOrders[5]",
+        store.createBuyOrders(list(range(1, 6)), [1] * 5, {"from": buyer, "value": unit_price * 5}),
+    )
+    record("Store.fillOrder", store.fillOrder(0, {"from": seller}))
+    record("Store.fillOrders[3]", store.fillOrders([1, 2, 3], {"from": seller}))
+    record("Store.confirmRecieved", store.confirmRecieved(0, {"from": buyer}))
+    record("Store.withdraw", store.withdraw({"from": seller}))
+    record("Store.leaveReview", store.leaveReview(0, "5", "benchmark review", {"from": buyer}))
+    record("Store.cancelOrder", store.cancelOrder(4, {"from": buyer}))
+    record("Store.fillNextOrders[1]", store.fillNextOrders(1, {"from": seller}))
+    record("Store.removeProduct", store.removeProduct(6, {"from": seller}))
+    record("Store.removeProducts[3]", store.removeProducts([7, 8, 9], {"from": seller}))
+
+    # AuctionMarket
+    record(
+        "AuctionMarket.startAuction",
+        auction_market.startAuction("ipfs://benchmark-auction", PRODUCT_PRICE, AUCTION_DURATION, {"from": seller}),
+    )
+    record("AuctionMarket._convertUSDToETH", auction_market._convertUSDToETH(PRODUCT_PRICE, {"from": buyer}))
+    start_bid = auction_market.quoteUSDToETH(PRODUCT_PRICE)
+    record("AuctionMarket.bid", auction_market.bid(0, {"from": buyer, "value": start_bid + 1}))
+    record("AuctionMarket.bid (outbid)", auction_market.bid(0, {"from": bidder, "value": start_bid + 2}))
+    record("AuctionMarket.withdrawBid", auction_market.withdrawBid(0, {"from": buyer}))
+    auction_market.startAuction("ipfs://benchmark-auction", PRODUCT_PRICE, AUCTION_DURATION, {"from": seller})
+    auction_market.bid(1, {"from": buyer, "value": start_bid + 1})
+    auction_market.bid(1, {"from": bidder, "value": start_bid + 2})
+    record("AuctionMarket.withdrawBids[1]", auction_market.withdrawBids([1], {"from": buyer}))
+    chain.sleep(AUCTION_DURATION + 1)
+    chain.mine()
+    record("AuctionMarket.endAuction", auction_market.endAuction(0, {"from": seller}))
+    record("AuctionMarket.withdraw", auction_market.withdraw({"from": seller}))
+    record("AuctionMarket.settleExpired[1]", auction_market.settleExpired([1], {"from": admin}))
+    record("AuctionMarket.withdrawFor", auction_market.withdrawFor(seller, {"from": admin}))
+
+    # Administration
+    record("Administration.setPriceCacheWindow", administration.setPriceCacheWindow(120, {"from": admin}))
+    record("Administration.changeMarketFee", administration.changeMarketFee(10, {"from": admin}))
+    record("Administration.changeAuctionFee", administration.changeAuctionFee(10, {"from": admin}))
+    record("Administration.changeStoreFee", administration.changeStoreFee(toWei(10), {"from": admin}))
+    record("Administration.convertUSDToETH", administration.convertUSDToETH(PRODUCT_PRICE, {"from": admin}))
+    record(
+        "Administration.claimPayments[3]",
+        administration.claimPayments(administration, [market, store, auction_market], {"from": admin}),
+    )
+    record("Administration.withdrawBalance", administration.withdrawBalance({"from": admin}))
+
+    return (market, store_factory, store, auction_market), gas
+
+
+def _grow(size, count, add):
+    """Call `add(n)` with batches until `count()` reaches `size`"""
+    while count() < size:
+        add(min(LISTING_BATCH, size - count()))
+
+
+def _measure_view(view, *args):
+    try:
+        latency, size = measure_call(view, *args)
+        gas = view.estimate_gas(*args)
+    except Exception:
+        # the full dumps end up exceeding the node call gas limit
+        return {"gas": None, "ms": format_ms(None), "bytes": None}
+    return {"gas": gas, "ms": format_ms(latency), "bytes": size}
+
+
+def measure_views(market, store_factory, store, auction_market):
+    """
+    Time the heavy views while the products, orders, auctions and stores arrays grow
+    @return the gas estimate, latency and response size of each view for each size
+    """
+    seller = get_account(1)
+    buyer = get_account(2)
+    silent = {"from": seller, "silent": True}
+
+    views = {}
+
+    def record(name, size, view, *args):
+        views.setdefault(name, {})[str(size)] = _measure_view(view, *args)
+
+    unit_price = store.quoteUSDToETH(PRODUCT_PRICE)
+    for size in VIEW_SIZES:
+        _grow(
+            size,
+            market.getProductsCount,
+            lambda n: market.addProducts([product_metadata_hash()] * n, [PRODUCT_PRICE] * n, silent),
+        )
+        _grow(
+            size,
+            store.productIds,
+            lambda n: store.addProducts([product_metadata_hash()] * n, [PRODUCT_PRICE] * n, [10**6] * n, [0] * n, silent),
+        )
+        _grow(
+            size,
+            store.orderIds,
+            lambda n: store.createBuyOrders(
+                [0] * n, [1] * n, {"from": buyer, "value": unit_price * n, "silent": True}
+            ),
+        )
+        for _ in range(auction_market.getAuctionsCount(), size):
+            auction_market.startAuction("ipfs://benchmark-auction", PRODUCT_PRICE, AUCTION_DURATION, silent)
+
+        record("Market.getAllProducts", size, market.getAllProducts)
+        record("Market.getProducts", size, market.getProducts, 0, PAGE_SIZE)
+        record("Market.getProductsByStatus", size, market.getProductsByStatus, 1, 0, PAGE_SIZE)
+        record("Market.getProductsBySeller", size, market.getProductsBySeller, seller, 0, PAGE_SIZE)
+        record("Store.listStoreProducts", size, store.listStoreProducts)
+        record("Store.listStoreOrders", size, store.listStoreOrders)
+        record("Store.getOrdersByStatus", size, store.getOrdersByStatus, 0, 0, PAGE_SIZE)
+        record("Store.getOrderQueue", size, store.getOrderQueue, 0, 0, PAGE_SIZE)
+        record("Store.getOrdersByBuyer", size, store.getOrdersByBuyer, buyer, 0, PAGE_SIZE)
+        record("AuctionMarket.getAuctionsList", size, auction_market.getAuctionsList)
+        record("AuctionMarket.getAuctions", size, auction_market.getAuctions, 0, PAGE_SIZE)
+
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+    for size in STORE_VIEW_SIZES:
+        for _ in range(store_factory.getStoresCount(), size):
+            store_factory.createStore(
+                "ipfs://benchmark-store",
+                {"from": seller, "value": create_store_fee, "silent": True},
+            )
+        record("StoreFactory.getAllStores", size, store_factory.getAllStores)
+        record("StoreFactory.getStores", size, store_factory.getStores, 0, PAGE_SIZE)
+        record("StoreFactory.getStoresByOwner", size, store_factory.getStoresByOwner, seller)
+        record(
+            "StoreFactory.getStoresSummaries", size, store_factory.getStoresSummaries, ZERO_ADDRESS, 0, 0, PAGE_SIZE
+        )
+
+    return views
+
+
+def run_suite():
+    contracts, gas = measure_entry_points()
+    views = measure_views(*contracts)
+    return {
+        "network": network.show_active(),
+        "timestamp": int(time.time()),
+        "gas": gas,
+        "views": views,
+    }
+
+
+def write_report(report, path=REPORT_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as report_file:
+        json.dump(report, report_file, indent=2, sort_keys=True)
+
+
+def load_report(path):
+    with open(path) as report_file:
+        return json.load(report_file)
+
+
+def _gas_entries(report):
+    """Flatten the entry points gas and the views gas estimates of a report, failed views are None"""
+    entries = dict(report["gas"])
+    for view, sizes in report["views"].items():
+        for size, measure in sizes.items():
+            entries["%s[%s]" % (view, size)] = measure["gas"]
+    return entries
+
+
+def find_regressions(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare the gas of every entry point and view measured in the baseline, an entry missing
+    from the report or a view that failed there is always a regression
+    @return a (name, baseline gas, gas, change in %) row for each regression above `threshold` %,
+    the gas is "missing" or "failed" and the change None when the entry wasn't measured
+    """
+    current = _gas_entries(report)
+    regressions = []
+    for name, baseline_gas in sorted(_gas_entries(baseline).items()):
+        if baseline_gas is None:
+            continue
+        if name not in current:
+            regressions.append((name, baseline_gas, "missing", None))
+        elif current[name] is None:
+            regressions.append((name, baseline_gas, "failed", None))
+        elif baseline_gas:
+            change = 100 * (current[name] - baseline_gas) / baseline_gas
+            if change > threshold:
+                regressions.append((name, baseline_gas, current[name], round(change, 2)))
+    return regressions
+
+
+def print_report(report):
+    print_table(["entry point", "gas used"], sorted(report["gas"].items()))
+    print()
+    rows = [
+        [view, size, measure["gas"] if measure["gas"] is not None else "failed", measure["ms"], measure["bytes"]]
+        for view, sizes in sorted(report["views"].items())
+        for size, measure in sorted(sizes.items(), key=lambda item: int(item[0]))
+    ]
+    print_table(["view", "items", "gas", "ms", "bytes"], rows)
+
+
+def main(report_path=REPORT_PATH):
+    report = run_suite()
+    write_report(report, report_path)
+    print_report(report)
+    print("\nreport written to %s" % report_path)
+
+
+def compare(baseline_path, threshold=DEFAULT_THRESHOLD, report_path=REPORT_PATH):
+    baseline = load_report(baseline_path)
+    main(report_path)
+
+    regressions = find_regressions(load_report(report_path), baseline, float(threshold))
+    if regressions:
+        print()
+        print_table(["regression", "baseline gas", "gas", "change %"], regressions)
+        raise SystemExit("%d gas regressions above %s%%" % (len(regressions), threshold))
+    print("no gas regression above %s%% against %s" % (threshold, baseline_path))
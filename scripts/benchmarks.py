@@ -0,0 +1,55 @@
+from scripts.benchmarks_market import (
+    benchmark_pagination,
+    benchmark_indexes,
+    benchmark_batch_checkout,
+    benchmark_listing_gas,
+    benchmark_state_transitions,
+    benchmark_settlement,
+    benchmark_compaction,
+)
+from scripts.benchmarks_store import (
+    benchmark_store_directory,
+    benchmark_store_index,
+    benchmark_order_book,
+    benchmark_store_creation,
+)
+from scripts.benchmarks_auction import benchmark_bidding
+from scripts.benchmarks_tooling import (
+    benchmark_deploy,
+    benchmark_tx_pipeline,
+    benchmark_registry,
+    benchmark_reset,
+    benchmark_front_end_sync,
+    benchmark_contract_handles,
+    benchmark_script_startup,
+)
+
+"""
+    Performance benchmarks to run against a local network, split by area in
+    benchmarks_market.py, benchmarks_store.py, benchmarks_auction.py and
+    benchmarks_tooling.py (shared helpers in benchmarks_common.py). Every benchmark
+    can still be run from here, main runs all of them:
+        brownie run scripts/benchmarks.py <benchmark function> --network=development
+"""
+
+
+def main():
+    benchmark_pagination()
+    benchmark_indexes()
+    benchmark_batch_checkout()
+    benchmark_listing_gas()
+    benchmark_state_transitions()
+    benchmark_store_directory()
+    benchmark_store_index()
+    benchmark_settlement()
+    benchmark_order_book()
+    benchmark_compaction()
+    benchmark_bidding()
+    benchmark_store_creation()
+    benchmark_front_end_sync()
+    benchmark_deploy()
+    benchmark_tx_pipeline()
+    benchmark_reset()
+    benchmark_registry()
+    benchmark_contract_handles()
+    benchmark_script_startup()
@@ -0,0 +1,69 @@
+from scripts.helper_scripts import get_account, toWei
+from scripts.benchmarks_common import PRODUCT_PRICE, deploy_auction_market, print_table
+
+"""
+    AuctionMarket bidding benchmarks:
+        brownie run scripts/benchmarks_auction.py benchmark_bidding --network=development
+"""
+
+BID_WAR_SIZE = 500
+REFUND_AUCTIONS = 10
+
+
+def benchmark_bidding():
+    """
+    Gas per bid and total gas of a BID_WAR_SIZE bids auction between a few bidders
+    raising each other, then the refunds of a loser outbid on several auctions
+    claimed one by one or with withdrawBids, run it on the previous commits to
+    compare with the former bid implementation
+    """
+    seller = get_account(1)
+    bidders = [get_account(i) for i in range(2, 10)]
+    auction_market = deploy_auction_market()
+
+    start_tx = auction_market.startAuction("ipfs://benchmark-auction", PRODUCT_PRICE, 3600, {"from": seller})
+    auction_id = start_tx.events["AuctionStarted"]["id"]
+    step = toWei(0.001)
+
+    first_bids = []
+    raises = []
+    for i in range(BID_WAR_SIZE):
+        bidder = bidders[i % len(bidders)]
+        highest_bid = auction_market.auctionsList(auction_id)[3]
+        current = auction_market.getUserBidAmount(bidder, auction_id)
+        bid_tx = auction_market.bid(
+            auction_id, {"from": bidder, "value": highest_bid - current + step, "silent": True}
+        )
+        (raises if current else first_bids).append(bid_tx.gas_used)
+
+    all_bids = first_bids + raises
+    print_table(
+        ["%d bids auction" % BID_WAR_SIZE, "gas used"],
+        [
+            ["first bid (avg)", sum(first_bids) // len(first_bids)],
+            ["raise (avg)", sum(raises) // len(raises)],
+            ["bid (max)", max(all_bids)],
+            ["all bids (total)", sum(all_bids)],
+        ],
+    )
+    print()
+
+    loser, winner = bidders[0], bidders[1]
+    refunds = []
+    for batched in [False, True]:
+        ids = []
+        for _ in range(REFUND_AUCTIONS):
+            start_tx = auction_market.startAuction(
+                "ipfs://benchmark-auction", PRODUCT_PRICE, 3600, {"from": seller, "silent": True}
+            )
+            ids.append(start_tx.events["AuctionStarted"]["id"])
+            start_bid = auction_market.auctionsList(ids[-1])[3]
+            auction_market.bid(ids[-1], {"from": loser, "value": start_bid + step, "silent": True})
+            auction_market.bid(ids[-1], {"from": winner, "value": start_bid + 2 * step, "silent": True})
+        if batched:
+            refunds.append(["withdrawBids", auction_market.withdrawBids(ids, {"from": loser, "silent": True}).gas_used])
+        else:
+            gas = sum(auction_market.withdrawBid(i, {"from": loser, "silent": True}).gas_used for i in ids)
+            refunds.append(["%d x withdrawBid" % REFUND_AUCTIONS, gas])
+
+    print_table(["refunds of %d auctions" % REFUND_AUCTIONS, "gas used"], refunds)
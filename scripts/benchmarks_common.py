@@ -0,0 +1,116 @@
+import functools, time
+from brownie import Store, web3
+from scripts.deploy import deploy
+from scripts.helper_scripts import get_account, get_contract, toWei
+from scripts.metadata import pin_product_metadata
+
+"""
+    Helpers shared by the benchmarks: deployments, raw view calls, an RPC counter
+    and the results tables
+"""
+
+PRODUCT_PRICE = toWei(100)
+
+PAGE_SIZE = 50
+
+
+@functools.lru_cache(maxsize=None)
+def product_metadata_hash():
+    """
+    Pin the benchmark product metadata, only done once per run when a benchmark first lists a product
+    @return the metadata hash of the benchmark product
+    """
+    return pin_product_metadata(
+        "benchmark product", "benchmark product description", "ipfs://benchmark-product-image"
+    )
+
+
+def deploy_market():
+    _, market, _, _ = deploy()
+    return get_account(), market
+
+
+def deploy_auction_market():
+    return deploy()[3]
+
+
+def deploy_store_factory():
+    return deploy()[2]
+
+
+def deploy_store(owner):
+    store_factory = deploy_store_factory()
+
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+    create_tx = store_factory.createStore("benchmark store", {"from": owner, "value": create_store_fee})
+    create_tx.wait(1)
+
+    return get_contract(Store, create_tx.events["StoreCreated"]["storeAddress"])
+
+
+def measure_call(view, *args):
+    """
+    Run a raw eth_call for a contract view
+    @return the call latency in seconds, the number of bytes returned
+    """
+    tx = {"to": view._address, "data": view.encode_input(*args)}
+    start = time.perf_counter()
+    raw = web3.eth.call(tx)
+    latency = time.perf_counter() - start
+    return latency, len(raw)
+
+
+def walk_pages(view, *args):
+    """
+    Walk a paginated view with raw calls
+    @return the number of calls, the total gas, latency and bytes returned, the items
+    """
+    calls, gas, seconds, size, items = 0, 0, 0, 0, []
+    cursor = 0
+    while True:
+        latency, length = measure_call(view, *args, cursor, PAGE_SIZE)
+        gas += view.estimate_gas(*args, cursor, PAGE_SIZE)
+        page, next_cursor = view(*args, cursor, PAGE_SIZE)
+        calls, seconds, size = calls + 1, seconds + latency, size + length
+        items.extend(page)
+        if next_cursor == cursor:
+            return calls, gas, seconds, size, items
+        cursor = next_cursor
+
+
+class RPCCounter:
+    """Web3 middleware counting the requests sent to the node, by method"""
+
+    def __init__(self):
+        self.counts = {}
+
+    def __call__(self, make_request, w3):
+        def middleware(method, params):
+            self.counts[method] = self.counts.get(method, 0) + 1
+            return make_request(method, params)
+
+        return middleware
+
+    def __enter__(self):
+        self.counts = {}
+        web3.middleware_onion.add(self, "rpc_counter")
+        return self
+
+    def __exit__(self, *args):
+        web3.middleware_onion.remove("rpc_counter")
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print(" | ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("-+-".join("-" * w for w in widths))
+    for row in rows:
+        print(" | ".join(str(v).ljust(w) for v, w in zip(row, widths)))
+
+
+def format_ms(seconds):
+    return "failed" if seconds is None else round(seconds * 1000, 2)
@@ -0,0 +1,492 @@
+from brownie import Administration, chain
+from scripts.deploy import deploy
+from scripts.helper_scripts import get_account, get_contract, TxPipeline
+from scripts.benchmarks_common import (
+    PRODUCT_PRICE,
+    PAGE_SIZE,
+    product_metadata_hash,
+    deploy_market,
+    deploy_store,
+    measure_call,
+    walk_pages,
+    print_table,
+    format_ms,
+)
+
+"""
+    Catalog, checkout and settlement benchmarks of the Market, most of them compared
+    with the Store (and with the AuctionMarket for the state transitions gas):
+        brownie run scripts/benchmarks_market.py <benchmark function> --network=development
+"""
+
+CATALOG_SIZES = [100, 1000, 10000, 25000]
+
+INDEX_SIZES = [10, 100, 1000]
+
+BATCH_SIZES = [1, 5, 20, 50]
+
+SETTLEMENT_SIZES = [100, 300]
+
+# catalog of which every other product is removed
+COMPACTION_CATALOG = 1000
+
+
+def benchmark_pagination():
+    """
+    Compare the full products dump with a paginated/filtered page as the catalog grows
+    """
+    _, market = deploy_market()
+
+    seller = get_account(1)
+    other_seller = get_account(2)
+
+    rows = []
+    for size in CATALOG_SIZES:
+        for i in range(market.getProductsCount(), size):
+            # one product out of ten is listed by the tracked seller
+            account = seller if i % 10 == 0 else other_seller
+            market.addProduct(
+                product_metadata_hash(),
+                PRODUCT_PRICE,
+                {"from": account, "required_confs": 0, "silent": True},
+            )
+
+        last_page_cursor = max(size - PAGE_SIZE, 0)
+        try:
+            full = measure_call(market.getAllProducts)
+        except Exception:
+            # the full dump ends up exceeding the node call gas limit
+            full = (None, None)
+        first_page = measure_call(market.getProducts, 0, PAGE_SIZE)
+        last_page = measure_call(market.getProducts, last_page_cursor, PAGE_SIZE)
+        seller_page = measure_call(market.getProductsBySeller, seller, 0, PAGE_SIZE)
+
+        rows.append(
+            [
+                size,
+                format_ms(full[0]),
+                full[1] if full[1] is not None else "failed",
+                format_ms(first_page[0]),
+                first_page[1],
+                format_ms(last_page[0]),
+                last_page[1],
+                format_ms(seller_page[0]),
+                seller_page[1],
+            ]
+        )
+
+    print_table(
+        [
+            "products",
+            "getAll ms",
+            "getAll bytes",
+            "page[0] ms",
+            "page[0] bytes",
+            "page[last] ms",
+            "page[last] bytes",
+            "seller page ms",
+            "seller page bytes",
+        ],
+        rows,
+    )
+
+
+def benchmark_indexes():
+    """
+    Gas paid by the writes that maintain the seller/buyer indexes next to the
+    gas of reading "my products"/"my orders" through the index or the full dump,
+    run it on the previous commit too to get the write overhead
+    """
+    _, market = deploy_market()
+    seller = get_account(1)
+    buyer = get_account(2)
+    other_seller = get_account(3)
+
+    store = deploy_store(seller)
+    add_tx = store.addProduct(
+        product_metadata_hash(), PRODUCT_PRICE, 10**9, 0, {"from": seller}
+    )
+    add_tx.wait(1)
+
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
+
+    write_gas = {}
+
+    tx = market.addProduct(product_metadata_hash(), PRODUCT_PRICE, {"from": seller})
+    write_gas["Market.addProduct"] = tx.gas_used
+    tx = market.purchase(0, {"from": buyer, "value": price_in_eth})
+    write_gas["Market.purchase"] = tx.gas_used
+    tx = market.cancelPurchase(0, {"from": buyer})
+    write_gas["Market.cancelPurchase"] = tx.gas_used
+    tx = store.createBuyOrder(0, 1, {"from": buyer, "value": price_in_eth})
+    write_gas["Store.createBuyOrder"] = tx.gas_used
+    tx = store.cancelOrder(0, {"from": buyer})
+    write_gas["Store.cancelOrder"] = tx.gas_used
+
+    print_table(["write", "gas used"], list(write_gas.items()))
+    print()
+
+    rows = []
+    for size in INDEX_SIZES:
+        # the tracked seller lists one product out of ten
+        for i in range(market.getProductsCount(), size):
+            account = seller if i % 10 == 0 else other_seller
+            market.addProduct(
+                product_metadata_hash(),
+                PRODUCT_PRICE,
+                {"from": account, "required_confs": 0, "silent": True},
+            )
+        for i in range(store.orderIds(), size):
+            account = buyer if i % 10 == 0 else other_seller
+            store.createBuyOrder(
+                0, 1, {"from": account, "value": price_in_eth, "required_confs": 0, "silent": True}
+            )
+
+        rows.append(
+            [
+                size,
+                market.getAllProducts.estimate_gas(),
+                market.getProductsBySeller.estimate_gas(seller, 0, PAGE_SIZE),
+                store.listStoreOrders.estimate_gas(),
+                store.getOrdersByBuyer.estimate_gas(buyer, 0, PAGE_SIZE),
+            ]
+        )
+
+    print_table(
+        ["items", "getAllProducts gas", "bySeller gas", "listStoreOrders gas", "byBuyer gas"],
+        rows,
+    )
+
+
+def benchmark_batch_checkout():
+    """
+    Total gas of N single purchases/orders against one batched checkout of N items
+    """
+    seller = get_account(1)
+    single_buyer = get_account(2)
+    batch_buyer = get_account(3)
+
+    rows = []
+    for size in BATCH_SIZES:
+        _, market = deploy_market()
+        store = deploy_store(seller)
+        for _ in range(2 * size):
+            market.addProduct(
+                product_metadata_hash(),
+                PRODUCT_PRICE,
+                {"from": seller, "silent": True},
+            )
+            store.addProduct(
+                product_metadata_hash(),
+                PRODUCT_PRICE,
+                10**9,
+                0,
+                {"from": seller, "silent": True},
+            )
+
+        price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
+
+        market_single_gas = 0
+        store_single_gas = 0
+        for i in range(size):
+            tx = market.purchase(i, {"from": single_buyer, "value": price_in_eth, "silent": True})
+            market_single_gas += tx.gas_used
+            tx = store.createBuyOrder(i, 1, {"from": single_buyer, "value": price_in_eth, "silent": True})
+            store_single_gas += tx.gas_used
+
+        batch_ids = list(range(size, 2 * size))
+        tx = market.purchaseBatch(batch_ids, {"from": batch_buyer, "value": price_in_eth * size})
+        market_batch_gas = tx.gas_used
+        tx = store.createBuyOrders(
+            batch_ids, [1] * size, {"from": batch_buyer, "value": price_in_eth * size}
+        )
+        store_batch_gas = tx.gas_used
+
+        rows.append(
+            [
+                size,
+                market_single_gas,
+                market_batch_gas,
+                f"{100 * (1 - market_batch_gas / market_single_gas):.1f}%",
+                store_single_gas,
+                store_batch_gas,
+                f"{100 * (1 - store_batch_gas / store_single_gas):.1f}%",
+            ]
+        )
+
+    print_table(
+        [
+            "items",
+            "N x purchase",
+            "purchaseBatch",
+            "saved",
+            "N x createBuyOrder",
+            "createBuyOrders",
+            "saved",
+        ],
+        rows,
+    )
+
+
+def benchmark_listing_gas():
+    """
+    Gas and calldata of a listing with the metadata hash, the on-chain strings
+    numbers are given by benchmark_indexes on the commits before the metadata hash
+    """
+    seller = get_account(1)
+    _, market = deploy_market()
+    store = deploy_store(seller)
+
+    rows = []
+    for name, add_tx in [
+        ("Market.addProduct", market.addProduct(product_metadata_hash(), PRODUCT_PRICE, {"from": seller})),
+        ("Store.addProduct", store.addProduct(product_metadata_hash(), PRODUCT_PRICE, 10, 0, {"from": seller})),
+    ]:
+        rows.append([name, add_tx.gas_used, len(bytes.fromhex(add_tx.input[2:]))])
+
+    add_tx = market.addProducts([product_metadata_hash()] * 50, [PRODUCT_PRICE] * 50, {"from": seller})
+    rows.append(["Market.addProducts (per item, 50)", add_tx.gas_used // 50, len(bytes.fromhex(add_tx.input[2:])) // 50])
+
+    print_table(["listing", "gas used", "calldata bytes"], rows)
+
+
+def benchmark_state_transitions():
+    """
+    Gas used by each state transition of the products, orders and auctions lifecycles,
+    run it on the commits before the packed structs to get the unpacked layout numbers
+    """
+    seller = get_account(1)
+    buyer = get_account(2)
+    bidder = get_account(3)
+
+    _, market, _, auction_market = deploy()
+    store = deploy_store(seller)
+
+    gas = []
+
+    def record(name, tx):
+        gas.append([name, tx.gas_used])
+
+    # market product: listed -> purchased -> sent -> sold, and purchase cancellation/removal
+    record("Market.addProduct", market.addProduct(product_metadata_hash(), PRODUCT_PRICE, {"from": seller}))
+    market.addProduct(product_metadata_hash(), PRODUCT_PRICE, {"from": seller})
+    record("Market.changePrice", market.changePrice(0, PRODUCT_PRICE * 2, {"from": seller}))
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE * 2)
+    record("Market.purchase", market.purchase(0, {"from": buyer, "value": price_in_eth}))
+    record("Market.sendProduct", market.sendProduct(0, {"from": seller}))
+    record("Market.confirmRecieved", market.confirmRecieved(0, {"from": buyer}))
+    record("Market.withdraw", market.withdraw({"from": seller}))
+    market.purchase(1, {"from": buyer, "value": market.quoteUSDToETH(PRODUCT_PRICE)})
+    record("Market.cancelPurchase", market.cancelPurchase(1, {"from": buyer}))
+    record("Market.remove", market.remove(1, {"from": seller}))
+
+    # store product and orders: listed -> ordered -> filled -> confirmed -> reviewed, and cancellation/removal
+    record("Store.addProduct", store.addProduct(product_metadata_hash(), PRODUCT_PRICE, 10, 0, {"from": seller}))
+    store.addProduct(product_metadata_hash(), PRODUCT_PRICE, 10, 0, {"from": seller})
+    record("Store.changePrices", store.changePrices([0], [PRODUCT_PRICE * 2], {"from": seller}))
+    order_price = store.quoteUSDToETH(PRODUCT_PRICE * 2) * 2
+    record("Store.createBuyOrder", store.createBuyOrder(0, 2, {"from": buyer, "value": order_price}))
+    record("Store.fillOrder", store.fillOrder(0, {"from": seller}))
+    record("Store.confirmRecieved", store.confirmRecieved(0, {"from": buyer}))
+    record("Store.withdraw", store.withdraw({"from": seller}))
+    record("Store.leaveReview", store.leaveReview(0, "5", "good product", {"from": buyer}))
+    store.createBuyOrder(1, 1, {"from": buyer, "value": store.quoteUSDToETH(PRODUCT_PRICE)})
+    record("Store.cancelOrder", store.cancelOrder(1, {"from": buyer}))
+    record("Store.removeProduct", store.removeProduct(1, {"from": seller}))
+
+    # auction: started -> first bid -> outbid -> withdrawn -> ended
+    duration = 3600
+    record("AuctionMarket.startAuction", auction_market.startAuction("ipfs://benchmark-auction", PRODUCT_PRICE, duration, {"from": seller}))
+    start_bid = auction_market.quoteUSDToETH(PRODUCT_PRICE)
+    record("AuctionMarket.bid (first)", auction_market.bid(0, {"from": buyer, "value": start_bid + 1}))
+    record("AuctionMarket.bid (outbid)", auction_market.bid(0, {"from": bidder, "value": start_bid + 2}))
+    record("AuctionMarket.bid (raise)", auction_market.bid(0, {"from": buyer, "value": 2}))
+    record("AuctionMarket.withdrawBid", auction_market.withdrawBid(0, {"from": bidder}))
+    chain.sleep(duration + 1)
+    chain.mine()
+    record("AuctionMarket.endAuction", auction_market.endAuction(0, {"from": seller}))
+
+    print_table(["transition", "gas used"], gas)
+
+
+def settle_market_sales(market, seller, buyers, size, withdraw):
+    """
+    List, sell, send and confirm `size` products of one seller, the seller withdraws
+    after "each" sale, "once" at the end or never (None) leaving the earnings credited
+    @return the settlement gas (confirmations and seller withdrawals)
+    """
+    first_id = market.getProductsCount()
+    for i in range(0, size, 50):
+        count = min(50, size - i)
+        market.addProducts([product_metadata_hash()] * count, [PRODUCT_PRICE] * count, {"from": seller, "silent": True})
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
+
+    gas = 0
+    for i in range(first_id, first_id + size):
+        buyer = buyers[i % len(buyers)]
+        market.purchase(i, {"from": buyer, "value": price_in_eth, "silent": True})
+        market.sendProduct(i, {"from": seller, "silent": True})
+        gas += market.confirmRecieved(i, {"from": buyer, "silent": True}).gas_used
+        if withdraw == "each":
+            gas += market.withdraw({"from": seller, "silent": True}).gas_used
+    if withdraw == "once":
+        gas += market.withdraw({"from": seller, "silent": True}).gas_used
+    return gas
+
+
+def settle_store_orders(store, owner, buyers, size, withdraw):
+    """Same as settle_market_sales for the orders of one store"""
+    add_tx = store.addProduct(product_metadata_hash(), PRODUCT_PRICE, 10**9, 0, {"from": owner, "silent": True})
+    product_id = add_tx.events["ProductAdded"]["productId"]
+    price_in_eth = store.quoteUSDToETH(PRODUCT_PRICE)
+
+    gas = 0
+    for i in range(size):
+        buyer = buyers[i % len(buyers)]
+        order_tx = store.createBuyOrder(product_id, 1, {"from": buyer, "value": price_in_eth, "silent": True})
+        order_id = order_tx.events["OrderCreated"]["orderId"]
+        store.fillOrder(order_id, {"from": owner, "silent": True})
+        gas += store.confirmRecieved(order_id, {"from": buyer, "silent": True}).gas_used
+        if withdraw == "each":
+            gas += store.withdraw({"from": owner, "silent": True}).gas_used
+    if withdraw == "once":
+        gas += store.withdraw({"from": owner, "silent": True}).gas_used
+    return gas
+
+
+def benchmark_settlement():
+    """
+    Settlement gas of a high-volume day where one seller settles hundreds of sales:
+    earnings withdrawn once at the end of the day against a withdrawal after each
+    sale (about the cost of the former push payments), then the claim of the day
+    earnings from several contracts one by one or in a single transaction
+    """
+    seller = get_account(1)
+    buyers = [get_account(i) for i in range(2, 6)]
+
+    rows = []
+    for size in SETTLEMENT_SIZES:
+        _, market = deploy_market()
+        store = deploy_store(seller)
+        market_each = settle_market_sales(market, seller, buyers, size, "each")
+        market_once = settle_market_sales(market, seller, buyers, size, "once")
+        store_each = settle_store_orders(store, seller, buyers, size, "each")
+        store_once = settle_store_orders(store, seller, buyers, size, "once")
+
+        rows.append(
+            [
+                size,
+                market_each,
+                market_once,
+                f"{100 * (1 - market_once / market_each):.1f}%",
+                store_each,
+                store_once,
+                f"{100 * (1 - store_once / store_each):.1f}%",
+            ]
+        )
+
+    print_table(
+        [
+            "sales",
+            "market paid per sale",
+            "market paid once",
+            "saved",
+            "store paid per sale",
+            "store paid once",
+            "saved",
+        ],
+        rows,
+    )
+    print()
+
+    _, market = deploy_market()
+    administration = get_contract(Administration, market.factory())
+    stores = [deploy_store(seller) for _ in range(3)]
+    contracts = [market] + stores
+
+    def credit_day_earnings():
+        settle_market_sales(market, seller, buyers, 5, None)
+        for store in stores:
+            settle_store_orders(store, seller, buyers, 5, None)
+
+    credit_day_earnings()
+    separate_gas = sum(contract.withdraw({"from": seller, "silent": True}).gas_used for contract in contracts)
+    credit_day_earnings()
+    claim_tx = administration.claimPayments(seller, contracts, {"from": seller, "silent": True})
+
+    print_table(
+        ["claim from %d contracts" % len(contracts), "gas used"],
+        [["one withdraw per contract", separate_gas], ["claimPayments", claim_tx.gas_used]],
+    )
+
+
+def benchmark_compaction():
+    """
+    Response size and view gas of the Market and Store catalogs before and after removing
+    half of the products, removed products are swapped and popped out of the views (the
+    previous views returned them as zeroed entries, so as many as the full catalog)
+    """
+    _, market = deploy_market()
+    owner = get_account(1)
+    store = deploy_store(owner)
+
+    catalogs = [
+        (
+            "Market",
+            market,
+            lambda count: (market.addProducts, [product_metadata_hash()] * count, [PRODUCT_PRICE] * count),
+            market.getAllProducts,
+            market.getProducts,
+        ),
+        (
+            "Store",
+            store,
+            lambda count: (
+                store.addProducts,
+                [product_metadata_hash()] * count,
+                [PRODUCT_PRICE] * count,
+                [1] * count,
+                [0] * count,
+            ),
+            store.listStoreProducts,
+            store.getStoreProducts,
+        ),
+    ]
+
+    rows = []
+    for name, contract, add_batch, dump, paginated in catalogs:
+        with TxPipeline(owner) as pipeline:
+            for i in range(0, COMPACTION_CATALOG, 50):
+                pipeline.send(*add_batch(min(50, COMPACTION_CATALOG - i)))
+
+        def measure(label, remove_gas):
+            try:
+                _, dump_bytes = measure_call(dump)
+                dump_gas = dump.estimate_gas()
+            except Exception:
+                # the full dump ends up exceeding the node call gas limit
+                dump_bytes, dump_gas = "failed", "failed"
+            calls, pages_gas, _, pages_bytes, items = walk_pages(paginated)
+            rows.append([name, label, len(items), dump_bytes, dump_gas, calls, pages_gas, pages_bytes, remove_gas])
+
+        measure("full catalog", "")
+        removed = list(range(1, COMPACTION_CATALOG, 2))
+        remove_gas = 0
+        for i in range(0, len(removed), 50):
+            remove_gas += contract.removeProducts(removed[i : i + 50], {"from": owner, "silent": True}).gas_used
+        measure("50% removed", remove_gas // len(removed))
+
+    print_table(
+        [
+            "%d products" % COMPACTION_CATALOG,
+            "catalog",
+            "items",
+            "dump bytes",
+            "dump gas",
+            "pages",
+            "pages gas",
+            "pages bytes",
+            "gas per removal",
+        ],
+        rows,
+    )
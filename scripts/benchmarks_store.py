@@ -0,0 +1,274 @@
+import time
+from brownie import Store
+from scripts.helper_scripts import (
+    get_account,
+    get_all_pages,
+    get_contract,
+    get_stores_summaries,
+    toWei,
+    TxPipeline,
+)
+from scripts.benchmarks_common import (
+    PRODUCT_PRICE,
+    PAGE_SIZE,
+    product_metadata_hash,
+    deploy_store_factory,
+    deploy_store,
+    measure_call,
+    walk_pages,
+    RPCCounter,
+    print_table,
+    format_ms,
+)
+
+"""
+    StoreFactory directory and Store order book benchmarks:
+        brownie run scripts/benchmarks_store.py <benchmark function> --network=development
+"""
+
+STORE_DIRECTORY_SIZES = [10, 100, 1000]
+
+STORE_INDEX_SIZES = [100, 1000, 10000]
+STORE_OWNERS = 10
+
+# orders of a store, of which ORDER_BOOK_OPEN are pending and as many are sent
+ORDER_BOOK_SIZES = [1000, 10000]
+ORDER_BOOK_OPEN = 100
+ORDER_BOOK_PRICE = toWei(1)
+
+
+def load_store_directory(store_factory, buyer):
+    """
+    Store directory load path without the lens: every store metadata, then every
+    order of the buyer and the product of each order, one call each
+    """
+    directory = []
+    for store_address, owner in store_factory.getAllStores():
+        store = get_contract(Store, store_address)
+        orders = get_all_pages(store.getOrdersByBuyer, buyer)
+        directory.append(
+            {
+                "storeAddress": store_address,
+                "owner": owner,
+                "storeMetaData": store.storeMetaData(),
+                "productsCount": store.productIds(),
+                "ordersCount": store.orderIds(),
+                "activeProductsCount": store.activeProductsCount(),
+                "openOrdersCount": store.openOrdersCount(),
+                "buyerOrders": orders,
+                "buyerOrdersMetadata": [store.storeProducts(order[1])[6] for order in orders],
+            }
+        )
+    return directory
+
+
+def benchmark_store_directory():
+    """
+    RPC round trips and wall time to load the store directory (metadata, counts and
+    the orders of a buyer) with one call per store/order against the StoreFactory lens
+    """
+    owner = get_account(1)
+    buyer = get_account(2)
+    store_factory = deploy_store_factory()
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+
+    rows = []
+    for size in STORE_DIRECTORY_SIZES:
+        for i in range(store_factory.getStoresCount(), size):
+            create_tx = store_factory.createStore(
+                "ipfs://benchmark-store-%d" % i, {"from": owner, "value": create_store_fee, "silent": True}
+            )
+            # one store out of ten has a product ordered by the buyer
+            if i % 10 == 0:
+                store = get_contract(Store, create_tx.events["StoreCreated"]["storeAddress"])
+                store.addProduct(product_metadata_hash(), PRODUCT_PRICE, 10, 0, {"from": owner, "silent": True})
+                store.createBuyOrder(
+                    0, 1, {"from": buyer, "value": store.quoteUSDToETH(PRODUCT_PRICE), "silent": True}
+                )
+
+        with RPCCounter() as counter:
+            start = time.perf_counter()
+            naive = load_store_directory(store_factory, buyer)
+            naive_time = time.perf_counter() - start
+        naive_calls = counter.total
+
+        with RPCCounter() as counter:
+            start = time.perf_counter()
+            lens = get_stores_summaries(store_factory, buyer, max_orders=20)
+            lens_time = time.perf_counter() - start
+        lens_calls = counter.total
+
+        assert [s["storeMetaData"] for s in lens] == [s["storeMetaData"] for s in naive]
+
+        rows.append([size, naive_calls, format_ms(naive_time), lens_calls, format_ms(lens_time)])
+
+    print_table(["stores", "per-store RPCs", "per-store ms", "lens RPCs", "lens ms"], rows)
+
+
+def benchmark_store_index():
+    """
+    Cost of finding the store of an owner and of listing the stores as the directory
+    grows: full getAllStores dump filtered client side against the owner index and pages
+    """
+    owners = [get_account(i) for i in range(STORE_OWNERS)]
+    tracked_owner = owners[1]
+    store_factory = deploy_store_factory()
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+
+    rows = []
+    for size in STORE_INDEX_SIZES:
+        for i in range(store_factory.getStoresCount(), size):
+            store_factory.createStore(
+                "ipfs://benchmark-store-%d" % i,
+                {
+                    "from": owners[i % STORE_OWNERS],
+                    "value": create_store_fee,
+                    "required_confs": 0,
+                    "silent": True,
+                },
+            )
+
+        try:
+            full = measure_call(store_factory.getAllStores)
+            start = time.perf_counter()
+            scanned = [s[0] for s in store_factory.getAllStores() if s[1] == tracked_owner]
+            scan_time = time.perf_counter() - start
+        except Exception:
+            # the full dump ends up exceeding the node call gas limit
+            full, scanned, scan_time = (None, None), None, None
+        lookup = measure_call(store_factory.getStoresByOwner, tracked_owner)
+        lookup_gas = store_factory.getStoresByOwner.estimate_gas(tracked_owner)
+        first_page = measure_call(store_factory.getStores, 0, PAGE_SIZE)
+        last_page = measure_call(store_factory.getStores, max(size - PAGE_SIZE, 0), PAGE_SIZE)
+
+        if scanned is not None:
+            assert list(store_factory.getStoresByOwner(tracked_owner)) == scanned
+
+        rows.append(
+            [
+                size,
+                format_ms(full[0]),
+                full[1] if full[1] is not None else "failed",
+                format_ms(scan_time),
+                format_ms(lookup[0]),
+                lookup_gas,
+                format_ms(first_page[0]),
+                first_page[1],
+                format_ms(last_page[0]),
+                last_page[1],
+            ]
+        )
+
+    print_table(
+        [
+            "stores",
+            "getAll ms",
+            "getAll bytes",
+            "getAll+filter ms",
+            "byOwner ms",
+            "byOwner gas",
+            "page[0] ms",
+            "page[0] bytes",
+            "page[last] ms",
+            "page[last] bytes",
+        ],
+        rows,
+    )
+
+
+def fill_order_book(store, owner, buyer, size):
+    """
+    Create orders of the first product of `store` until it has `size` of them, all
+    completed except the ORDER_BOOK_OPEN newest sent ones and the ORDER_BOOK_OPEN
+    newest pending ones
+    """
+    price_in_eth = store.quoteUSDToETH(ORDER_BOOK_PRICE)
+    with TxPipeline(buyer) as pipeline:
+        for i in range(store.orderIds(), size, 50):
+            count = min(50, size - i)
+            pipeline.send(store.createBuyOrders, [0] * count, [1] * count, value=price_in_eth * count)
+
+    with TxPipeline(owner) as pipeline:
+        to_fill = store.getOrderQueueLength(0) - ORDER_BOOK_OPEN
+        for i in range(0, to_fill, 100):
+            pipeline.send(store.fillNextOrders, min(100, to_fill - i))
+
+    sent = get_all_pages(store.getOrderQueue, 1)
+    with TxPipeline(buyer) as pipeline:
+        for order in sent[: len(sent) - ORDER_BOOK_OPEN]:
+            pipeline.send(store.confirmRecieved, order[0])
+
+
+def benchmark_order_book():
+    """
+    Owner dashboard load (pending and sent orders) of a store with thousands of settled
+    orders: full listStoreOrders dump filtered by the client, getOrdersByStatus scan and
+    the per status order queues, then the gas of filling orders as the book grows
+    """
+    owner = get_account(1)
+    buyer = get_account(2)
+    store = deploy_store(owner)
+    store.addProduct(product_metadata_hash(), ORDER_BOOK_PRICE, 10**9, 0, {"from": owner, "silent": True})
+
+    def dump():
+        latency, length = measure_call(store.listStoreOrders)
+        return 1, store.listStoreOrders.estimate_gas(), latency, length
+
+    def walk(view):
+        walks = [walk_pages(view, status) for status in [0, 1]]
+        open_orders = sum(len(w[4]) for w in walks)
+        assert open_orders == 2 * ORDER_BOOK_OPEN, "%d open orders returned" % open_orders
+        return tuple(sum(w[i] for w in walks) for i in range(4))
+
+    dashboard = []
+    fills = []
+    for size in ORDER_BOOK_SIZES:
+        fill_order_book(store, owner, buyer, size)
+
+        for label, load in [
+            ("listStoreOrders", dump),
+            ("getOrdersByStatus", lambda: walk(store.getOrdersByStatus)),
+            ("getOrderQueue", lambda: walk(store.getOrderQueue)),
+        ]:
+            try:
+                calls, gas, latency, length = load()
+                dashboard.append([size, label, calls, gas, format_ms(latency), length])
+            except Exception:
+                # full scans end up exceeding the node call gas limit
+                dashboard.append([size, label, "failed", "failed", "failed", "failed"])
+
+        oldest_pending = store.getOrderQueue(0, 0, 1)[0][0][0]
+        for label, fill in [
+            ("fillOrder (oldest pending)", lambda: store.fillOrder(oldest_pending, {"from": owner, "silent": True})),
+            ("fillNextOrders(1)", lambda: store.fillNextOrders(1, {"from": owner, "silent": True})),
+            ("fillNextOrders(10)", lambda: store.fillNextOrders(10, {"from": owner, "silent": True})),
+        ]:
+            fills.append([size, label, fill().gas_used])
+
+    print_table(["orders", "owner dashboard", "calls", "gas", "ms", "bytes"], dashboard)
+    print_table(["orders", "fill", "gas used"], fills)
+
+
+def benchmark_store_creation():
+    """
+    Gas of a store creation with clones against the deployment of the full Store
+    bytecode that createStore used to pay for every merchant
+    """
+    owner = get_account(1)
+    store_factory = deploy_store_factory()
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+
+    full_tx = Store.deploy({"from": owner, "silent": True}).tx
+    clone_tx = store_factory.createStore("benchmark store", {"from": owner, "value": create_store_fee})
+    create2_tx = store_factory.createStoreDeterministic(
+        "benchmark store", "0x" + "00" * 32, {"from": owner, "value": create_store_fee}
+    )
+
+    print_table(
+        ["store creation", "gas used"],
+        [
+            ["Store bytecode deployment", full_tx.gas_used],
+            ["createStore (clone)", clone_tx.gas_used],
+            ["createStoreDeterministic (CREATE2 clone)", create2_tx.gas_used],
+        ],
+    )
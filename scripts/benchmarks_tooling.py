@@ -0,0 +1,361 @@
+import json, os, shutil, subprocess, sys, tempfile, time
+from brownie import Store
+from scripts.helper_scripts import (
+    get_account,
+    contract_from_abi,
+    ContractCache,
+    TxPipeline,
+)
+from scripts.benchmarks_common import (
+    PRODUCT_PRICE,
+    product_metadata_hash,
+    print_table,
+    format_ms,
+)
+from scripts.deploy import deploy
+from scripts.registry import registries_from_build, dump_registry
+from scripts.reset import clean_deployments, clean_stale_artifacts, reset_folder
+from scripts.update_front_end import (
+    folder_size,
+    front_end_artifacts,
+    sync_artifacts,
+)
+
+"""
+    Benchmarks of the python tooling (deployment, transactions sending, build folder
+    cleanup, front end artifacts, contract handles and scripts startup):
+        brownie run scripts/benchmarks_tooling.py <benchmark function> --network=development
+"""
+
+FRONT_END_DEPLOYMENTS = 300
+
+RESET_DEPLOYMENTS = 5000
+
+PIPELINE_OPERATIONS = 1000
+PIPELINE_DEPTHS = [8, 64]
+
+CONTRACT_HANDLES = 10000
+
+# modules imported by the scripts only needing constants, artifacts or the registry
+STARTUP_MODULES = ["scripts.helper_scripts", "scripts.registry", "scripts.update_front_end", "scripts.reset"]
+STARTUP_RUNS = 3
+
+
+def benchmark_deploy():
+    """
+    End to end time and transactions sent by scripts/deploy.py on a cold manifest, a warm
+    manifest (everything already deployed) and after a failure that left the market
+    contracts undeployed
+    """
+    admin = get_account()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest_path = os.path.join(tmp, "manifest.json")
+
+        def measure(label):
+            nonce = admin.nonce
+            start = time.perf_counter()
+            deploy(manifest_path)
+            rows.append([label, format_ms(time.perf_counter() - start), admin.nonce - nonce])
+
+        measure("cold")
+        measure("warm")
+
+        # simulate a run interrupted right after the Administration deployment
+        with open(manifest_path, "r") as manifest_file:
+            manifest = json.load(manifest_file)
+        for entries in manifest.values():
+            for name in ["Market", "StoreFactory", "AuctionMarket"]:
+                entries.pop(name)
+        with open(manifest_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+        measure("resumed")
+
+    print_table(["deploy", "ms", "transactions"], rows)
+
+
+class SerialSender:
+    """Serial path used by the scripts before TxPipeline: send a transaction and wait for it"""
+
+    def __init__(self, account):
+        self.account = account
+
+    def send(self, fn, *args, value=0):
+        tx = fn(*args, {"from": self.account, "value": value, "silent": True})
+        tx.wait(1)
+        return tx
+
+    def flush(self):
+        return []
+
+
+def benchmark_tx_pipeline():
+    """
+    Throughput of listings, purchases and bids sent one by one (waiting for each
+    transaction) against the TxPipeline with several in-flight depths
+    """
+    seller = get_account(1)
+    buyer = get_account(2)
+    bidder = get_account(3)
+    _, market, _, auction_market = deploy()
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
+
+    senders = [("serial", SerialSender)] + [
+        ("pipeline depth %d" % depth, lambda account, depth=depth: TxPipeline(account, depth=depth))
+        for depth in PIPELINE_DEPTHS
+    ]
+
+    rows = []
+    for label, make_sender in senders:
+        first_product = market.getProductsCount()
+        auction_market.startAuction("benchmark auction", PRODUCT_PRICE, 3600 * 24, {"from": seller, "silent": True})
+        auction_id = auction_market.getAuctionsCount() - 1
+        min_bid = auction_market.quoteUSDToETH(PRODUCT_PRICE)
+
+        operations = [
+            (seller, lambda sender, i: sender.send(market.addProduct, product_metadata_hash(), PRODUCT_PRICE)),
+            (buyer, lambda sender, i: sender.send(market.purchase, first_product + i, value=price_in_eth)),
+            # the bidder raises their own bid, each bid only sends the difference
+            (bidder, lambda sender, i: sender.send(auction_market.bid, auction_id, value=min_bid + 1 if i == 0 else 1)),
+        ]
+        row = [label]
+        for account, operation in operations:
+            sender = make_sender(account)
+            start = time.perf_counter()
+            for i in range(PIPELINE_OPERATIONS):
+                operation(sender, i)
+            sender.flush()
+            elapsed = time.perf_counter() - start
+            row += [format_ms(elapsed), round(PIPELINE_OPERATIONS / elapsed, 1)]
+        rows.append(row)
+
+    print_table(
+        [
+            "%d operations" % PIPELINE_OPERATIONS,
+            "listings ms",
+            "listings tx/s",
+            "purchases ms",
+            "purchases tx/s",
+            "bids ms",
+            "bids tx/s",
+        ],
+        rows,
+    )
+
+
+def _legacy_reset(folder):
+    # reset.py before the selective clean: serial deletion of every entry of the folder
+    for filename in os.listdir(folder):
+        file_path = os.path.join(folder, filename)
+        if os.path.isfile(file_path) or os.path.islink(file_path):
+            os.unlink(file_path)
+        elif os.path.isdir(file_path):
+            shutil.rmtree(file_path)
+
+
+def _fake_build_folder(build_folder, deployments):
+    """Copy the compiled contracts and add `deployments` deployment files (with the contract ABI)"""
+    shutil.copytree("./build/contracts", os.path.join(build_folder, "contracts"))
+    chain_folder = os.path.join(build_folder, "deployments", "5777")
+    os.makedirs(chain_folder)
+    names = [f[:-5] for f in os.listdir("./build/contracts") if f.endswith(".json")]
+    abis = {}
+    for name in names:
+        with open(os.path.join("./build/contracts", name + ".json"), "r") as artifact_file:
+            abis[name] = json.load(artifact_file)["abi"]
+
+    chain_map = {}
+    for i in range(deployments):
+        name = names[i % len(names)]
+        address = "0x%040x" % (i + 1)
+        with open(os.path.join(chain_folder, address + ".json"), "w") as deployment_file:
+            json.dump({"contractName": name, "abi": abis[name], "deployment": {"address": address}}, deployment_file)
+        chain_map.setdefault(name, []).insert(0, address)
+    with open(os.path.join(build_folder, "deployments", "map.json"), "w") as map_file:
+        json.dump({"5777": chain_map}, map_file)
+
+
+# artifacts imported by the front end before the deployment registry
+LEGACY_FRONT_END_IMPORTS = ["Market", "Store", "StoreFactory", "AuctionMarket", "Administration"]
+
+
+def benchmark_registry():
+    """
+    Size of the front end artifacts, of the JSON bundled by the front end and its parse
+    time with the brownie build (full artifacts and deployments map) against the
+    registry of the network (needs the contracts compiled and deployed in ./build)
+    """
+    imported = [os.path.join("./build/contracts", name + ".json") for name in LEGACY_FRONT_END_IMPORTS]
+    imported.append("./build/deployments/map.json")
+    registries = [dump_registry(registry) for registry in registries_from_build("./build")]
+
+    def parse_legacy():
+        for path in imported:
+            with open(path, "r") as artifact_file:
+                json.load(artifact_file)
+
+    def parse_registry():
+        for content in registries:
+            json.loads(content)
+
+    rows = []
+    for label, artifacts_size, bundled, parse in [
+        ("build copy", folder_size("./build")[1], sum(os.path.getsize(p) for p in imported), parse_legacy),
+        ("registry", sum(len(c) for c in registries), max(len(c) for c in registries), parse_registry),
+    ]:
+        start = time.perf_counter()
+        parse()
+        rows.append([label, artifacts_size, bundled, format_ms(time.perf_counter() - start)])
+
+    print_table(["front end artifacts", "artifacts bytes", "bundled JSON bytes", "parse ms"], rows)
+
+
+def benchmark_reset():
+    """
+    Time to clean a build folder with thousands of deployments: the previous serial
+    reset, the concurrent reset, keeping the latest deployment of each contract and
+    the compiled artifacts clean (only stale ones are removed, so no recompilation)
+    """
+    cases = [
+        ("serial reset (deployments)", lambda build: _legacy_reset(os.path.join(build, "deployments"))),
+        ("concurrent reset (deployments)", lambda build: reset_folder(os.path.join(build, "deployments"))),
+        ("keep latest deployment per contract", lambda build: clean_deployments(5777, 1, build)),
+        ("serial reset (contracts)", lambda build: _legacy_reset(os.path.join(build, "contracts"))),
+        ("stale artifacts clean (contracts)", lambda build: clean_stale_artifacts(build)),
+    ]
+
+    rows = []
+    for label, clean in cases:
+        with tempfile.TemporaryDirectory() as tmp:
+            build_folder = os.path.join(tmp, "build")
+            _fake_build_folder(build_folder, RESET_DEPLOYMENTS)
+            before = folder_size(build_folder)[0]
+            start = time.perf_counter()
+            clean(build_folder)
+            elapsed = time.perf_counter() - start
+            rows.append([label, format_ms(elapsed), before - folder_size(build_folder)[0]])
+
+    print_table(["%d deployments" % RESET_DEPLOYMENTS, "ms", "files removed"], rows)
+
+
+def _fake_deployments(build_folder, count):
+    """
+    Add `count` deployments of the compiled contracts to a build folder, written like
+    brownie does: one JSON per deployment and the addresses in map.json (newest first)
+    """
+    contracts_folder = os.path.join(build_folder, "contracts")
+    deployments_folder = os.path.join(build_folder, "deployments", "5777")
+    os.makedirs(deployments_folder, exist_ok=True)
+    map_path = os.path.join(build_folder, "deployments", "map.json")
+    deployments_map = {}
+    if os.path.exists(map_path):
+        with open(map_path, "r") as map_file:
+            deployments_map = json.load(map_file)
+    chain_map = deployments_map.setdefault("5777", {})
+
+    names = [f[:-5] for f in os.listdir(contracts_folder) if f.endswith(".json")]
+    start = sum(len(addresses) for addresses in chain_map.values())
+    for i in range(start, start + count):
+        name = names[i % len(names)]
+        address = "0x%040x" % (i + 1)
+        shutil.copyfile(
+            os.path.join(contracts_folder, name + ".json"),
+            os.path.join(deployments_folder, address + ".json"),
+        )
+        chain_map.setdefault(name, []).insert(0, address)
+
+    with open(map_path, "w") as map_file:
+        json.dump(deployments_map, map_file)
+
+
+def benchmark_front_end_sync():
+    """
+    Time and artifacts size of the front end update with the full copy of the build
+    folder against the hash based sync, for a build folder with hundreds of deployments
+    (needs the contracts compiled in ./build)
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        build_folder = os.path.join(tmp, "build")
+        shutil.copytree("./build/contracts", os.path.join(build_folder, "contracts"))
+        _fake_deployments(build_folder, FRONT_END_DEPLOYMENTS)
+        full_folder = os.path.join(tmp, "full")
+        sync_folder = os.path.join(tmp, "sync")
+
+        rows = []
+
+        def measure(label, update, folder):
+            start = time.perf_counter()
+            changed = update()
+            elapsed = time.perf_counter() - start
+            files, size = folder_size(folder)
+            rows.append([label, format_ms(elapsed), changed, files, size])
+
+        def sync():
+            written, removed = sync_artifacts(front_end_artifacts(build_folder), sync_folder)
+            return len(written) + len(removed)
+
+        def full_copy():
+            # the previous update replaced the artifacts with a copy of the whole build folder
+            if os.path.exists(full_folder):
+                shutil.rmtree(full_folder)
+            shutil.copytree(build_folder, full_folder)
+            return folder_size(full_folder)[0]
+
+        measure("full copy", full_copy, full_folder)
+        measure("sync (empty artifacts)", sync, sync_folder)
+        measure("full copy (no change)", full_copy, full_folder)
+        measure("sync (no change)", sync, sync_folder)
+        _fake_deployments(build_folder, 1)
+        measure("full copy (one deployment)", full_copy, full_folder)
+        measure("sync (one deployment)", sync, sync_folder)
+
+    print_table(["%d deployments" % FRONT_END_DEPLOYMENTS, "ms", "files written", "files", "bytes"], rows)
+
+
+def benchmark_contract_handles():
+    """
+    Time to get the Store handles of 10k store addresses with a new handle per call
+    (previous get_contract) and from the contract cache when the same stores are walked again
+    """
+    addresses = ["0x%040x" % (i + 1) for i in range(CONTRACT_HANDLES)]
+    cache = ContractCache(maxsize=CONTRACT_HANDLES)
+    for address in addresses:
+        cache.get(Store, address)
+
+    rows = []
+    for label, get in [
+        ("new handle per call", lambda container, address: contract_from_abi(container._name, address, container.abi)),
+        ("cache (stores walked again)", cache.get),
+    ]:
+        start = time.perf_counter()
+        for address in addresses:
+            get(Store, address)
+        elapsed = time.perf_counter() - start
+        rows.append([label, format_ms(elapsed), "%.1f" % (elapsed * 10**6 / CONTRACT_HANDLES)])
+
+    print_table(["%d store handles" % CONTRACT_HANDLES, "ms", "us per handle"], rows)
+
+
+def _import_time(statement):
+    """@return the best wall time of `statement` run by a new interpreter from the project folder"""
+    times = []
+    for _ in range(STARTUP_RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", statement], check=True, cwd=".")
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def benchmark_script_startup():
+    """
+    Startup time of the modules used by the scripts that don't need a network, with
+    brownie and web3 imported upfront (like helper_scripts did) and with the lazy imports
+    """
+    rows = []
+    for module in STARTUP_MODULES:
+        eager = _import_time("import brownie, web3.main, web3.exceptions, %s" % module)
+        lazy = _import_time("import %s" % module)
+        rows.append([module, format_ms(eager), format_ms(lazy)])
+
+    print_table(["module", "eager imports ms", "lazy imports ms"], rows)
@@ -0,0 +1,134 @@
+import csv, json, os
+from brownie import Market, Store, web3
+from scripts.helper_scripts import get_account, get_contract, toWei, split_to_fit, TxPipeline, TxPipelineError
+from scripts.metadata import LocalIPFS, pin_product_metadata
+
+"""
+    Import a products catalog into the Market or into a Store using batched listings:
+        brownie run scripts/bulk_import.py main <catalog.csv|catalog.jsonl> [store address] --network=ganache-local
+
+    Each catalog entry has a name, description, image and price (in $),
+    store products can also set a quantity and a type (FIXED or UNLIMITED).
+    The name, description and image are pinned as the product metadata JSON
+    and only its hash is listed on-chain
+"""
+
+# share of the block gas limit that a single batch is allowed to use
+BLOCK_GAS_SHARE = 0.8
+
+SSTORE_GAS = 22100
+CALLDATA_BYTE_GAS = 16
+BATCH_BASE_GAS = 60000
+
+# storage slots written for each listing (packed structs)
+MARKET_LISTING_SLOTS = 4
+STORE_LISTING_SLOTS = 2
+
+PRODUCT_TYPE = {"FIXED": 0, "UNLIMITED": 1}
+
+
+def load_catalog(path, ipfs=None):
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="") as catalog:
+        if extension == ".jsonl":
+            rows = [json.loads(line) for line in catalog if line.strip()]
+        elif extension == ".csv":
+            rows = list(csv.DictReader(catalog))
+        else:
+            raise ValueError("Unsupported catalog format %s, use .csv or .jsonl" % extension)
+    ipfs = ipfs or LocalIPFS()
+    return [parse_item(row, ipfs) for row in rows]
+
+
+def parse_item(row, ipfs):
+    return {
+        "name": row["name"],
+        "metadata_hash": pin_product_metadata(
+            row["name"], row.get("description") or "", row.get("image") or "", ipfs
+        ),
+        "price": toWei(row["price"]),
+        "quantity": int(row.get("quantity") or 1),
+        "type": PRODUCT_TYPE[str(row.get("type") or "FIXED").upper()],
+    }
+
+
+def estimate_listing_gas(listing_slots):
+    # metadata hash + price (+ quantity + type) abi encoded words
+    calldata_bytes = 32 * 4
+    return listing_slots * SSTORE_GAS + calldata_bytes * CALLDATA_BYTE_GAS
+
+
+def chunk_catalog(items, gas_budget, listing_slots=MARKET_LISTING_SLOTS):
+    """Greedily split the catalog into batches whose estimated gas fits in the budget"""
+    item_gas = estimate_listing_gas(listing_slots)
+    chunks = []
+    chunk = []
+    chunk_gas = BATCH_BASE_GAS
+    for item in items:
+        if chunk and chunk_gas + item_gas > gas_budget:
+            chunks.append(chunk)
+            chunk = []
+            chunk_gas = BATCH_BASE_GAS
+        chunk.append(item)
+        chunk_gas += item_gas
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+def batch_args(chunk, is_store):
+    args = [
+        [item["metadata_hash"] for item in chunk],
+        [item["price"] for item in chunk],
+    ]
+    if is_store:
+        args.append([item["quantity"] for item in chunk])
+        args.append([item["type"] for item in chunk])
+    return args
+
+
+def send_batch(contract, chunk, pipeline, gas_budget, is_store):
+    """
+    Send the addProducts transactions of a chunk through the pipeline, split to fit the gas budget
+    @return the list of sent transactions
+    """
+    parts = split_to_fit(
+        chunk,
+        lambda part: contract.addProducts.estimate_gas(*batch_args(part, is_store), {"from": pipeline.account}),
+        gas_budget,
+    )
+    return [pipeline.send(contract.addProducts, *batch_args(part, is_store)) for part in parts]
+
+
+def import_catalog(contract, items, account, is_store=False):
+    gas_budget = int(web3.eth.get_block("latest").gasLimit * BLOCK_GAS_SHARE)
+    listing_slots = STORE_LISTING_SLOTS if is_store else MARKET_LISTING_SLOTS
+
+    # batches don't depend on each other, they are sent without waiting for the previous one
+    pipeline = TxPipeline(account)
+    for chunk in chunk_catalog(items, gas_budget, listing_slots):
+        send_batch(contract, chunk, pipeline, gas_budget, is_store)
+    try:
+        txs = pipeline.flush()
+    except TxPipelineError as error:
+        print(
+            "%d of the import transactions reverted, the catalog is only partially imported"
+            % len(error.failed)
+        )
+        raise
+
+    print(
+        "imported %d products in %d transactions (%d gas)"
+        % (len(items), len(txs), sum(tx.gas_used for tx in txs))
+    )
+    return txs
+
+
+def main(catalog_path, store_address=None):
+    account = get_account()
+    items = load_catalog(catalog_path)
+
+    if store_address is not None:
+        import_catalog(get_contract(Store, store_address), items, account, is_store=True)
+    else:
+        import_catalog(Market[-1], items, account)
@@ -1,28 +1,223 @@
-from brownie import Market, StoreFactory, AuctionMarket, Administration, network
-from scripts.helper_scripts import get_account, LOCAL_BLOCKCHAINS, deploy_mock
+import hashlib, json, os
+from brownie import Market, StoreFactory, Store, AuctionMarket, Administration, MockV3Aggregator, config, network, web3
+from scripts.helper_scripts import (
+    get_account,
+    LOCAL_BLOCKCHAINS,
+    MOCK_DECIMALS,
+    MOCK_INIT_VAL,
+    TxPipeline,
+    TxPipelineError,
+)
+from scripts.registry import REGISTRY_FOLDER, build_registry, write_registry
 
-def deploy():
+"""
+    Deploy the marketplace to the testnet/local-network:
+        brownie run scripts/deploy.py --network=ganache-local
+
+    Every deployment is recorded in a manifest (build/deployments/manifest.json) by chain,
+    a contract already deployed with the same bytecode and constructor arguments is reused
+    so a deployment interrupted by a failure resumes where it stopped. Independent
+    transactions are sent with consecutive nonces before waiting for them together.
+    The active contracts are then written to the network registry (build/registry).
+    Only the script run uses the manifest and the registry, tests and benchmarks calling
+    deploy() always get a fresh deployment.
+"""
+
+DEPLOY_MANIFEST = "./build/deployments/manifest.json"
+
+# brownie starts a new development chain on every run, nothing can be reused there
+NON_PERSISTENT_NETWORKS = ["development"]
+
+# time given to a transaction sent by an interrupted run to be mined
+PENDING_TX_TIMEOUT = 120
+
+
+class DeploymentManifest:
+    """Contracts deployed by this script on each chain, saved after every change"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.deployments = {}
+        if path and os.path.exists(path):
+            with open(path, "r") as manifest_file:
+                self.deployments = json.load(manifest_file)
+
+    @property
+    def entries(self):
+        return self.deployments.setdefault(str(web3.chain_id), {})
+
+    def deployed(self, name, container, args):
+        """
+        Get the contract deployed under `name` by a previous run with the same bytecode
+        and constructor arguments, a deployment still pending is waited for
+        @return the contract, None if it has to be deployed
+        """
+        entry = self.entries.get(name)
+        if entry is None or entry["key"] != deployment_key(container, args):
+            return None
+        receipt = find_receipt(entry["tx"])
+        if receipt is None or receipt["status"] != 1:
+            return None
+        if entry["address"] != receipt["contractAddress"]:
+            self.record(name, container, args, entry["tx"], receipt["contractAddress"])
+        return container.at(receipt["contractAddress"])
+
+    def record(self, name, container, args, txid, address=None):
+        self.entries[name] = {
+            "contract": container._name,
+            "key": deployment_key(container, args),
+            "tx": txid,
+            "address": address,
+        }
+        self.save()
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as manifest_file:
+            json.dump(self.deployments, manifest_file, indent=2)
+
+
+def deployment_key(container, args):
+    """@return a hash of the contract creation code and its encoded constructor arguments"""
+    return hashlib.sha256(container.deploy.encode_input(*args).encode()).hexdigest()
+
+
+def find_receipt(txid):
+    """
+    Get the receipt of a transaction sent by a previous run, waiting for it if it's still pending
+    @return the receipt, None when the node doesn't know the transaction (dropped or other chain)
+    """
+    try:
+        web3.eth.get_transaction(txid)
+    except Exception:
+        return None
+    return web3.eth.wait_for_transaction_receipt(txid, timeout=PENDING_TX_TIMEOUT)
+
+
+def deploy_contracts(manifest, account, contracts):
+    """
+    Deploy the independent (name, container, args) contracts missing from the manifest,
+    their transactions are all sent with explicit nonces then waited for together
+    @return the contracts by name
+    """
+    deployed = {}
+    missing = []
+    for name, container, args in contracts:
+        contract = manifest.deployed(name, container, args)
+        if contract is None:
+            missing.append((name, container, args))
+        else:
+            deployed[name] = contract
+
+    pipeline = TxPipeline(account)
+    pending = []
+    for name, container, args in missing:
+        tx = pipeline.send(container.deploy, *args)
+        manifest.record(name, container, args, tx.txid)
+        pending.append((name, container, args, tx))
+    try:
+        pipeline.flush()
+    except TxPipelineError:
+        # the successful deployments are still recorded before reporting the failed ones
+        pass
+
+    failed = []
+    for name, container, args, tx in pending:
+        if tx.status != 1:
+            failed.append("%s (tx %s)" % (name, tx.txid))
+            continue
+        manifest.record(name, container, args, tx.txid, tx.contract_address)
+        deployed[name] = container.at(tx.contract_address)
+    if failed:
+        raise RuntimeError("deployment failed: %s" % ", ".join(failed))
+
+    return deployed
+
+
+def wire_contracts(administration, account, market, store_factory, auction_market):
+    """
+    Register the marketplace contracts in Administration, only the addresses not set
+    yet are sent (with explicit nonces) and the transactions are waited for together,
+    a reverted setter fails the deployment
+    """
+    setters = [
+        (administration.marketContractAddress, administration.setMarketContractAddress, market),
+        (administration.storeFactoryAddress, administration.setStoreFactoryAddress, store_factory),
+        (
+            administration.auctionMarketContractAddress,
+            administration.setAuctionMarketContractAddress,
+            auction_market,
+        ),
+    ]
+
+    pipeline = TxPipeline(account)
+    for getter, setter, contract in setters:
+        if getter() != contract.address:
+            pipeline.send(setter, contract.address)
+    try:
+        pipeline.flush()
+    except TxPipelineError as error:
+        raise RuntimeError(
+            "contracts wiring failed (tx %s)" % ", ".join(tx.txid for tx in error.failed)
+        ) from error
+
+
+def write_deployment_registry(contracts, folder=REGISTRY_FOLDER):
+    """Write the registry of the current chain with the deployed contracts and the Store ABI"""
+    entries = {contract._name: (contract.address, contract.abi) for contract in contracts}
+    entries["Store"] = (None, Store.abi)
+    return write_registry(build_registry(web3.chain_id, entries), folder)
+
+
+def deploy(manifest_path=None, registry_folder=None):
+    """
+    Deploy and wire the marketplace, the contracts recorded in the manifest at `manifest_path`
+    are reused and the network registry is written to `registry_folder`, both only when given
+    @return the Administration, Market, StoreFactory and AuctionMarket contracts
+    """
     admin = get_account()
+    manifest = DeploymentManifest(manifest_path)
 
     if network.show_active() in LOCAL_BLOCKCHAINS:
-        price_feed = deploy_mock()
-
-    administration = Administration.deploy(price_feed.address, {"from": admin})
+        price_feed = deploy_contracts(
+            manifest, admin, [("MockV3Aggregator", MockV3Aggregator, (MOCK_DECIMALS, MOCK_INIT_VAL))]
+        )["MockV3Aggregator"]
+        price_feed_address = price_feed.address
+    else:
+        price_feed_address = config["networks"][network.show_active()]["eth-usd-feed"]
 
-    market = Market.deploy(administration.address, {"from": admin})
+    administration = deploy_contracts(
+        manifest, admin, [("Administration", Administration, (price_feed_address,))]
+    )["Administration"]
 
-    store_factory = StoreFactory.deploy(administration.address, {"from": admin})
+    # the market contracts only depend on Administration
+    contracts = deploy_contracts(
+        manifest,
+        admin,
+        [
+            ("Market", Market, (administration.address,)),
+            ("StoreFactory", StoreFactory, (administration.address,)),
+            ("AuctionMarket", AuctionMarket, (administration.address,)),
+        ],
+    )
+    market = contracts["Market"]
+    store_factory = contracts["StoreFactory"]
+    auction_market = contracts["AuctionMarket"]
 
-    auction_market = AuctionMarket.deploy(administration.address, {"from": admin})
+    wire_contracts(administration, admin, market, store_factory, auction_market)
 
-    set_tx = administration.setMarketContractAddress(market.address, {"from": admin})
-    set_tx.wait(1)
+    if registry_folder is not None:
+        deployed = [administration, market, store_factory, auction_market]
+        if network.show_active() in LOCAL_BLOCKCHAINS:
+            deployed.append(price_feed)
+        write_deployment_registry(deployed, registry_folder)
 
-    set_tx = administration.setStoreFactoryAddress(store_factory.address, {"from": admin})
-    set_tx.wait(1)
+    return administration, market, store_factory, auction_market
 
-    set_tx = administration.setAuctionMarketContractAddress(auction_market.address, {"from": admin})
-    set_tx.wait(1)
-    
 def main():
-    deploy()
+    if network.show_active() in NON_PERSISTENT_NETWORKS:
+        deploy()
+    else:
+        deploy(DEPLOY_MANIFEST, REGISTRY_FOLDER)
@@ -1,5 +1,8 @@
-from web3.main import Web3
-from brownie import config, network, accounts, Contract, MockV3Aggregator
+import time
+from collections import OrderedDict
+
+# brownie and web3 are imported by the functions using them, scripts only needing the
+# constants or the pagination helpers don't pay their import time
 
 
 LOCAL_BLOCKCHAINS = ["ganache-local", "development"]
@@ -8,8 +11,33 @@ FORKED_BLOCHCHAINS = ["polygon-main-fork", "polygone-mainnet-dev", "mainnet-fork
 
 ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
 
+PAGE_SIZE = 100
+# stores summaries embed strings and orders, keep their pages small enough for the call gas limit
+STORES_PAGE_SIZE = 50
+
+# transactions a TxPipeline keeps sent but not mined
+TX_PIPELINE_DEPTH = 64
+# receipts polling interval, doubled while nothing is mined
+RECEIPT_POLL_INTERVAL = 0.05
+MAX_RECEIPT_POLL_INTERVAL = 2
+# seconds the network gas price is reused by the network_gas_price strategy
+GAS_PRICE_REFRESH = 15
+
+# ETH/USD price feed mock used on local networks
+MOCK_DECIMALS = 8
+MOCK_INIT_VAL = 3000 * 10**8
+
+# contract handles kept by get_contract, the least recently used are dropped first
+CONTRACT_CACHE_SIZE = 4096
+
+# EIP-1167 minimal proxy creation code, the implementation address goes in between
+CLONE_CODE_PREFIX = bytes.fromhex("3d602d80600a3d3981f3363d3d373d3d3d363d73")
+CLONE_CODE_SUFFIX = bytes.fromhex("5af43d82803e903d91602b57fd5bf3")
+
 
 def get_account(index=None):
+    from brownie import accounts, config, network
+
     if (
         network.show_active() in LOCAL_BLOCKCHAINS
         or network.show_active() in FORKED_BLOCHCHAINS
@@ -23,28 +51,304 @@ def get_account(index=None):
 
 
 def toWei(amount):
+    from web3.main import Web3
+
     return Web3.toWei(amount, "ether")
 
 
 def fromWei(amount):
+    from web3.main import Web3
+
     return Web3.fromWei(amount, "ether")
 
 
+def contract_from_abi(name, address, abi):
+    from brownie import Contract
+
+    return Contract.from_abi(name, address, abi)
+
+
+class ContractCache:
+    """
+    Contract handles by (contract type, address): the handle of an address is built once
+    and reused until it's evicted (least recently used first, at most `maxsize` handles are kept)
+    """
+
+    def __init__(self, maxsize=CONTRACT_CACHE_SIZE, factory=contract_from_abi):
+        self.maxsize = maxsize
+        self.factory = factory
+        self.handles = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, _contract, contract_address):
+        key = (_contract._name, str(contract_address).lower())
+        handle = self.handles.get(key)
+        if handle is not None:
+            self.handles.move_to_end(key)
+            self.hits += 1
+            return handle
+
+        self.misses += 1
+        handle = self.factory(_contract._name, contract_address, _contract.abi)
+        self.handles[key] = handle
+        if len(self.handles) > self.maxsize:
+            self.handles.popitem(last=False)
+        return handle
+
+    def clear(self):
+        self.handles.clear()
+
+
+contract_cache = ContractCache()
+
+
 def get_contract(_contract, contract_address):
+    """@return the (cached) handle of the `_contract` type deployed at `contract_address`"""
+    return contract_cache.get(_contract, contract_address)
+
+
+def get_all_pages(paginated_view, *args, page_size=PAGE_SIZE):
+    """
+    Walk a cursor-paginated contract view until the end and return all the items,
+    the view takes (*args, cursor, limit) and returns (items, next_cursor)
+    """
+    items = []
+    cursor = 0
+    while True:
+        page, next_cursor = paginated_view(*args, cursor, page_size)
+        items.extend(page)
+        # filtered views scan a bounded window and can return short or empty pages
+        # before the end, only a cursor that doesn't move means there is nothing left
+        if next_cursor == cursor:
+            return items
+        cursor = next_cursor
+
+
+def get_stores_summaries(store_factory, buyer=ZERO_ADDRESS, max_orders=0, page_size=STORES_PAGE_SIZE):
+    """
+    Load the whole store directory through the StoreFactory lens, one call per page of stores
+    @return a dict per store with its metadata, products/orders counts, live counters and the buyer orders
+    """
+    summaries = get_all_pages(
+        store_factory.getStoresSummaries, buyer, max_orders, page_size=page_size
+    )
+    return [
+        {
+            "storeAddress": s[0],
+            "owner": s[1],
+            "storeMetaData": s[2],
+            "productsCount": s[3],
+            "ordersCount": s[4],
+            "activeProductsCount": s[5],
+            "openOrdersCount": s[6],
+            "buyerOrders": list(s[7]),
+            "buyerOrdersMetadata": list(s[8]),
+        }
+        for s in summaries
+    ]
+
+
+def predict_store_address(store_factory, owner, salt, implementation=None):
+    """
+    Compute off-chain the address of the store `owner` creates with
+    StoreFactory.createStoreDeterministic and the bytes32 `salt` (CREATE2 address of the clone)
+    """
+    from web3.main import Web3
+
+    implementation = implementation or store_factory.storeImplementation()
+    owner_salt = Web3.solidityKeccak(["address", "bytes32"], [owner, salt])
+    init_code = CLONE_CODE_PREFIX + bytes.fromhex(str(implementation)[2:]) + CLONE_CODE_SUFFIX
+    create2_hash = Web3.keccak(
+        b"\xff" + bytes.fromhex(str(store_factory.address)[2:]) + owner_salt + Web3.keccak(init_code)
+    )
+    return Web3.toChecksumAddress(create2_hash[12:])
+
+
+class NonceManager:
+    """Hands out the nonces of an account locally instead of asking the node before each transaction"""
+
+    def __init__(self, account):
+        self.account = account
+        self.sync()
+
+    def sync(self):
+        from brownie import web3
+
+        # pending transactions of the account are counted so nonces don't collide with them
+        self.next_nonce = web3.eth.get_transaction_count(str(self.account), "pending")
+
+    def take(self):
+        nonce = self.next_nonce
+        self.next_nonce += 1
+        return nonce
+
+    def release(self, nonce):
+        """Give back a nonce whose transaction was never sent"""
+        if nonce == self.next_nonce - 1:
+            self.next_nonce = nonce
+        else:
+            self.sync()
+
+
+def fixed_gas_price(gas_price):
+    """Gas price strategy always using `gas_price` (wei)"""
+    return lambda: gas_price
+
+
+def network_gas_price(multiplier=1, refresh=GAS_PRICE_REFRESH):
+    """
+    Gas price strategy following the node gas price times `multiplier`,
+    the price is read at most once every `refresh` seconds
+    """
+    cache = {"price": None, "timestamp": 0}
+
+    def strategy():
+        from brownie import web3
+
+        if cache["price"] is None or time.time() - cache["timestamp"] > refresh:
+            cache["price"] = int(web3.eth.gas_price * multiplier)
+            cache["timestamp"] = time.time()
+        return cache["price"]
+
+    return strategy
+
+
+class TxPipelineError(RuntimeError):
+    """Raised by TxPipeline.flush when sent transactions reverted, `failed` lists them"""
+
+    def __init__(self, failed):
+        super().__init__(
+            "%d transactions reverted: %s" % (len(failed), ", ".join(tx.txid for tx in failed))
+        )
+        self.failed = failed
+
+
+class TxPipeline:
+    """
+    Send many transactions from one account without waiting for each of them: the nonces
+    are managed locally, at most `depth` transactions are in flight and their receipts are
+    polled with an exponential backoff (mined in nonce order, so oldest first).
+
+        with TxPipeline(account) as pipeline:
+            for item in items:
+                pipeline.send(market.addProduct, item["metadata_hash"], item["price"])
+            pipeline.send(market.purchase, 0, value=price)
+
+    `gas_price` is a strategy (see fixed_gas_price, network_gas_price) and `gas_limit`
+    skips the gas estimation of each transaction, by default brownie handles both.
+    flush (also called when leaving the `with` block) raises a TxPipelineError when
+    some transactions reverted
+    """
+
+    def __init__(
+        self,
+        account,
+        depth=TX_PIPELINE_DEPTH,
+        gas_price=None,
+        gas_limit=None,
+        poll_interval=RECEIPT_POLL_INTERVAL,
+        max_poll_interval=MAX_RECEIPT_POLL_INTERVAL,
+    ):
+        self.account = account
+        self.depth = depth
+        self.gas_price = gas_price
+        self.gas_limit = gas_limit
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.nonces = NonceManager(account)
+        self.in_flight = []
+        self.sent = []
+        self.failed = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+            return
+        # the transactions already sent are still waited for, the original error is kept
+        try:
+            self.flush()
+        except TxPipelineError:
+            pass
+
+    def send(self, fn, *args, value=0):
+        """
+        Send `fn(*args)` (a contract function or a contract deployment) once there is room in the pipeline
+        @return the pending transaction
+        """
+        while len(self.in_flight) >= self.depth:
+            self._wait_mined()
+
+        nonce = self.nonces.take()
+        tx_params = {"from": self.account, "nonce": nonce, "value": value, "required_confs": 0, "silent": True}
+        if self.gas_price is not None:
+            tx_params["gas_price"] = self.gas_price()
+        if self.gas_limit is not None:
+            tx_params["gas_limit"] = self.gas_limit
+        try:
+            tx = fn(*args, tx_params)
+        except Exception:
+            # the transaction was rejected before being sent (e.g. estimation revert)
+            self.nonces.release(nonce)
+            raise
 
-    contract = Contract.from_abi(_contract._name, contract_address, _contract.abi)
+        self.in_flight.append(tx)
+        self.sent.append(tx)
+        return tx
 
-    return contract
+    def flush(self):
+        """
+        Wait until every sent transaction is mined, raise a TxPipelineError listing the
+        reverted ones if any
+        @return the transactions sent since the previous flush, in sending order
+        """
+        while self.in_flight:
+            self._wait_mined()
+        sent, self.sent = self.sent, []
+        for tx in sent:
+            # let brownie update the transaction (status, events, contract address)
+            tx.wait(1)
+        failed, self.failed = self.failed, []
+        if failed:
+            raise TxPipelineError(failed)
+        return sent
 
-def deploy_mock():
+    def _wait_mined(self):
+        """Poll the receipts of the oldest in-flight transactions until at least one is mined"""
+        from brownie import web3
+        from web3.exceptions import TransactionNotFound
 
-    DECIMALS = 8
-    INIT_VAL = 3000 * 10**8
-    
-    account = get_account()
+        delay = self.poll_interval
+        while True:
+            mined = 0
+            for tx in self.in_flight:
+                try:
+                    receipt = web3.eth.get_transaction_receipt(tx.txid)
+                except TransactionNotFound:
+                    break
+                if receipt["status"] != 1:
+                    self.failed.append(tx)
+                mined += 1
+            if mined:
+                del self.in_flight[:mined]
+                return
+            time.sleep(delay)
+            delay = min(delay * 2, self.max_poll_interval)
 
-    print("deploying MockV3Aggregator")
-    feed = MockV3Aggregator.deploy(DECIMALS, INIT_VAL, {"from":account})
 
-    return feed
+def split_to_fit(items, estimate_gas, gas_budget):
+    """
+    Split a batch in two halves, recursively, until the `estimate_gas(part)` of each part
+    fits in `gas_budget`, a single item is never split even when it doesn't fit
+    @return the parts of the batch, in order
+    """
+    if len(items) > 1 and estimate_gas(items) > gas_budget:
+        middle = len(items) // 2
+        return split_to_fit(items[:middle], estimate_gas, gas_budget) + split_to_fit(
+            items[middle:], estimate_gas, gas_budget
+        )
+    return [items]
 
@@ -0,0 +1,445 @@
+import sqlite3, time
+from eth_utils import event_abi_to_log_topic
+from brownie import Market, StoreFactory, Store, AuctionMarket, web3
+
+"""
+    Local indexer following the marketplace contracts events into a SQLite database:
+        brownie run scripts/indexer.py main [database path] --network=ganache-local
+
+    Logs are fetched in block ranges starting after the checkpointed block, each range
+    is applied in a single database transaction together with the new checkpoint so an
+    interrupted indexer always resumes from a consistent state.
+    Stores are discovered from the StoreFactory StoreCreated events.
+"""
+
+INDEXER_DATABASE = "./build/indexer.db"
+
+# maximum number of blocks requested in a single eth_getLogs call
+BLOCK_RANGE = 2000
+POLL_INTERVAL = 2
+
+PRODUCT_TYPE = ["FIXED", "UNLIMITED"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    block_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stores (
+    address TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    created_on INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    contract TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    seller TEXT NOT NULL,
+    metadata_hash TEXT NOT NULL,
+    price_in_usd TEXT NOT NULL,
+    quantity INTEGER,
+    product_type TEXT,
+    active_orders INTEGER NOT NULL DEFAULT 0,
+    buyer TEXT,
+    buy_price_in_eth TEXT,
+    status TEXT NOT NULL,
+    listed_on INTEGER NOT NULL,
+    PRIMARY KEY (contract, product_id)
+);
+CREATE TABLE IF NOT EXISTS purchases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    product_id INTEGER NOT NULL,
+    buyer TEXT NOT NULL,
+    price_in_eth TEXT NOT NULL,
+    status TEXT NOT NULL,
+    block_number INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS orders (
+    store TEXT NOT NULL,
+    order_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    buyer TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    total_price_in_eth TEXT NOT NULL,
+    status TEXT NOT NULL,
+    reviewed INTEGER NOT NULL DEFAULT 0,
+    created_on INTEGER NOT NULL,
+    PRIMARY KEY (store, order_id)
+);
+CREATE TABLE IF NOT EXISTS reviews (
+    store TEXT NOT NULL,
+    order_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    buyer TEXT NOT NULL,
+    rating TEXT NOT NULL,
+    review TEXT NOT NULL,
+    PRIMARY KEY (store, order_id)
+);
+CREATE TABLE IF NOT EXISTS auctions (
+    auction_id INTEGER PRIMARY KEY,
+    seller TEXT NOT NULL,
+    item_information TEXT NOT NULL,
+    start_price TEXT NOT NULL,
+    highest_bid TEXT NOT NULL,
+    highest_bidder TEXT,
+    end_timestamp INTEGER NOT NULL,
+    status TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bids (
+    auction_id INTEGER NOT NULL,
+    bidder TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    PRIMARY KEY (auction_id, bidder)
+);
+CREATE INDEX IF NOT EXISTS products_status ON products (status, listed_on);
+CREATE INDEX IF NOT EXISTS purchases_buyer ON purchases (buyer);
+CREATE INDEX IF NOT EXISTS orders_buyer ON orders (buyer);
+"""
+
+
+def _event_topics(abi):
+    """Map each event topic of a contract abi to its event name"""
+    return {
+        event_abi_to_log_topic(item): item["name"] for item in abi if item["type"] == "event"
+    }
+
+
+def _to_hex(value):
+    return "0x" + bytes(value).hex()
+
+
+class MarketplaceIndexer:
+    def __init__(self, market, store_factory, auction_market, database=INDEXER_DATABASE, start_block=0):
+        self.db = sqlite3.connect(database)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+        self.contracts = {
+            market.address: ("market", web3.eth.contract(market.address, abi=market.abi)),
+            store_factory.address: ("factory", web3.eth.contract(store_factory.address, abi=store_factory.abi)),
+            auction_market.address: ("auction", web3.eth.contract(auction_market.address, abi=auction_market.abi)),
+        }
+        self.topics = {
+            kind: _event_topics(abi)
+            for kind, abi in [
+                ("market", Market.abi),
+                ("factory", StoreFactory.abi),
+                ("auction", AuctionMarket.abi),
+                ("store", Store.abi),
+            ]
+        }
+        for row in self.db.execute("SELECT address FROM stores"):
+            self._add_store(row["address"])
+
+        if self.checkpoint() is None:
+            with self.db:
+                self.db.execute("INSERT INTO checkpoint VALUES (0, ?)", (start_block - 1,))
+
+    def checkpoint(self):
+        row = self.db.execute("SELECT block_number FROM checkpoint").fetchone()
+        return row["block_number"] if row is not None else None
+
+    def sync(self, to_block=None):
+        """
+        Apply all the events up to `to_block` (the latest block by default)
+        @return the number of applied events
+        """
+        to_block = web3.eth.block_number if to_block is None else to_block
+        applied = 0
+        from_block = self.checkpoint() + 1
+        while from_block <= to_block:
+            end_block = min(from_block + BLOCK_RANGE - 1, to_block)
+            applied += self._sync_range(from_block, end_block)
+            from_block = end_block + 1
+        return applied
+
+    def follow(self, poll_interval=POLL_INTERVAL):
+        while True:
+            applied = self.sync()
+            if applied:
+                print("indexed %d events up to block %d" % (applied, self.checkpoint()))
+            time.sleep(poll_interval)
+
+    def _add_store(self, address):
+        self.contracts[address] = ("store", web3.eth.contract(address, abi=Store.abi))
+
+    def _get_logs(self, addresses, from_block, to_block):
+        return web3.eth.get_logs(
+            {"address": addresses, "fromBlock": from_block, "toBlock": to_block}
+        )
+
+    def _sync_range(self, from_block, to_block):
+        # register the stores created in the range first, their events are in the same range
+        factory = [address for address, (kind, _) in self.contracts.items() if kind == "factory"]
+        for log in self._get_logs(factory, from_block, to_block):
+            name, args = self._decode(log)
+            if name == "StoreCreated" and args["storeAddress"] not in self.contracts:
+                self._add_store(args["storeAddress"])
+
+        logs = self._get_logs(list(self.contracts), from_block, to_block)
+        logs = sorted(logs, key=lambda log: (log["blockNumber"], log["logIndex"]))
+        with self.db:
+            for log in logs:
+                name, args = self._decode(log)
+                if name is not None:
+                    kind, _ = self.contracts[log["address"]]
+                    handler = getattr(self, "_on_%s_%s" % (kind, name), None)
+                    if handler is not None:
+                        handler(log, args)
+            self.db.execute("UPDATE checkpoint SET block_number = ?", (to_block,))
+        return len(logs)
+
+    def _decode(self, log):
+        kind, contract = self.contracts[log["address"]]
+        name = self.topics[kind].get(bytes(log["topics"][0]))
+        if name is None:
+            return None, None
+        return name, contract.events[name]().processLog(log)["args"]
+
+    # ------------------------------------------------------------------
+    # market events
+
+    def _on_market_ProductAdded(self, log, args):
+        self.db.execute(
+            "INSERT OR REPLACE INTO products (contract, product_id, seller, metadata_hash, price_in_usd, status, listed_on) "
+            "VALUES (?, ?, ?, ?, ?, 'INSALE', ?)",
+            (log["address"], args["id"], args["seller"], _to_hex(args["metadataHash"]), str(args["priceInUSD"]), args["timestamp"]),
+        )
+
+    def _on_market_PriceChanged(self, log, args):
+        self._update_product(log["address"], args["id"], price_in_usd=str(args["priceInUSD"]))
+
+    def _on_market_ProductPurchased(self, log, args):
+        self._update_product(
+            log["address"], args["id"], buyer=args["buyer"], buy_price_in_eth=str(args["priceInETH"]), status="PENDING"
+        )
+        self.db.execute(
+            "INSERT INTO purchases (product_id, buyer, price_in_eth, status, block_number) VALUES (?, ?, ?, 'PENDING', ?)",
+            (args["id"], args["buyer"], str(args["priceInETH"]), log["blockNumber"]),
+        )
+
+    def _on_market_ProductSent(self, log, args):
+        self._update_product(log["address"], args["id"], status="SENT")
+        self._update_last_purchase(args["id"], "SENT")
+
+    def _on_market_ProductSold(self, log, args):
+        self._update_product(log["address"], args["id"], status="SOLD")
+        self._update_last_purchase(args["id"], "SOLD")
+
+    def _on_market_PurchaseCancelled(self, log, args):
+        self._update_product(log["address"], args["id"], buyer=None, buy_price_in_eth=None, status="INSALE")
+        self._update_last_purchase(args["id"], "CANCELLED")
+
+    def _on_market_ProductRemoved(self, log, args):
+        self._update_product(log["address"], args["id"], status="REMOVED")
+
+    # ------------------------------------------------------------------
+    # store factory and stores events
+
+    def _on_factory_StoreCreated(self, log, args):
+        self.db.execute(
+            "INSERT OR IGNORE INTO stores VALUES (?, ?, ?, ?)",
+            (args["storeAddress"], args["owner"], args["storeMetaData"], args["timestamp"]),
+        )
+
+    def _on_store_ProductAdded(self, log, args):
+        owner = self.db.execute("SELECT owner FROM stores WHERE address = ?", (log["address"],)).fetchone()
+        self.db.execute(
+            "INSERT OR REPLACE INTO products (contract, product_id, seller, metadata_hash, price_in_usd, quantity, product_type, status, listed_on) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, 'INSALE', ?)",
+            (
+                log["address"],
+                args["productId"],
+                owner["owner"],
+                _to_hex(args["metadataHash"]),
+                str(args["priceInUSD"]),
+                args["quantity"],
+                PRODUCT_TYPE[args["productType"]],
+                args["timestamp"],
+            ),
+        )
+
+    def _on_store_PriceChanged(self, log, args):
+        self._update_product(log["address"], args["productId"], price_in_usd=str(args["priceInUSD"]))
+
+    def _on_store_ProductRemoved(self, log, args):
+        self._update_product(log["address"], args["productId"], status="REMOVED")
+
+    def _on_store_OrderCreated(self, log, args):
+        self.db.execute(
+            "INSERT OR REPLACE INTO orders (store, order_id, product_id, buyer, quantity, total_price_in_eth, status, created_on) "
+            "VALUES (?, ?, ?, ?, ?, ?, 'PENDING', ?)",
+            (
+                log["address"],
+                args["orderId"],
+                args["productId"],
+                args["buyer"],
+                args["quantity"],
+                str(args["totalPriceInETH"]),
+                args["timestamp"],
+            ),
+        )
+        # the ordered quantity is reserved until the order is cancelled
+        self.db.execute(
+            "UPDATE products SET active_orders = active_orders + 1, quantity = quantity - ? "
+            "WHERE contract = ? AND product_id = ?",
+            (args["quantity"], log["address"], args["productId"]),
+        )
+
+    def _on_store_OrderSent(self, log, args):
+        self._update_order(log["address"], args["orderId"], status="SENT")
+
+    def _on_store_OrderCompleted(self, log, args):
+        order = self._get_order(log["address"], args["orderId"])
+        self._update_order(log["address"], args["orderId"], status="COMPLETED")
+        self._release_order(log["address"], order["product_id"])
+
+    def _on_store_OrderCancelled(self, log, args):
+        order = self._get_order(log["address"], args["orderId"])
+        self._update_order(log["address"], args["orderId"], status="CANCELLED")
+        self._release_order(log["address"], order["product_id"])
+        self.db.execute(
+            "UPDATE products SET quantity = quantity + ? WHERE contract = ? AND product_id = ?",
+            (order["quantity"], log["address"], order["product_id"]),
+        )
+
+    def _on_store_ReviewAdded(self, log, args):
+        self._update_order(log["address"], args["orderId"], reviewed=1)
+        self.db.execute(
+            "INSERT OR REPLACE INTO reviews VALUES (?, ?, ?, ?, ?, ?)",
+            (log["address"], args["orderId"], args["productId"], args["buyer"], args["rating"], args["review"]),
+        )
+
+    # ------------------------------------------------------------------
+    # auction events
+
+    def _on_auction_AuctionStarted(self, log, args):
+        self.db.execute(
+            "INSERT OR REPLACE INTO auctions VALUES (?, ?, ?, ?, ?, NULL, ?, 'OPEN')",
+            (
+                args["id"],
+                args["seller"],
+                args["itemInformation"],
+                str(args["startPrice"]),
+                str(args["startBid"]),
+                args["endTimestamp"],
+            ),
+        )
+
+    def _on_auction_BidPlaced(self, log, args):
+        self.db.execute(
+            "UPDATE auctions SET highest_bid = ?, highest_bidder = ? WHERE auction_id = ?",
+            (str(args["amount"]), args["bidder"], args["id"]),
+        )
+        self.db.execute(
+            "INSERT OR REPLACE INTO bids VALUES (?, ?, ?)", (args["id"], args["bidder"], str(args["amount"]))
+        )
+
+    def _on_auction_BidWithdrawn(self, log, args):
+        self.db.execute("DELETE FROM bids WHERE auction_id = ? AND bidder = ?", (args["id"], args["bidder"]))
+
+    def _on_auction_AuctionEnded(self, log, args):
+        self.db.execute("UPDATE auctions SET status = 'ENDED' WHERE auction_id = ?", (args["id"],))
+
+    # ------------------------------------------------------------------
+    # state helpers
+
+    def _update_product(self, contract, product_id, **fields):
+        assignments = ", ".join("%s = ?" % field for field in fields)
+        self.db.execute(
+            "UPDATE products SET %s WHERE contract = ? AND product_id = ?" % assignments,
+            (*fields.values(), contract, product_id),
+        )
+
+    def _update_last_purchase(self, product_id, status):
+        self.db.execute(
+            "UPDATE purchases SET status = ? WHERE id = (SELECT MAX(id) FROM purchases WHERE product_id = ?)",
+            (status, product_id),
+        )
+
+    def _get_order(self, store, order_id):
+        return self.db.execute(
+            "SELECT * FROM orders WHERE store = ? AND order_id = ?", (store, order_id)
+        ).fetchone()
+
+    def _update_order(self, store, order_id, **fields):
+        assignments = ", ".join("%s = ?" % field for field in fields)
+        self.db.execute(
+            "UPDATE orders SET %s WHERE store = ? AND order_id = ?" % assignments,
+            (*fields.values(), store, order_id),
+        )
+
+    def _release_order(self, store, product_id):
+        self.db.execute(
+            "UPDATE products SET active_orders = active_orders - 1 WHERE contract = ? AND product_id = ?",
+            (store, product_id),
+        )
+
+    # ------------------------------------------------------------------
+    # queries
+
+    def catalog(self, seller=None, contract=None, limit=100, offset=0):
+        """Products in sale in the market and the stores, most recent first"""
+        query = "SELECT * FROM products WHERE status = 'INSALE'"
+        params = []
+        if seller is not None:
+            query += " AND seller = ?"
+            params.append(seller)
+        if contract is not None:
+            query += " AND contract = ?"
+            params.append(contract)
+        query += " ORDER BY listed_on DESC, product_id DESC LIMIT ? OFFSET ?"
+        return [dict(row) for row in self.db.execute(query, (*params, limit, offset))]
+
+    def stores(self, owner=None):
+        if owner is None:
+            rows = self.db.execute("SELECT * FROM stores ORDER BY created_on")
+        else:
+            rows = self.db.execute("SELECT * FROM stores WHERE owner = ? ORDER BY created_on", (owner,))
+        return [dict(row) for row in rows]
+
+    def order_history(self, buyer):
+        """Market purchases and store orders of `buyer`, oldest first"""
+        purchases = self.db.execute(
+            "SELECT * FROM purchases WHERE buyer = ? ORDER BY id", (buyer,)
+        )
+        orders = self.db.execute(
+            "SELECT * FROM orders WHERE buyer = ? ORDER BY created_on, order_id", (buyer,)
+        )
+        return {
+            "purchases": [dict(row) for row in purchases],
+            "orders": [dict(row) for row in orders],
+        }
+
+    def store_orders(self, store, status=None):
+        query = "SELECT * FROM orders WHERE store = ?"
+        params = [store]
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        return [dict(row) for row in self.db.execute(query + " ORDER BY order_id", params)]
+
+    def product_reviews(self, store, product_id):
+        rows = self.db.execute(
+            "SELECT * FROM reviews WHERE store = ? AND product_id = ? ORDER BY order_id", (store, product_id)
+        )
+        return [dict(row) for row in rows]
+
+    def auctions(self, status=None, seller=None, bidder=None):
+        """Auctions filtered by status, seller or current highest bidder"""
+        query = "SELECT * FROM auctions WHERE 1 = 1"
+        params = []
+        for column, value in [("status", status), ("seller", seller), ("highest_bidder", bidder)]:
+            if value is not None:
+                query += " AND %s = ?" % column
+                params.append(value)
+        return [dict(row) for row in self.db.execute(query + " ORDER BY auction_id", params)]
+
+    def bids(self, auction_id):
+        rows = self.db.execute("SELECT * FROM bids WHERE auction_id = ? ORDER BY bidder", (auction_id,))
+        return [dict(row) for row in rows]
+
+
+def main(database=INDEXER_DATABASE):
+    indexer = MarketplaceIndexer(Market[-1], StoreFactory[-1], AuctionMarket[-1], database)
+    indexer.follow()
@@ -0,0 +1,356 @@
+import functools, json, math, os, random, time
+from web3.main import Web3
+from brownie import Market, StoreFactory, AuctionMarket, Store, accounts
+from scripts.deploy import deploy
+from scripts.helper_scripts import get_account, get_contract, toWei
+from scripts.metadata import pin_product_metadata
+
+"""
+    Load generator replaying a marketplace traffic mix on a local chain:
+        brownie run scripts/load_generator.py main [operations] [seed] [accounts] [mix] --network=ganache-local
+
+    The traffic is planned from the seed before anything is sent: a local model of the
+    marketplace state (products in sale, orders to ship or confirm, open auctions) picks
+    each operation with the weights of the mix, so the same seed on a freshly deployed
+    system always sends the same transactions. The mix is given as "list=3,purchase=3,..."
+    and the report (gas, latency percentiles and throughput by operation) is written to
+    build/load/report-<seed>.json
+"""
+
+OPERATIONS = ["list", "purchase", "ship", "confirm", "review", "bid"]
+DEFAULT_MIX = {"list": 3, "purchase": 3, "ship": 2, "confirm": 2, "review": 1, "bid": 3}
+
+# products and auctions are listed on the market, in a store or on the auction market
+TARGETS = ["market", "store", "auction"]
+
+LOAD_REPORTS_FOLDER = "./build/load"
+
+# one seller out of this many accounts, every seller opens a store
+SELLERS_SHARE = 4
+# ETH sent to the generated accounts when the chain doesn't have enough unlocked ones
+LOAD_ACCOUNT_FUNDING = toWei(2)
+
+PRODUCT_PRICE = toWei(100)
+STORE_PRODUCT_TYPE = 1  # UNLIMITED
+AUCTION_DURATION = 7 * 24 * 3600
+# amount a bid raises the highest bid by (wei)
+BID_INCREMENT = toWei(0.001)
+
+
+@functools.lru_cache(maxsize=None)
+def load_metadata_hash():
+    """@return the metadata hash of the listed products, pinned on the first listing of a run"""
+    return pin_product_metadata("load product", "load generator product", "ipfs://load-product-image")
+
+
+def parse_mix(mix):
+    """@return the operations weights of a "list=3,purchase=2" string (missing operations weigh 0)"""
+    if mix is None:
+        return dict(DEFAULT_MIX)
+    if isinstance(mix, dict):
+        return {op: mix.get(op, 0) for op in OPERATIONS}
+    weights = {op: 0 for op in OPERATIONS}
+    for entry in str(mix).split(","):
+        op, weight = entry.split("=")
+        if op.strip() not in weights:
+            raise ValueError("Unknown operation %s, use one of %s" % (op, ", ".join(OPERATIONS)))
+        weights[op.strip()] = float(weight)
+    return weights
+
+
+def build_plan(seed, operations, sellers, buyers, mix=None, first_market_id=0, first_auction_id=0):
+    """
+    Plan `operations` marketplace operations with a local model of the marketplace state,
+    sellers and buyers are accounts indexes, seller i owns the store i (created empty)
+    @return the list of actions, dicts of op, target, account index and ids
+    """
+    rng = random.Random(seed)
+    weights = parse_mix(mix)
+
+    market_in_sale = []  # (product id, seller)
+    market_pending = []  # (product id, seller, buyer)
+    market_sent = []  # (product id, buyer)
+    store_products = {store: [] for store in range(len(sellers))}
+    store_orders = {store: 0 for store in range(len(sellers))}
+    store_pending = []  # (store, order id, buyer)
+    store_sent = []  # (store, order id, buyer)
+    store_completed = []  # (store, order id, buyer)
+    auctions = []  # auction ids
+    next_market_id = first_market_id
+    next_auction_id = first_auction_id
+
+    available = {
+        "list": lambda: True,
+        "purchase": lambda: market_in_sale or any(store_products.values()),
+        "ship": lambda: market_pending or store_pending,
+        "confirm": lambda: market_sent or store_sent,
+        "review": lambda: store_completed,
+        "bid": lambda: auctions,
+    }
+
+    def pop(items):
+        return items.pop(rng.randrange(len(items)))
+
+    plan = []
+    for _ in range(operations):
+        candidates = [op for op in OPERATIONS if weights[op] > 0 and available[op]()]
+        op = rng.choices(candidates, [weights[op] for op in candidates])[0] if candidates else "list"
+
+        if op == "list":
+            seller = rng.randrange(len(sellers))
+            target = rng.choice(TARGETS)
+            if target == "market":
+                action = {"id": next_market_id}
+                market_in_sale.append((next_market_id, seller))
+                next_market_id += 1
+            elif target == "store":
+                action = {"store": seller, "id": len(store_products[seller])}
+                store_products[seller].append(len(store_products[seller]))
+            else:
+                action = {"id": next_auction_id}
+                auctions.append(next_auction_id)
+                next_auction_id += 1
+            action.update(account=sellers[seller])
+
+        elif op == "purchase":
+            buyer = rng.choice(buyers)
+            stores = [store for store, products in store_products.items() if products]
+            if market_in_sale and (not stores or rng.random() < 0.5):
+                target = "market"
+                product_id, seller = pop(market_in_sale)
+                market_pending.append((product_id, seller, buyer))
+                action = {"id": product_id}
+            else:
+                target = "store"
+                store = rng.choice(stores)
+                action = {"store": store, "id": rng.choice(store_products[store])}
+                store_pending.append((store, store_orders[store], buyer))
+                store_orders[store] += 1
+            action.update(account=buyer)
+
+        elif op == "ship":
+            if market_pending and (not store_pending or rng.random() < 0.5):
+                target = "market"
+                product_id, seller, buyer = pop(market_pending)
+                market_sent.append((product_id, buyer))
+                action = {"id": product_id, "account": sellers[seller]}
+            else:
+                target = "store"
+                store, order_id, buyer = pop(store_pending)
+                store_sent.append((store, order_id, buyer))
+                action = {"store": store, "id": order_id, "account": sellers[store]}
+
+        elif op == "confirm":
+            if market_sent and (not store_sent or rng.random() < 0.5):
+                target = "market"
+                product_id, buyer = pop(market_sent)
+                action = {"id": product_id, "account": buyer}
+            else:
+                target = "store"
+                store, order_id, buyer = pop(store_sent)
+                store_completed.append((store, order_id, buyer))
+                action = {"store": store, "id": order_id, "account": buyer}
+
+        elif op == "review":
+            target = "store"
+            store, order_id, buyer = pop(store_completed)
+            action = {"store": store, "id": order_id, "account": buyer, "rating": str(rng.randint(1, 5))}
+
+        else:
+            target = "auction"
+            action = {"id": rng.choice(auctions), "account": rng.choice(buyers)}
+
+        action.update(op=op, target=target)
+        plan.append(action)
+
+    return plan
+
+
+def percentile(values, share):
+    """@return the nearest-rank percentile of `values` (share between 0 and 1)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(share * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class LoadStats:
+    """Gas, latency and errors of every operation sent by the load generator"""
+
+    def __init__(self):
+        self.operations = {}
+        self.elapsed = 0.0
+
+    def record(self, name, gas_used, latency):
+        entry = self.operations.setdefault(name, {"gas": [], "latency": [], "errors": 0})
+        entry["gas"].append(gas_used)
+        entry["latency"].append(latency)
+
+    def record_error(self, name):
+        self.operations.setdefault(name, {"gas": [], "latency": [], "errors": 0})["errors"] += 1
+
+    @property
+    def sent(self):
+        return sum(len(e["gas"]) + e["errors"] for e in self.operations.values())
+
+    @property
+    def throughput(self):
+        """Operations per second over the whole run"""
+        return self.sent / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        operations = {}
+        for name, entry in sorted(self.operations.items()):
+            operations[name] = {
+                "count": len(entry["gas"]),
+                "errors": entry["errors"],
+                "avg_gas": int(sum(entry["gas"]) / len(entry["gas"])) if entry["gas"] else None,
+                "p50_ms": _ms(percentile(entry["latency"], 0.5)),
+                "p90_ms": _ms(percentile(entry["latency"], 0.9)),
+                "p99_ms": _ms(percentile(entry["latency"], 0.99)),
+                "throughput": len(entry["gas"]) / sum(entry["latency"]) if entry["latency"] else 0.0,
+            }
+        return {"operations": operations, "sent": self.sent, "elapsed": self.elapsed, "throughput": self.throughput}
+
+    def report(self):
+        summary = self.summary()
+        headers = ["operation", "count", "errors", "avg gas", "p50 ms", "p90 ms", "p99 ms"]
+        rows = [
+            [name, e["count"], e["errors"], e["avg_gas"], e["p50_ms"], e["p90_ms"], e["p99_ms"]]
+            for name, e in summary["operations"].items()
+        ]
+        widths = [max(len(str(v)) for v in column) for column in zip(headers, *rows)]
+        lines = [" | ".join(str(v).ljust(w) for v, w in zip(row, widths)) for row in [headers] + rows]
+        lines.append("%d operations in %.1fs, %.1f ops/s" % (summary["sent"], summary["elapsed"], summary["throughput"]))
+        return "\n".join(lines)
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def get_load_accounts(count, seed):
+    """
+    Use the unlocked accounts of the local chain (the admin excluded) and add funded
+    accounts derived from the seed when more are needed
+    """
+    admin = get_account()
+    load_accounts = list(accounts[1 : count + 1])
+    for i in range(len(load_accounts), count):
+        private_key = Web3.keccak(text="load-account-%s-%d" % (seed, i)).hex()
+        account = accounts.add(private_key)
+        if account.balance() < LOAD_ACCOUNT_FUNDING:
+            admin.transfer(account, LOAD_ACCOUNT_FUNDING - account.balance(), silent=True)
+        load_accounts.append(account)
+    return load_accounts
+
+
+def open_stores(store_factory, owners):
+    """Create a store for each owner @return the stores in owners order"""
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+    stores = []
+    for owner in owners:
+        create_tx = store_factory.createStore(
+            "ipfs://load-store", {"from": owner, "value": create_store_fee, "silent": True}
+        )
+        stores.append(get_contract(Store, create_tx.events["StoreCreated"]["storeAddress"]))
+    return stores
+
+
+def prepare_action(action, load_accounts, market, stores, auction_market):
+    """
+    Resolve a planned action into the contract function to call, its arguments and
+    transaction parameters (the ETH amounts are read here so they aren't timed)
+    @return the function, the arguments, the transaction parameters
+    """
+    op, target = action["op"], action["target"]
+    account = load_accounts[action["account"]]
+    tx = {"from": account, "silent": True}
+
+    if target == "market":
+        if op == "list":
+            return market.addProduct, [load_metadata_hash(), PRODUCT_PRICE], tx
+        if op == "purchase":
+            tx["value"] = market.quoteUSDToETH(PRODUCT_PRICE)
+            return market.purchase, [action["id"]], tx
+        if op == "ship":
+            return market.sendProduct, [action["id"]], tx
+        return market.confirmRecieved, [action["id"]], tx
+
+    if target == "store":
+        store = stores[action["store"]]
+        if op == "list":
+            return store.addProduct, [load_metadata_hash(), PRODUCT_PRICE, 1, STORE_PRODUCT_TYPE], tx
+        if op == "purchase":
+            tx["value"] = store.quoteUSDToETH(PRODUCT_PRICE)
+            return store.createBuyOrder, [action["id"], 1], tx
+        if op == "ship":
+            return store.fillOrder, [action["id"]], tx
+        if op == "confirm":
+            return store.confirmRecieved, [action["id"]], tx
+        return store.leaveReview, [action["id"], action["rating"], "load generator review"], tx
+
+    if op == "list":
+        return auction_market.startAuction, ["ipfs://load-auction", PRODUCT_PRICE, AUCTION_DURATION], tx
+    # raise the highest bid, the bidder only sends the difference with their current bid
+    highest_bid = auction_market.auctionsList(action["id"])[3]
+    tx["value"] = highest_bid - auction_market.getUserBidAmount(account, action["id"]) + BID_INCREMENT
+    return auction_market.bid, [action["id"]], tx
+
+
+def run_load(
+    market, store_factory, auction_market, operations, seed=0, account_count=12, mix=None
+):
+    """
+    Plan and send `operations` operations from `account_count` accounts, one at a time
+    @return the load stats
+    """
+    load_accounts = get_load_accounts(account_count, seed)
+    seller_count = max(account_count // SELLERS_SHARE, 1)
+    sellers = list(range(seller_count))
+    buyers = list(range(seller_count, account_count))
+    stores = open_stores(store_factory, load_accounts[:seller_count])
+
+    plan = build_plan(
+        seed,
+        operations,
+        sellers,
+        buyers,
+        mix,
+        first_market_id=market.getProductsCount(),
+        first_auction_id=auction_market.getAuctionsCount(),
+    )
+
+    stats = LoadStats()
+    start = time.perf_counter()
+    for action in plan:
+        name = "%s.%s" % (action["target"], action["op"])
+        fn, args, tx_params = prepare_action(action, load_accounts, market, stores, auction_market)
+        sent_at = time.perf_counter()
+        try:
+            tx = fn(*args, tx_params)
+        except Exception:
+            stats.record_error(name)
+            continue
+        stats.record(name, tx.gas_used, time.perf_counter() - sent_at)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def write_report(stats, seed, folder=LOAD_REPORTS_FOLDER):
+    os.makedirs(folder, exist_ok=True)
+    path = os.path.join(folder, "report-%s.json" % seed)
+    with open(path, "w") as report_file:
+        json.dump(dict(stats.summary(), seed=seed), report_file, indent=2)
+    return path
+
+
+def main(operations=500, seed=0, account_count=12, mix=None):
+    if len(Market) == 0 or len(StoreFactory) == 0 or len(AuctionMarket) == 0:
+        deploy()
+    stats = run_load(
+        Market[-1], StoreFactory[-1], AuctionMarket[-1], int(operations), int(seed), int(account_count), mix
+    )
+    print(stats.report())
+    print("report written to %s" % write_report(stats, int(seed)))
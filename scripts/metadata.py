@@ -0,0 +1,82 @@
+import base64, hashlib, json, os
+
+"""
+    Products metadata (name, description, image) is stored on IPFS as a JSON file,
+    the contracts only keep its sha256 digest as a bytes32 metadata hash.
+
+    The JSON is added as a single raw block (CIDv1, raw codec, sha256) so the CID
+    can always be rebuilt from the on-chain hash and vice versa.
+"""
+
+IPFS_STORE_FOLDER = "./build/ipfs"
+
+# CIDv1 + raw codec + sha2-256 multihash of 32 bytes
+CID_PREFIX = bytes([0x01, 0x55, 0x12, 0x20])
+
+
+def build_metadata(name, description, image):
+    """
+    Encode product metadata as canonical JSON so the same product always gives the same hash,
+    non-ASCII characters are written as UTF-8 like the front end JSON.stringify does
+    """
+    metadata = {"name": name, "description": description, "image": image}
+    return json.dumps(metadata, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def metadata_hash(content):
+    return "0x" + hashlib.sha256(content).hexdigest()
+
+
+def hash_to_cid(_metadata_hash):
+    digest = bytes.fromhex(_metadata_hash[2:] if _metadata_hash.startswith("0x") else _metadata_hash)
+    return "b" + base64.b32encode(CID_PREFIX + digest).decode().lower().rstrip("=")
+
+
+def cid_to_hash(cid):
+    encoded = cid[1:].upper()
+    raw = base64.b32decode(encoded + "=" * (-len(encoded) % 8))
+    if raw[: len(CID_PREFIX)] != CID_PREFIX:
+        raise ValueError("%s is not a raw sha256 CIDv1" % cid)
+    return "0x" + raw[len(CID_PREFIX) :].hex()
+
+
+class LocalIPFS:
+    """
+    Content addressed folder standing in for an IPFS node during development and tests,
+    files are stored under their CID
+    """
+
+    def __init__(self, folder=IPFS_STORE_FOLDER):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+
+    def pin(self, content):
+        cid = hash_to_cid(metadata_hash(content))
+        path = os.path.join(self.folder, cid)
+        if not os.path.exists(path):
+            with open(path, "wb") as pinned:
+                pinned.write(content)
+        return cid
+
+    def cat(self, cid):
+        with open(os.path.join(self.folder, cid), "rb") as pinned:
+            content = pinned.read()
+        if metadata_hash(content) != cid_to_hash(cid):
+            raise ValueError("content of %s doesn't match its CID" % cid)
+        return content
+
+
+def pin_product_metadata(name, description, image, ipfs=None):
+    """
+    Build and pin a product metadata JSON
+    @return the bytes32 metadata hash to list the product with
+    """
+    ipfs = ipfs or LocalIPFS()
+    content = build_metadata(name, description, image)
+    ipfs.pin(content)
+    return metadata_hash(content)
+
+
+def get_product_metadata(_metadata_hash, ipfs=None):
+    ipfs = ipfs or LocalIPFS()
+    return json.loads(ipfs.cat(hash_to_cid(_metadata_hash)))
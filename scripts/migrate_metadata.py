@@ -0,0 +1,170 @@
+from brownie import Market, Store, Contract
+from scripts.helper_scripts import get_account, get_contract, TxPipeline, TxPipelineError
+from scripts.bulk_import import import_catalog
+from scripts.metadata import LocalIPFS, pin_product_metadata
+
+"""
+    Move the products listed on a legacy Market/Store (name, description and image
+    stored on-chain) to the current contracts, where only the metadata hash is stored.
+    Each seller (or store owner) runs it with their own account:
+        brownie run scripts/migrate_metadata.py main <legacy market address> --network=ganache-local
+        brownie run scripts/migrate_metadata.py main <legacy store address> <new store address> --network=ganache-local
+
+    The products metadata is pinned, the products are listed again in batches
+    and then removed from the legacy contract. Store products with active orders
+    can't be removed yet, they're skipped until their orders are completed.
+"""
+
+LEGACY_STATUS_INSALE = 1
+
+LEGACY_MARKET_ABI = [
+    {
+        "name": "getAllProducts",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [],
+        "outputs": [
+            {
+                "name": "",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "id", "type": "uint256"},
+                    {"name": "seller", "type": "address"},
+                    {"name": "name", "type": "string"},
+                    {"name": "description", "type": "string"},
+                    {"name": "image", "type": "string"},
+                    {"name": "priceInUSD", "type": "uint256"},
+                    {"name": "buyPriceInETH", "type": "uint256"},
+                    {"name": "buyer", "type": "address"},
+                    {"name": "status", "type": "uint8"},
+                    {"name": "listed_on", "type": "uint256"},
+                ],
+            }
+        ],
+    },
+    {
+        "name": "remove",
+        "type": "function",
+        "stateMutability": "nonpayable",
+        "inputs": [{"name": "_id", "type": "uint256"}],
+        "outputs": [],
+    },
+]
+
+LEGACY_STORE_ABI = [
+    {
+        "name": "listStoreProducts",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [],
+        "outputs": [
+            {
+                "name": "",
+                "type": "tuple[]",
+                "components": [
+                    {"name": "productId", "type": "uint256"},
+                    {"name": "name", "type": "string"},
+                    {"name": "description", "type": "string"},
+                    {"name": "image", "type": "string"},
+                    {"name": "priceInUSD", "type": "uint256"},
+                    {"name": "quantity", "type": "uint256"},
+                    {"name": "activeOrders", "type": "uint256"},
+                    {"name": "productType", "type": "uint8"},
+                    {"name": "listed_on", "type": "uint256"},
+                ],
+            }
+        ],
+    },
+    {
+        "name": "removeProduct",
+        "type": "function",
+        "stateMutability": "nonpayable",
+        "inputs": [{"name": "_productId", "type": "uint256"}],
+        "outputs": [],
+    },
+]
+
+
+def remove_legacy_products(remove, product_ids, account):
+    """
+    Remove the migrated products from the legacy contract, the removals don't depend
+    on each other so they're all sent through a TxPipeline and waited for together
+    """
+    pipeline = TxPipeline(account)
+    for product_id in product_ids:
+        pipeline.send(remove, product_id)
+    try:
+        pipeline.flush()
+    except TxPipelineError as error:
+        print(
+            "%d of the legacy removals reverted, those products are still listed on the legacy contract"
+            % len(error.failed)
+        )
+        raise
+
+
+def migrate_market(legacy_address, market, seller, ipfs=None):
+    ipfs = ipfs or LocalIPFS()
+    legacy_market = Contract.from_abi("LegacyMarket", legacy_address, LEGACY_MARKET_ABI)
+
+    products = [
+        p
+        for p in legacy_market.getAllProducts()
+        if p[1] == seller and p[8] == LEGACY_STATUS_INSALE
+    ]
+    items = [
+        {"metadata_hash": pin_product_metadata(p[2], p[3], p[4], ipfs), "price": p[5]}
+        for p in products
+    ]
+    if items:
+        import_catalog(market, items, seller)
+
+    remove_legacy_products(legacy_market.remove, [p[0] for p in products], seller)
+
+    print("migrated %d market products" % len(items))
+    return items
+
+
+def select_store_products(legacy_products):
+    """
+    Split the legacy store products between those migrated now and those with active
+    orders, which the legacy store refuses to remove and would end up listed twice
+    @return the products to migrate, the products kept until their orders are completed
+    """
+    # removed products have an empty name
+    listed = [p for p in legacy_products if p[1] != ""]
+    return [p for p in listed if p[6] == 0], [p for p in listed if p[6] != 0]
+
+
+def migrate_store(legacy_address, store, owner, ipfs=None):
+    ipfs = ipfs or LocalIPFS()
+    legacy_store = Contract.from_abi("LegacyStore", legacy_address, LEGACY_STORE_ABI)
+
+    products, kept = select_store_products(legacy_store.listStoreProducts())
+    items = [
+        {
+            "metadata_hash": pin_product_metadata(p[1], p[2], p[3], ipfs),
+            "price": p[4],
+            "quantity": p[5],
+            "type": p[7],
+        }
+        for p in products
+    ]
+    if items:
+        import_catalog(store, items, owner, is_store=True)
+
+    remove_legacy_products(legacy_store.removeProduct, [p[0] for p in products], owner)
+
+    print("migrated %d store products" % len(items))
+    if kept:
+        print("%d products with active orders were skipped, run the migration again once they're completed" % len(kept))
+    return items
+
+
+def main(legacy_address, new_store_address=None):
+    account = get_account()
+
+    if new_store_address is not None:
+        migrate_store(legacy_address, get_contract(Store, new_store_address), account)
+    else:
+        migrate_market(legacy_address, Market[-1], account)
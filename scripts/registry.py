@@ -0,0 +1,103 @@
+import json, os
+
+"""
+    Compact deployment registry: one JSON file per network holding, for each contract
+    name, its ABI (once, whatever the number of deployments) and its active address.
+    Contracts that are only used through an ABI (stores are clones created by the
+    StoreFactory) have no address.
+
+        {"chainId": "5777", "contracts": {"Market": {"address": "0x...", "abi": [...]}}}
+
+    deploy.py writes the registry of persistent networks to build/registry/<chain id>.json,
+    update_front_end.py ships the registries to the front end
+"""
+
+REGISTRY_FOLDER = "./build/registry"
+
+# contracts the front end and the scripts use without a fixed address
+ABI_ONLY_CONTRACTS = ["Store"]
+
+
+def build_registry(chain_id, contracts):
+    """
+    @param contracts a dict of contract name -> (address or None, abi)
+    @return the registry of `chain_id`
+    """
+    return {
+        "chainId": str(chain_id),
+        "contracts": {
+            name: {"address": address, "abi": abi} for name, (address, abi) in sorted(contracts.items())
+        },
+    }
+
+
+def registry_path(chain_id, folder=REGISTRY_FOLDER):
+    return os.path.join(folder, "%s.json" % chain_id)
+
+
+def dump_registry(registry):
+    # compact separators, the registry ends up in the front end bundle as is
+    return json.dumps(registry, separators=(",", ":"), sort_keys=True).encode()
+
+
+def write_registry(registry, folder=REGISTRY_FOLDER):
+    path = registry_path(registry["chainId"], folder)
+    os.makedirs(folder, exist_ok=True)
+    with open(path, "wb") as registry_file:
+        registry_file.write(dump_registry(registry))
+    return path
+
+
+def load_registry(chain_id, folder=REGISTRY_FOLDER):
+    """@return the registry of `chain_id`, None if there is none"""
+    path = registry_path(chain_id, folder)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as registry_file:
+        return json.load(registry_file)
+
+
+def list_registries(folder=REGISTRY_FOLDER):
+    """@return the registries of every network found in `folder`"""
+    if not os.path.isdir(folder):
+        return []
+    chain_ids = sorted(f[:-5] for f in os.listdir(folder) if f.endswith(".json"))
+    return [load_registry(chain_id, folder) for chain_id in chain_ids]
+
+
+def get_address(registry, name):
+    return registry["contracts"][name]["address"]
+
+
+def get_abi(registry, name):
+    return registry["contracts"][name]["abi"]
+
+
+def registries_from_build(build_folder):
+    """
+    Build the registry of every network of a brownie build folder (deployments map
+    and compiled contracts), used for the deployments not made through deploy.py
+    @return the list of registries
+    """
+    map_path = os.path.join(build_folder, "deployments", "map.json")
+    if not os.path.exists(map_path):
+        return []
+    with open(map_path, "r") as map_file:
+        deployments = json.load(map_file)
+
+    abis = {}
+    contracts_folder = os.path.join(build_folder, "contracts")
+    names = {name for chain in deployments.values() for name in chain} | set(ABI_ONLY_CONTRACTS)
+    for name in names:
+        path = os.path.join(contracts_folder, name + ".json")
+        if os.path.exists(path):
+            with open(path, "r") as artifact_file:
+                abis[name] = json.load(artifact_file)["abi"]
+
+    registries = []
+    for chain_id, chain in sorted(deployments.items()):
+        contracts = {name: (None, abis[name]) for name in ABI_ONLY_CONTRACTS if name in abis}
+        # brownie lists the addresses from the newest to the oldest
+        contracts.update({name: (addresses[0], abis[name]) for name, addresses in chain.items() if addresses and name in abis})
+        registries.append(build_registry(chain_id, contracts))
+    return registries
@@ -1,52 +1,196 @@
-import os, shutil
+import hashlib, json, os, shutil
+from concurrent.futures import ThreadPoolExecutor
+from scripts.registry import registry_path
 
 """
-    Used to delete all previous smart contract deployments
+    Used to delete previous smart contract deployments and compiled artifacts:
+        brownie run scripts/reset.py                                  (everything)
+        brownie run scripts/reset.py clean [chain id] [keep]          (selective)
+
+    The selective clean removes the deployments of a chain id (all of them, or only
+    those older than the `keep` latest ones of each contract) and the compiled artifacts
+    whose source changed, unchanged contracts don't have to be recompiled. When all the
+    deployments of the chain go, its deploy.py manifest entries and registry go too
 """
 
+BUILD_FOLDER = "./build"
 
-def reset_depoyments():
-    folder = "./build/deployments"
+# threads used to delete large trees
+DELETE_WORKERS = 16
 
-    for filename in os.listdir(folder):
-        file_path = os.path.join(folder, filename)
+
+def remove_paths(paths, workers=DELETE_WORKERS):
+    """
+    Delete files and folders concurrently
+    @return the number of deleted paths
+    """
+
+    def remove(path):
         try:
-            if os.path.isfile(file_path) or os.path.islink(file_path):
-                os.unlink(file_path)
-            elif os.path.isdir(file_path):
-                shutil.rmtree(file_path)
+            if os.path.isfile(path) or os.path.islink(path):
+                os.unlink(path)
+            elif os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                return 0
+            return 1
         except Exception as e:
-            print("Failed to delete %s. Reason: %s" % (file_path, e))
+            print("Failed to delete %s. Reason: %s" % (path, e))
+            return 0
 
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return sum(executor.map(remove, paths))
 
-def reset_compiled_contracts():
-    folder = "./build/contracts"
 
+def reset_folder(folder, workers=DELETE_WORKERS):
+    """Delete everything inside `folder`, files of large sub folders are deleted concurrently"""
+    if not os.path.isdir(folder):
+        return 0
+    paths = []
+    for root, _, filenames in os.walk(folder):
+        paths += [os.path.join(root, filename) for filename in filenames]
+    removed = remove_paths(paths, workers)
+    # only empty folders are left
     for filename in os.listdir(folder):
-        file_path = os.path.join(folder, filename)
-        try:
-            if os.path.isfile(file_path) or os.path.islink(file_path):
-                os.unlink(file_path)
-            elif os.path.isdir(file_path):
-                shutil.rmtree(file_path)
-        except Exception as e:
-            print("Failed to delete %s. Reason: %s" % (file_path, e))
+        path = os.path.join(folder, filename)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+    return removed
 
-def reset_compiled_interfaces():
-    folder = "./build/interfaces"
 
-    for filename in os.listdir(folder):
-        file_path = os.path.join(folder, filename)
-        try:
-            if os.path.isfile(file_path) or os.path.islink(file_path):
-                os.unlink(file_path)
-            elif os.path.isdir(file_path):
-                shutil.rmtree(file_path)
-        except Exception as e:
-            print("Failed to delete %s. Reason: %s" % (file_path, e))
+def reset_depoyments(build_folder=BUILD_FOLDER):
+    return reset_folder(os.path.join(build_folder, "deployments"))
+
+
+def reset_compiled_contracts(build_folder=BUILD_FOLDER):
+    return reset_folder(os.path.join(build_folder, "contracts"))
+
+
+def reset_compiled_interfaces(build_folder=BUILD_FOLDER):
+    return reset_folder(os.path.join(build_folder, "interfaces"))
+
+
+def reset_registries(build_folder=BUILD_FOLDER):
+    return reset_folder(os.path.join(build_folder, "registry"))
+
+
+def clean_deployments(chain_id, keep=None, build_folder=BUILD_FOLDER, workers=DELETE_WORKERS):
+    """
+    Delete the deployments of `chain_id`, when `keep` is given the `keep` latest
+    deployments of each contract are kept, the deployments map is updated accordingly.
+    Without any kept deployment the chain is also dropped from the deploy.py manifest
+    and its registry is deleted, they would point to the removed contracts
+    @return the number of deleted deployment files
+    """
+    deployments_folder = os.path.join(build_folder, "deployments")
+    chain_folder = os.path.join(deployments_folder, str(chain_id))
+    map_path = os.path.join(deployments_folder, "map.json")
+
+    deployments_map = {}
+    if os.path.exists(map_path):
+        with open(map_path, "r") as map_file:
+            deployments_map = json.load(map_file)
+
+    if keep is None:
+        deployments_map.pop(str(chain_id), None)
+        kept = set()
+    else:
+        # brownie lists the addresses of each contract from the newest to the oldest
+        chain_map = {
+            name: addresses[: int(keep)]
+            for name, addresses in deployments_map.get(str(chain_id), {}).items()
+        }
+        deployments_map[str(chain_id)] = chain_map
+        kept = {address + ".json" for addresses in chain_map.values() for address in addresses}
+
+    stale = []
+    if os.path.isdir(chain_folder):
+        stale = [os.path.join(chain_folder, f) for f in os.listdir(chain_folder) if f not in kept]
+    removed = remove_paths(stale, workers)
+    if keep is None and os.path.isdir(chain_folder) and not os.listdir(chain_folder):
+        os.rmdir(chain_folder)
+
+    if os.path.exists(map_path):
+        with open(map_path, "w") as map_file:
+            json.dump(deployments_map, map_file, indent=2, sort_keys=True)
+
+    # the latest deployments are the active ones, they're only gone when none is kept
+    if keep is None or int(keep) == 0:
+        drop_manifest_chain(chain_id, os.path.join(deployments_folder, "manifest.json"))
+        remove_paths([registry_path(chain_id, os.path.join(build_folder, "registry"))], workers)
+    return removed
+
+
+def drop_manifest_chain(chain_id, manifest_path):
+    if not os.path.exists(manifest_path):
+        return
+    with open(manifest_path, "r") as manifest_file:
+        manifest = json.load(manifest_file)
+    if manifest.pop(str(chain_id), None) is not None:
+        with open(manifest_path, "w") as manifest_file:
+            json.dump(manifest, manifest_file, indent=2)
+
+
+def source_hash(path):
+    # same hash as brownie stores in the "sha1" field of the compiled artifacts
+    with open(path, "r") as source:
+        return hashlib.sha1(source.read().encode()).hexdigest()
+
+
+def stale_artifacts(build_folder=BUILD_FOLDER, project_folder="."):
+    """
+    Find the compiled contracts and interfaces whose source file changed or was
+    removed, artifacts depending on a stale artifact are stale too. Artifacts of
+    installed packages (outside of the project) are never stale
+    @return the paths of the stale artifacts
+    """
+    artifacts = {}
+    for kind in ["contracts", "interfaces"]:
+        folder = os.path.join(build_folder, kind)
+        if not os.path.isdir(folder):
+            continue
+        for filename in os.listdir(folder):
+            path = os.path.join(folder, filename)
+            if not filename.endswith(".json") or not os.path.isfile(path):
+                continue
+            with open(path, "r") as artifact_file:
+                artifact = json.load(artifact_file)
+            artifacts[artifact.get("contractName", filename[:-5])] = (path, artifact)
+
+    stale = set()
+    for name, (path, artifact) in artifacts.items():
+        if not artifact.get("sourcePath", "").startswith(("contracts/", "interfaces/")):
+            continue
+        source_path = os.path.join(project_folder, artifact["sourcePath"])
+        if not os.path.isfile(source_path) or source_hash(source_path) != artifact.get("sha1"):
+            stale.add(name)
+
+    # propagate to the artifacts compiled with a stale dependency
+    changed = True
+    while changed:
+        changed = False
+        for name, (_, artifact) in artifacts.items():
+            if name not in stale and stale.intersection(artifact.get("dependencies", [])):
+                stale.add(name)
+                changed = True
+
+    return sorted(artifacts[name][0] for name in stale)
+
+
+def clean_stale_artifacts(build_folder=BUILD_FOLDER, project_folder=".", workers=DELETE_WORKERS):
+    """@return the number of deleted artifacts"""
+    return remove_paths(stale_artifacts(build_folder, project_folder), workers)
+
+
+def clean(chain_id=None, keep=None):
+    if chain_id is not None:
+        removed = clean_deployments(chain_id, keep)
+        print("%d deployments removed for chain %s" % (removed, chain_id))
+    print("%d stale compiled artifacts removed" % clean_stale_artifacts())
+
 
-            
 def main():
     reset_depoyments()
     reset_compiled_contracts()
     reset_compiled_interfaces()
+    reset_registries()
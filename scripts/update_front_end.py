@@ -1,21 +1,101 @@
-import json, yaml, os, shutil
+import hashlib, json, os
+from scripts.registry import dump_registry, list_registries, registries_from_build
 
 # functions to copy smart contract data to the front end
 
+"""
+    The front end only imports the deployment registry of each network
+    (artifacts/deployments/<chain id>.json, see scripts/registry.py), so only those are
+    synced: files are written when their content hash changed and any other file is
+    pruned, unchanged artifacts are left untouched and don't trigger a front end rebuild
+"""
+
+BUILD_FOLDER = "./build"
+ARTIFACTS_FOLDER = "./front-end/src/artifacts"
+BROWNIE_CONFIG = "brownie-config.yaml"
+BROWNIE_CONFIG_JSON = "./front-end/src/utils/brownie-config.json"
+
+
 def copy_build_folder():
-    copy2frontend("./build", "./front-end/src/artifacts")
-    with open("brownie-config.yaml", "r") as brownie_config:
+    import yaml
+
+    written, removed = sync_artifacts(front_end_artifacts(BUILD_FOLDER), ARTIFACTS_FOLDER)
+    with open(BROWNIE_CONFIG, "r") as brownie_config:
         config_dict = yaml.load(brownie_config, Loader=yaml.FullLoader)
-        with open("./front-end/src/utils/brownie-config.json", 'w') as brownie_config_json:
-            json.dump(config_dict, brownie_config_json)
-    
-    print("front end updated !!!")
+    if write_if_changed(BROWNIE_CONFIG_JSON, json.dumps(config_dict).encode()):
+        written.append(BROWNIE_CONFIG_JSON)
+
+    print("front end updated !!! %d files written, %d removed" % (len(written), len(removed)))
+
+
+def front_end_artifacts(build_folder, registry_folder=None):
+    """
+    Collect the registries of the networks: the ones written by deploy.py and, for
+    the networks it didn't deploy to, a registry built from the brownie deployments map
+    @return a dict of the artifacts contents by relative path
+    """
+    registries = {r["chainId"]: r for r in registries_from_build(build_folder)}
+    registry_folder = registry_folder or os.path.join(build_folder, "registry")
+    registries.update({r["chainId"]: r for r in list_registries(registry_folder)})
+
+    return {
+        "deployments/%s.json" % chain_id: dump_registry(registry)
+        for chain_id, registry in sorted(registries.items())
+    }
 
-def copy2frontend(src, des):
+
+def sync_artifacts(artifacts, des):
+    """
+    Write the artifacts whose content changed in `des` and delete every other file
+    @return the list of written paths, the list of removed paths
+    """
+    written = []
+    for relative_path, content in artifacts.items():
+        path = os.path.join(des, relative_path)
+        if write_if_changed(path, content):
+            written.append(path)
+
+    expected = {os.path.normpath(os.path.join(des, p)) for p in artifacts}
+    removed = []
     if os.path.exists(des):
-        shutil.rmtree(des)
-    shutil.copytree(src, des)
+        for root, _, filenames in os.walk(des, topdown=False):
+            for filename in filenames:
+                path = os.path.normpath(os.path.join(root, filename))
+                if path not in expected:
+                    os.unlink(path)
+                    removed.append(path)
+            if root != des and not os.listdir(root):
+                os.rmdir(root)
+    return written, removed
+
+
+def write_if_changed(path, content):
+    """
+    Write `content` (bytes) to `path` unless the file already has the same content hash
+    @return True if the file was written
+    """
+    if os.path.exists(path) and file_hash(path) == hashlib.sha256(content).hexdigest():
+        return False
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return True
+
+
+def file_hash(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def folder_size(folder):
+    """@return the number of files in `folder` and their total size in bytes"""
+    count, size = 0, 0
+    for root, _, filenames in os.walk(folder):
+        for filename in filenames:
+            count += 1
+            size += os.path.getsize(os.path.join(root, filename))
+    return count, size
 
 
 def main():
-    copy_build_folder()
\ No newline at end of file
+    copy_build_folder()
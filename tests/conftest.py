@@ -0,0 +1,50 @@
+import pytest
+from brownie import network
+from scripts.deploy import deploy
+from scripts.helper_scripts import get_account, LOCAL_BLOCKCHAINS
+
+"""
+    Shared fixtures: the full marketplace is deployed once per test session
+    (once per worker with `brownie test -n auto`) and every test runs on top of
+    a chain snapshot taken right after that deployment, which is reverted when
+    the test ends so each test still starts from a freshly deployed system.
+"""
+
+
+@pytest.fixture(scope="session")
+def marketplace():
+    if network.show_active() not in LOCAL_BLOCKCHAINS:
+        pytest.skip()
+
+    return deploy()
+
+
+@pytest.fixture(scope="session")
+def admin():
+    return get_account()
+
+
+@pytest.fixture(scope="session")
+def administration(marketplace):
+    return marketplace[0]
+
+
+@pytest.fixture(scope="session")
+def market(marketplace):
+    return marketplace[1]
+
+
+@pytest.fixture(scope="session")
+def store_factory(marketplace):
+    return marketplace[2]
+
+
+@pytest.fixture(scope="session")
+def auction_market(marketplace):
+    return marketplace[3]
+
+
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    # session fixtures are set up before this one so the snapshot includes the deployment
+    pass
@@ -1,70 +1,14 @@
-import pytest, brownie, time
-from brownie import Market, StoreFactory, AuctionMarket, Administration, network
+import brownie, time
+from brownie import MockV3Aggregator
 from scripts.helper_scripts import (
     get_account,
-    deploy_mock,
+    get_contract,
     toWei,
-    LOCAL_BLOCKCHAINS,
     ZERO_ADDRESS,
 )
 
 
-def deploy_auction_market():
-    if network.show_active() not in LOCAL_BLOCKCHAINS:
-        pytest.skip()
-
-    admin = get_account()
-
-    price_feed = deploy_mock()
-
-    administration = Administration.deploy(price_feed.address, {"from": admin})
-
-    market = AuctionMarket.deploy(administration.address, {"from": admin})
-
-    set_tx = administration.setAuctionMarketContractAddress(market.address, {"from": admin})
-    set_tx.wait(1)
-
-    return admin, administration, market 
-
-def deploy_market():
-    if network.show_active() not in LOCAL_BLOCKCHAINS:
-        pytest.skip()
-
-    admin = get_account()
-
-    price_feed = deploy_mock()
-
-    administration = Administration.deploy(price_feed.address, {"from": admin})
-
-    market = Market.deploy(administration.address, {"from": admin})
-
-    set_tx = administration.setMarketContractAddress(market.address, {"from": admin})
-    set_tx.wait(1)
-
-    return admin, administration, market       
-
-def deploy_store_factory():
-    if network.show_active() not in LOCAL_BLOCKCHAINS:
-        pytest.skip()
-
-    admin = get_account()
-
-    price_feed = deploy_mock()
-
-    administration = Administration.deploy(price_feed.address, {"from": admin})
-
-    store_factory = StoreFactory.deploy(administration.address, {"from": admin})
-
-    set_tx = administration.setStoreFactoryAddress(store_factory.address, {"from": admin})
-    set_tx.wait(1)
-
-    return admin, administration, store_factory   
-
-
-
-def test_change_market_fee():
-    admin, administration, market = deploy_market()
-
+def test_change_market_fee(admin, administration, market):
     new_fee = 10 # 0.1%
     change_tx = administration.changeMarketFee(new_fee, {"from": admin})
     change_tx.wait(1)
@@ -72,22 +16,51 @@ def test_change_market_fee():
     market_fee = market.fee()
     assert market_fee == new_fee
 
-def test_change_auction_fee():
-    admin, administration, market = deploy_auction_market()
-
+def test_change_auction_fee(admin, administration, auction_market):
     new_fee = 10 # 0.1%
     change_tx = administration.changeAuctionFee(new_fee, {"from": admin})
     change_tx.wait(1)
 
-    auction_fee = market.fee()
+    auction_fee = auction_market.fee()
     assert auction_fee == new_fee
 
-def test_change_store_fee():
-    admin, administration, market = deploy_store_factory()
-
+def test_change_store_fee(admin, administration, store_factory):
     new_fee = 10 # 10$
     change_tx = administration.changeStoreFee(new_fee, {"from": admin})
     change_tx.wait(1)
 
-    store_fee = market.createStoreFee()
+    store_fee = store_factory.createStoreFee()
     assert store_fee == new_fee
+
+
+def test_price_cache_window(admin, administration):
+    price_feed = get_contract(MockV3Aggregator, administration.ethUsdPriceFeed())
+
+    assert administration.priceFeedDecimals() == 8
+
+    window_tx = administration.setPriceCacheWindow(3600, {"from": admin})
+    window_tx.wait(1)
+
+    # a conversion sent in a transaction fills the cache
+    convert_tx = administration.convertUSDToETH(toWei(3000), {"from": admin})
+    convert_tx.wait(1)
+    assert convert_tx.return_value == toWei(1)
+    assert administration.priceCache()[0] == 3000 * 10**8
+
+    update_tx = price_feed.updateAnswer(1500 * 10**8, {"from": admin})
+    update_tx.wait(1)
+
+    # the cached price is still used within the window
+    assert administration.quoteUSDToETH(toWei(3000)) == toWei(1)
+
+    window_tx = administration.setPriceCacheWindow(0, {"from": admin})
+    window_tx.wait(1)
+
+    # once the window is elapsed quotes read the price feed without updating the cache
+    assert administration.quoteUSDToETH(toWei(3000)) == toWei(2)
+    assert administration.priceCache()[0] == 3000 * 10**8
+
+def test_price_cache_window_admin_only(admin, administration):
+    with brownie.reverts("only admin can call this"):
+        window_tx = administration.setPriceCacheWindow(0, {"from": get_account(1)})
+        window_tx.wait(1)
@@ -0,0 +1,77 @@
+from brownie import chain
+from scripts.auction_keeper import run, settle_expired
+from scripts.helper_scripts import get_account, get_all_pages, toWei
+
+
+AUCTION_DURATION = 60
+AUCTION_STATUS = {"OPEN": 0, "ENDED": 1}
+
+
+def start_auctions(auction_market, seller, count, duration=AUCTION_DURATION):
+    for i in range(count):
+        start_tx = auction_market.startAuction(
+            "keeper test auction %d" % i, toWei(100), duration, {"from": seller}
+        )
+        start_tx.wait(1)
+
+
+def test_settle_expired_batches(auction_market):
+    seller = get_account(1)
+    keeper = get_account(2)
+
+    start_auctions(auction_market, seller, 12)
+    start_auctions(auction_market, seller, 2, duration=10 * 24 * 3600)
+
+    chain.sleep(AUCTION_DURATION + 1)
+    chain.mine()
+
+    # a budget fitting only a few settlements forces the batch to be split
+    one_settlement_gas = auction_market.settleExpired.estimate_gas([0], {"from": keeper})
+    settled, txs = settle_expired(auction_market, keeper, gas_budget=one_settlement_gas * 4)
+
+    auctions = get_all_pages(auction_market.getAuctions)
+
+    assert settled == 12
+    assert len(txs) > 1
+    assert [a[7] for a in auctions] == [AUCTION_STATUS["ENDED"]] * 12 + [AUCTION_STATUS["OPEN"]] * 2
+    assert auction_market.getExpiredAuctions(0, 100)[0] == []
+
+
+def test_settle_expired_after_idle_buckets(auction_market):
+    seller = get_account(1)
+    keeper = get_account(2)
+
+    # nothing settles while the auction runs, firstOpenBucket stays far behind its bucket
+    duration = 300 * 3600
+    start_auctions(auction_market, seller, 1, duration=duration)
+
+    chain.sleep(duration + 1)
+    chain.mine()
+
+    # one call only reads a bounded window of empty buckets
+    auction_ids, next_bucket = auction_market.getExpiredAuctions(0, 100)
+    assert auction_ids == []
+    assert next_bucket == auction_market.firstOpenBucket() + auction_market.MAX_BUCKETS_SCANNED()
+
+    settled, txs = settle_expired(auction_market, keeper)
+
+    assert settled == 1
+    assert len(txs) == 1
+
+
+def test_keeper_run(auction_market):
+    seller = get_account(1)
+    keeper = get_account(2)
+
+    start_auctions(auction_market, seller, 5)
+
+    chain.sleep(AUCTION_DURATION + 1)
+    chain.mine()
+
+    stats = run(auction_market, keeper, poll_interval=0, rounds=2)
+
+    assert stats.rounds == 2
+    assert stats.settled == 5
+    assert stats.transactions == 1
+    assert stats.gas_used > 0
+    assert "5 auctions settled" in stats.report()
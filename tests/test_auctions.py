@@ -1,44 +1,22 @@
-import pytest, brownie, time
-from brownie import AuctionMarket, Administration, network
+import brownie, time
 from scripts.helper_scripts import (
     get_account,
-    deploy_mock,
+    get_all_pages,
     toWei,
-    LOCAL_BLOCKCHAINS,
     ZERO_ADDRESS,
 )
 
 
-def deploy_auction_market():
-    if network.show_active() not in LOCAL_BLOCKCHAINS:
-        pytest.skip()
-
-    admin = get_account()
-
-    price_feed = deploy_mock()
-
-    administration = Administration.deploy(price_feed.address, {"from": admin})
-
-    market = AuctionMarket.deploy(administration.address, {"from": admin})
-
-    set_tx = administration.setAuctionMarketContractAddress(market.address, {"from": admin})
-    set_tx.wait(1)
-
-    return admin, market    
-
-
 AUCTION_DESCRIPTION_URI = "test description uri"
 AUCTION_START_PRICE = toWei(3000) # 100$
 AUCTION_DURATION_IN_UNIX = 10 * 24 * 3600 # 10 days
 
 AUCTION_STATUS = {"OPEN": 0, "ENDED": 1}
 
-def test_start_auction():
-    admin, market = deploy_auction_market()
-
+def test_start_auction(auction_market):
     seller = get_account(1)
 
-    start_tx = market.startAuction(
+    start_tx = auction_market.startAuction(
         AUCTION_DESCRIPTION_URI, 
         AUCTION_START_PRICE, 
         AUCTION_DURATION_IN_UNIX, 
@@ -50,28 +28,26 @@ def test_start_auction():
     end_time = start_time + AUCTION_DURATION_IN_UNIX
 
     auction_id = 0
-    auction_list = market.getAuctionsList()
+    auction_list = get_all_pages(auction_market.getAuctions)
 
     auction = auction_list[auction_id]
 
-    auction_price_in_eth = market._convertUSDToETH.call(AUCTION_START_PRICE)
+    auction_price_in_eth = auction_market.quoteUSDToETH(AUCTION_START_PRICE)
 
     assert len(auction_list) == 1
     assert auction[0] == auction_id
     assert auction[1] == seller
     assert auction[2] == AUCTION_DESCRIPTION_URI
-    assert auction[3] == AUCTION_START_PRICE
-    assert auction[4] == auction_price_in_eth
-    assert auction[5] == ZERO_ADDRESS
+    assert auction[3] == auction_price_in_eth
+    assert auction[4] == ZERO_ADDRESS
+    assert auction[5] == AUCTION_START_PRICE
     assert auction[6] == end_time
     assert auction[7] == AUCTION_STATUS["OPEN"]
 
-def test_bid():
-    admin, market = deploy_auction_market()
-
+def test_bid(auction_market):
     seller = get_account(1)
 
-    start_tx = market.startAuction(
+    start_tx = auction_market.startAuction(
         AUCTION_DESCRIPTION_URI, 
         AUCTION_START_PRICE, 
         AUCTION_DURATION_IN_UNIX, 
@@ -81,25 +57,23 @@ def test_bid():
 
     bidder = get_account(2)
     auction_id = 0
-    auction = market.getAuctionsList()[auction_id]
-    auction_highest_bid = auction[4] + toWei(0.2)
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+    auction_highest_bid = auction[3] + toWei(0.2)
 
-    bid_tx = market.bid(auction_id, {"from": bidder, "value": auction_highest_bid})
+    bid_tx = auction_market.bid(auction_id, {"from": bidder, "value": auction_highest_bid})
     bid_tx.wait(1)
 
-    auction = market.getAuctionsList()[auction_id]
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
 
-    bidder_bid_amount = market.getUserBidAmount(bidder, auction_id)
+    bidder_bid_amount = auction_market.getUserBidAmount(bidder, auction_id)
 
-    assert auction[5] == bidder
+    assert auction[4] == bidder
     assert bidder_bid_amount == auction_highest_bid
 
-def test_withdraw_bid():
-    admin, market = deploy_auction_market()
-
+def test_withdraw_bid(auction_market):
     seller = get_account(1)
 
-    start_tx = market.startAuction(
+    start_tx = auction_market.startAuction(
         AUCTION_DESCRIPTION_URI, 
         AUCTION_START_PRICE, 
         AUCTION_DURATION_IN_UNIX, 
@@ -109,34 +83,75 @@ def test_withdraw_bid():
 
     bidder_1 = get_account(2)
     auction_id = 0
-    auction = market.getAuctionsList()[auction_id]
-    highest_bid_1 = auction[4] + toWei(0.2)
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+    highest_bid_1 = auction[3] + toWei(0.2)
 
-    bid_tx = market.bid(auction_id, {"from": bidder_1, "value": highest_bid_1})
+    bid_tx = auction_market.bid(auction_id, {"from": bidder_1, "value": highest_bid_1})
     bid_tx.wait(1)
 
     bidder_2 = get_account(3)
 
-    auction = market.getAuctionsList()[auction_id]
-    highest_bid_2 = auction[4] + toWei(0.1)
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+    highest_bid_2 = auction[3] + toWei(0.1)
 
-    bid_tx = market.bid(auction_id, {"from": bidder_2, "value": highest_bid_2})
+    bid_tx = auction_market.bid(auction_id, {"from": bidder_2, "value": highest_bid_2})
     bid_tx.wait(1)
 
     # bidder 1 can now withdraw it's bid
-    withdraw_tx = market.withdrawBid(auction_id, {"from": bidder_1})
+    withdraw_tx = auction_market.withdrawBid(auction_id, {"from": bidder_1})
     withdraw_tx.wait(1)
 
-    bidder_1_bid_amount = market.getUserBidAmount(bidder_1, auction_id)
+    bidder_1_bid_amount = auction_market.getUserBidAmount(bidder_1, auction_id)
 
     assert bidder_1_bid_amount == 0
 
-def test_bid_less():
-    admin, market = deploy_auction_market()
+def test_withdraw_bids(auction_market):
+    seller = get_account(1)
+    bidder_1 = get_account(2)
+    bidder_2 = get_account(3)
+
+    for _ in range(3):
+        start_tx = auction_market.startAuction(
+            AUCTION_DESCRIPTION_URI, 
+            AUCTION_START_PRICE, 
+            AUCTION_DURATION_IN_UNIX, 
+            {"from": seller}
+            )
+        start_tx.wait(1)
+
+    start_bid = get_all_pages(auction_market.getAuctions)[0][3]
+
+    # bidder 1 is outbid on auctions 0 and 1 and stays the highest bidder on auction 2
+    for auction_id in range(3):
+        bid_tx = auction_market.bid(auction_id, {"from": bidder_1, "value": start_bid + toWei(0.1)})
+        bid_tx.wait(1)
+    for auction_id in range(2):
+        bid_tx = auction_market.bid(auction_id, {"from": bidder_2, "value": start_bid + toWei(0.2)})
+        bid_tx.wait(1)
+
+    with brownie.reverts("Highest Bidder can withdraw funds"):
+        withdraw_tx = auction_market.withdrawBids([0, 2], {"from": bidder_1})
+        withdraw_tx.wait(1)
 
+    bidder_1_initial_balance = bidder_1.balance()
+
+    withdraw_tx = auction_market.withdrawBids([0, 1], {"from": bidder_1})
+    withdraw_tx.wait(1)
+
+    assert bidder_1.balance() == bidder_1_initial_balance + 2 * (start_bid + toWei(0.1))
+    assert auction_market.getUserBidAmount(bidder_1, 0) == 0
+    assert auction_market.getUserBidAmount(bidder_1, 1) == 0
+    assert auction_market.getUserBidAmount(bidder_1, 2) == start_bid + toWei(0.1)
+    assert len(withdraw_tx.events["BidWithdrawn"]) == 2
+
+    with brownie.reverts("No Bid found on this auction"):
+        withdraw_tx = auction_market.withdrawBids([0], {"from": bidder_1})
+        withdraw_tx.wait(1)
+
+def test_bid_less(auction_market):
     seller = get_account(1)
 
-    start_tx = market.startAuction(
+    start_tx = auction_market.startAuction(
         AUCTION_DESCRIPTION_URI, 
         AUCTION_START_PRICE, 
         AUCTION_DURATION_IN_UNIX, 
@@ -146,27 +161,25 @@ def test_bid_less():
 
     bidder_1 = get_account(2)
     auction_id = 0
-    auction = market.getAuctionsList()[auction_id]
-    highest_bid_1 = auction[4] + toWei(0.2)
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+    highest_bid_1 = auction[3] + toWei(0.2)
 
-    bid_tx = market.bid(auction_id, {"from": bidder_1, "value": highest_bid_1})
+    bid_tx = auction_market.bid(auction_id, {"from": bidder_1, "value": highest_bid_1})
     bid_tx.wait(1)
 
     bidder_2 = get_account(3)
 
-    auction = market.getAuctionsList()[auction_id]
-    highest_bid_2 = auction[4]
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+    highest_bid_2 = auction[3]
 
     with brownie.reverts("insuffisant amount"):
-        bid_tx = market.bid(auction_id, {"from": bidder_2, "value": highest_bid_2})
+        bid_tx = auction_market.bid(auction_id, {"from": bidder_2, "value": highest_bid_2})
         bid_tx.wait(1)
 
-def test_bid_twice():
-    admin, market = deploy_auction_market()
-
+def test_bid_twice(auction_market):
     seller = get_account(1)
 
-    start_tx = market.startAuction(
+    start_tx = auction_market.startAuction(
         AUCTION_DESCRIPTION_URI, 
         AUCTION_START_PRICE, 
         AUCTION_DURATION_IN_UNIX, 
@@ -177,39 +190,37 @@ def test_bid_twice():
     bidder_1 = get_account(2)
     auction_id = 0
 
-    auction = market.getAuctionsList()[auction_id]
-    highest_bid_1 = auction[4] + toWei(0.2)
-    bid_tx = market.bid(auction_id, {"from": bidder_1, "value": highest_bid_1})
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+    highest_bid_1 = auction[3] + toWei(0.2)
+    bid_tx = auction_market.bid(auction_id, {"from": bidder_1, "value": highest_bid_1})
     bid_tx.wait(1)
 
     bidder_2 = get_account(3)
 
-    auction = market.getAuctionsList()[auction_id]
-    highest_bid_2 = auction[4] + toWei(0.1)
-    bid_tx = market.bid(auction_id, {"from": bidder_2, "value": highest_bid_2})
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+    highest_bid_2 = auction[3] + toWei(0.1)
+    bid_tx = auction_market.bid(auction_id, {"from": bidder_2, "value": highest_bid_2})
     bid_tx.wait(1)
 
-    auction = market.getAuctionsList()[auction_id]
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
     bidder_1_outbid = toWei(0.2)
-    bid_tx = market.bid(auction_id, {"from": bidder_1, "value": bidder_1_outbid})
+    bid_tx = auction_market.bid(auction_id, {"from": bidder_1, "value": bidder_1_outbid})
     bid_tx.wait(1)
 
-    bidder_1_bid_amount = market.getUserBidAmount(bidder_1, auction_id) 
+    bidder_1_bid_amount = auction_market.getUserBidAmount(bidder_1, auction_id) 
 
-    auction = market.getAuctionsList()[auction_id]
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
 
-    new_highest_bid = auction[4]
+    new_highest_bid = auction[3]
 
-    assert auction[5] == bidder_1
+    assert auction[4] == bidder_1
     assert bidder_1_bid_amount == new_highest_bid
     
 
-def test_outbid():
-    admin, market = deploy_auction_market()
-
+def test_outbid(auction_market):
     seller = get_account(1)
 
-    start_tx = market.startAuction(
+    start_tx = auction_market.startAuction(
         AUCTION_DESCRIPTION_URI, 
         AUCTION_START_PRICE, 
         AUCTION_DURATION_IN_UNIX, 
@@ -220,32 +231,30 @@ def test_outbid():
     bidder_1 = get_account(2)
     auction_id = 0
 
-    auction = market.getAuctionsList()[auction_id]
-    highest_bid_1 = auction[4] + toWei(0.2)
-    bid_tx = market.bid(auction_id, {"from": bidder_1, "value": highest_bid_1})
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+    highest_bid_1 = auction[3] + toWei(0.2)
+    bid_tx = auction_market.bid(auction_id, {"from": bidder_1, "value": highest_bid_1})
     bid_tx.wait(1)
 
     bidder_2 = get_account(3)
 
-    auction = market.getAuctionsList()[auction_id]
-    highest_bid_2 = auction[4] + toWei(0.1)
-    bid_tx = market.bid(auction_id, {"from": bidder_2, "value": highest_bid_2})
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+    highest_bid_2 = auction[3] + toWei(0.1)
+    bid_tx = auction_market.bid(auction_id, {"from": bidder_2, "value": highest_bid_2})
     bid_tx.wait(1)
 
-    bidder_2_bid_amount = market.getUserBidAmount(bidder_2, auction_id) 
+    bidder_2_bid_amount = auction_market.getUserBidAmount(bidder_2, auction_id) 
 
-    auction = market.getAuctionsList()[auction_id]
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
 
-    assert auction[4] == highest_bid_2
-    assert auction[5] == bidder_2
+    assert auction[3] == highest_bid_2
+    assert auction[4] == bidder_2
     assert bidder_2_bid_amount == highest_bid_2
 
-def test_end_auction_before_fullDuration():
-    admin, market = deploy_auction_market()
-
+def test_end_auction_before_fullDuration(auction_market):
     seller = get_account(1)
 
-    start_tx = market.startAuction(
+    start_tx = auction_market.startAuction(
         AUCTION_DESCRIPTION_URI, 
         AUCTION_START_PRICE, 
         AUCTION_DURATION_IN_UNIX, 
@@ -255,24 +264,22 @@ def test_end_auction_before_fullDuration():
 
     bidder = get_account(2)
     auction_id = 0
-    auction = market.getAuctionsList()[auction_id]
-    auction_highest_bid = auction[4] + toWei(0.2)
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+    auction_highest_bid = auction[3] + toWei(0.2)
 
-    bid_tx = market.bid(auction_id, {"from": bidder, "value": auction_highest_bid})
+    bid_tx = auction_market.bid(auction_id, {"from": bidder, "value": auction_highest_bid})
     bid_tx.wait(1)
 
     # Ensure that seller can not end auction before the end of the period
     with brownie.reverts("Auction Period not reached yet"):
-        end_tx = market.endAuction(auction_id, {"from": seller})
+        end_tx = auction_market.endAuction(auction_id, {"from": seller})
         end_tx.wait(1)
 
-def test_end_auction_after_fullDuration():
-    admin, market = deploy_auction_market()
-
+def test_end_auction_after_fullDuration(auction_market):
     seller = get_account(1)
 
     test_duration = 10 # 10 seconds
-    start_tx = market.startAuction(
+    start_tx = auction_market.startAuction(
         AUCTION_DESCRIPTION_URI, 
         AUCTION_START_PRICE, 
         test_duration, 
@@ -284,24 +291,151 @@ def test_end_auction_after_fullDuration():
 
     bidder = get_account(2)
     auction_id = 0
-    auction = market.getAuctionsList()[auction_id]
-    auction_highest_bid = auction[4] + toWei(0.2)
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+    auction_highest_bid = auction[3] + toWei(0.2)
 
-    bid_tx = market.bid(auction_id, {"from": bidder, "value": auction_highest_bid})
+    bid_tx = auction_market.bid(auction_id, {"from": bidder, "value": auction_highest_bid})
     bid_tx.wait(1)
 
     time.sleep(10)
 
-    end_tx = market.endAuction(auction_id, {"from": seller})
+    end_tx = auction_market.endAuction(auction_id, {"from": seller})
     end_tx.wait(1)
 
+    withdraw_tx = auction_market.withdraw({"from": seller})
+    withdraw_tx.wait(1)
+
     seller_final_balance = seller.balance()
 
-    auction = market.getAuctionsList()[auction_id]
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
 
-    highest_bid = auction[4]
+    highest_bid = auction[3]
 
-    fee = market.fee()
+    fee = auction_market.fee()
 
     assert auction[7] == AUCTION_STATUS["ENDED"]
-    assert seller_final_balance == float(seller_initial_balance) + (float(highest_bid)* (1000 - fee)) / 1000
\ No newline at end of file
+    assert seller_final_balance == float(seller_initial_balance) + (float(highest_bid)* (1000 - fee)) / 1000
+
+    with brownie.reverts("Auction already ended"):
+        end_tx = auction_market.endAuction(auction_id, {"from": seller})
+        end_tx.wait(1)
+
+def test_end_auction_without_bids(auction_market):
+    seller = get_account(1)
+
+    start_tx = auction_market.startAuction(
+        AUCTION_DESCRIPTION_URI, 
+        AUCTION_START_PRICE, 
+        10, 
+        {"from": seller}
+        )
+    start_tx.wait(1)
+
+    brownie.chain.sleep(10)
+
+    end_tx = auction_market.endAuction(0, {"from": seller})
+    end_tx.wait(1)
+
+    # the start price was never paid so nothing is credited
+    assert auction_market.credits(seller) == 0
+    assert auction_market.credits(auction_market.factory()) == 0
+def test_settle_expired(auction_market):
+    seller = get_account(1)
+    bidder = get_account(2)
+    keeper = get_account(3)
+
+    for duration in [10, 10, AUCTION_DURATION_IN_UNIX]:
+        start_tx = auction_market.startAuction(
+            AUCTION_DESCRIPTION_URI, 
+            AUCTION_START_PRICE, 
+            duration, 
+            {"from": seller}
+            )
+        start_tx.wait(1)
+
+    auction = get_all_pages(auction_market.getAuctions)[0]
+    bid_tx = auction_market.bid(0, {"from": bidder, "value": auction[3] + toWei(0.2)})
+    bid_tx.wait(1)
+
+    assert auction_market.getExpiredAuctions(0, 10)[0] == []
+
+    brownie.chain.sleep(20)
+    brownie.chain.mine()
+
+    bucket_size = auction_market.END_TIME_BUCKET()
+    expired, next_bucket = auction_market.getExpiredAuctions(0, 10)
+    assert expired == [0, 1]
+    assert next_bucket > brownie.chain[-1].timestamp // bucket_size
+    # a full page resumes in the bucket of the next expired auction
+    second_bucket = get_all_pages(auction_market.getAuctions)[1][6] // bucket_size
+    assert auction_market.getExpiredAuctions(0, 1) == ([0], second_bucket)
+
+    with brownie.reverts("invalid limit"):
+        auction_market.getExpiredAuctions(0, 0)
+
+    # anyone can settle, the auction still running is skipped
+    settle_tx = auction_market.settleExpired([0, 1, 2], {"from": keeper})
+    settle_tx.wait(1)
+
+    auctions = get_all_pages(auction_market.getAuctions)
+
+    assert settle_tx.return_value == 2
+    assert [a[7] for a in auctions] == [AUCTION_STATUS["ENDED"], AUCTION_STATUS["ENDED"], AUCTION_STATUS["OPEN"]]
+    highest_bid = auction[3] + toWei(0.2)
+    assert auction_market.credits(seller) == highest_bid * (1000 - auction_market.fee()) // 1000
+    assert auction_market.getExpiredAuctions(0, 10)[0] == []
+
+    with brownie.reverts("Auction already ended"):
+        end_tx = auction_market.endAuction(0, {"from": seller})
+        end_tx.wait(1)
+
+    # settled buckets are skipped while the one of the running auction is kept
+    brownie.chain.sleep(3 * bucket_size)
+    settle_tx = auction_market.settleExpired([], {"from": keeper})
+    settle_tx.wait(1)
+
+    assert auction_market.firstOpenBucket() == settle_tx.timestamp // bucket_size
+    assert auction_market.openAuctionsEndingIn(auctions[2][6] // bucket_size) == 1
+
+def test_auctions_filters(auction_market):
+    seller_1 = get_account(1)
+    seller_2 = get_account(2)
+
+    for seller in [seller_1, seller_2, seller_1]:
+        start_tx = auction_market.startAuction(
+            AUCTION_DESCRIPTION_URI, 
+            AUCTION_START_PRICE, 
+            AUCTION_DURATION_IN_UNIX, 
+            {"from": seller}
+            )
+        start_tx.wait(1)
+
+    bidder = get_account(3)
+    auction_id = 1
+    auction = get_all_pages(auction_market.getAuctions)[auction_id]
+
+    bid_tx = auction_market.bid(auction_id, {"from": bidder, "value": auction[3] + toWei(0.2)})
+    bid_tx.wait(1)
+
+    # an outbid bidder still finds the auction, a raised bid doesn't list it twice
+    bidder_2 = get_account(4)
+    for amount in [toWei(0.3), toWei(0.2)]:
+        bid_tx = auction_market.bid(auction_id, {"from": bidder_2, "value": auction[3] + amount})
+        bid_tx.wait(1)
+
+    page, next_cursor = auction_market.getAuctions(0, 2)
+    assert [a[0] for a in page] == [0, 1]
+    assert next_cursor == 2
+
+    seller_1_auctions = get_all_pages(auction_market.getAuctionsBySeller, seller_1, page_size=1)
+    bidder_auctions = get_all_pages(auction_market.getAuctionsByBidder, bidder)
+    bidder_2_auctions = get_all_pages(auction_market.getAuctionsByBidder, bidder_2)
+    open_auctions = get_all_pages(auction_market.getAuctionsByStatus, AUCTION_STATUS["OPEN"])
+
+    assert [a[0] for a in seller_1_auctions] == [0, 2]
+    assert [a[0] for a in bidder_auctions] == [1]
+    assert [a[0] for a in bidder_2_auctions] == [1]
+    assert bidder_2_auctions[0][4] == bidder_2
+    assert auction_market.getBidderAuctionsCount(bidder_2) == 1
+    assert [a[0] for a in open_auctions] == [0, 1, 2]
+    assert auction_market.getAuctionsCount() == 3
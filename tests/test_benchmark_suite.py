@@ -0,0 +1,42 @@
+from scripts.benchmark_suite import find_regressions
+
+
+def make_report(add_product_gas, get_products_gas):
+    return {
+        "gas": {"Market.addProduct": add_product_gas, "Market.purchase": 60000},
+        "views": {
+            "Market.getProducts": {"100": {"gas": get_products_gas, "ms": 1.2, "bytes": 1024}},
+            "Market.getAllProducts": {"1000": {"gas": None, "ms": "failed", "bytes": None}},
+        },
+    }
+
+
+def test_find_regressions():
+    baseline = make_report(100000, 50000)
+
+    # changes below the threshold and improvements are not regressions
+    assert find_regressions(make_report(104000, 40000), baseline, 5) == []
+
+    regressions = find_regressions(make_report(110000, 60000), baseline, 5)
+    assert regressions == [
+        ("Market.addProduct", 100000, 110000, 10.0),
+        ("Market.getProducts[100]", 50000, 60000, 20.0),
+    ]
+    assert find_regressions(make_report(110000, 60000), baseline, 15) == [
+        ("Market.getProducts[100]", 50000, 60000, 20.0),
+    ]
+
+
+def test_find_regressions_unmeasured():
+    baseline = make_report(100000, 50000)
+
+    # a view failing in both reports is not a regression
+    report = make_report(100000, 50000)
+    assert find_regressions(report, baseline, 5) == []
+
+    report["views"]["Market.getProducts"]["100"]["gas"] = None
+    del report["gas"]["Market.purchase"]
+    assert find_regressions(report, baseline, 5) == [
+        ("Market.getProducts[100]", 50000, "failed", None),
+        ("Market.purchase", 60000, "missing", None),
+    ]
@@ -0,0 +1,74 @@
+import json
+from scripts.bulk_import import (
+    load_catalog,
+    chunk_catalog,
+    estimate_listing_gas,
+    import_catalog,
+    MARKET_LISTING_SLOTS,
+    BATCH_BASE_GAS,
+)
+from scripts.metadata import LocalIPFS, get_product_metadata
+from scripts.helper_scripts import (
+    get_all_pages,
+    toWei,
+)
+
+
+def write_catalog(tmp_path, size):
+    catalog_path = tmp_path / "catalog.jsonl"
+    with open(catalog_path, "w") as catalog:
+        for i in range(size):
+            item = {
+                "name": "product %d" % i,
+                "description": "product description " * 3,
+                "image": "ipfs://product-image-%d" % i,
+                "price": "12.5",
+            }
+            catalog.write(json.dumps(item) + "\n")
+    return catalog_path
+
+
+def test_load_catalog(tmp_path):
+    csv_path = tmp_path / "catalog.csv"
+    csv_path.write_text(
+        "name,description,image,price,quantity,type\n"
+        "shoes,running shoes,ipfs://shoes,99.9,10,fixed\n"
+        "ebook,,ipfs://ebook,5,,UNLIMITED\n"
+    )
+
+    items = load_catalog(str(csv_path), LocalIPFS(str(tmp_path / "ipfs")))
+
+    assert items[0]["name"] == "shoes"
+    assert get_product_metadata(items[0]["metadata_hash"], LocalIPFS(str(tmp_path / "ipfs"))) == {
+        "name": "shoes",
+        "description": "running shoes",
+        "image": "ipfs://shoes",
+    }
+    assert items[0]["price"] == toWei("99.9")
+    assert items[0]["quantity"] == 10
+    assert items[0]["type"] == 0
+    assert items[1]["quantity"] == 1
+    assert items[1]["type"] == 1
+
+def test_chunk_catalog(tmp_path):
+    items = load_catalog(str(write_catalog(tmp_path, 50)), LocalIPFS(str(tmp_path / "ipfs")))
+
+    item_gas = estimate_listing_gas(MARKET_LISTING_SLOTS)
+    gas_budget = BATCH_BASE_GAS + 8 * item_gas
+
+    chunks = chunk_catalog(items, gas_budget)
+
+    assert [len(c) for c in chunks] == [8] * 6 + [2]
+    assert sum(chunks, []) == items
+
+def test_import_catalog(admin, market, tmp_path):
+    items = load_catalog(str(write_catalog(tmp_path, 30)), LocalIPFS(str(tmp_path / "ipfs")))
+
+    txs = import_catalog(market, items, admin)
+
+    products = get_all_pages(market.getProducts)
+
+    assert len(products) == 30
+    assert [p[2] for p in products] == [item["metadata_hash"] for item in items]
+    assert products[0][3] == toWei(12.5)
+    assert len(txs) < len(items)
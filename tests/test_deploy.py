@@ -0,0 +1,30 @@
+import json
+from brownie import web3
+from scripts.deploy import deploy
+
+
+def test_deploy_resume(marketplace, admin, tmp_path):
+    manifest_path = str(tmp_path / "manifest.json")
+
+    administration, market, store_factory, auction_market = deploy(manifest_path)
+    assert administration.marketContractAddress() == market.address
+    assert administration.storeFactoryAddress() == store_factory.address
+    assert administration.auctionMarketContractAddress() == auction_market.address
+
+    # everything is reused when the manifest is up to date
+    nonce = admin.nonce
+    assert deploy(manifest_path) == (administration, market, store_factory, auction_market)
+    assert admin.nonce == nonce
+
+    # a run interrupted before the StoreFactory deployment only deploys and wires it
+    with open(manifest_path, "r") as manifest_file:
+        manifest = json.load(manifest_file)
+    manifest[str(web3.chain_id)].pop("StoreFactory")
+    with open(manifest_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file)
+
+    _, resumed_market, resumed_store_factory, _ = deploy(manifest_path)
+    assert resumed_market == market
+    assert resumed_store_factory != store_factory
+    assert administration.storeFactoryAddress() == resumed_store_factory.address
+    assert admin.nonce == nonce + 2
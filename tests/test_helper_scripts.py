@@ -0,0 +1,107 @@
+import pytest
+from brownie import Store, web3
+from scripts.metadata import build_metadata, metadata_hash
+from scripts.helper_scripts import (
+    get_account,
+    get_all_pages,
+    get_contract,
+    fixed_gas_price,
+    toWei,
+    split_to_fit,
+    ContractCache,
+    TxPipeline,
+    TxPipelineError,
+)
+
+PRODUCT_METADATA_HASH = metadata_hash(build_metadata("pipeline product", "pipeline product description", "ipfs://pipeline-image"))
+PRODUCT_PRICE = toWei(100)
+
+
+def test_tx_pipeline(market, auction_market):
+    seller = get_account(1)
+    bidder = get_account(2)
+
+    with TxPipeline(seller, depth=4) as pipeline:
+        for _ in range(10):
+            pipeline.send(market.addProduct, PRODUCT_METADATA_HASH, PRODUCT_PRICE)
+        pipeline.send(auction_market.startAuction, "pipeline auction", toWei(1), 3600)
+
+    assert pipeline.in_flight == []
+    assert pipeline.failed == []
+    assert len(get_all_pages(market.getProducts)) == 10
+
+    bids = TxPipeline(bidder, gas_price=fixed_gas_price(web3.eth.gas_price))
+    first_nonce = bids.nonces.next_nonce
+    for amount in [2, 1, 1]:
+        bids.send(auction_market.bid, 0, value=toWei(amount))
+    bid_txs = bids.flush()
+
+    # consecutive nonces, mined in sending order
+    assert [tx.nonce for tx in bid_txs] == [first_nonce, first_nonce + 1, first_nonce + 2]
+    assert [tx.status for tx in bid_txs] == [1, 1, 1]
+    assert [tx.events["BidPlaced"]["amount"] for tx in bid_txs] == [toWei(2), toWei(3), toWei(4)]
+    assert bids.flush() == []
+
+
+def test_tx_pipeline_reverted(market):
+    seller = get_account(1)
+
+    # the gas limit skips the estimation, so the reverting transaction is sent
+    pipeline = TxPipeline(seller, gas_limit=500000)
+    pipeline.send(market.addProduct, PRODUCT_METADATA_HASH, PRODUCT_PRICE)
+    reverted = pipeline.send(market.sendProduct, 0)
+    pipeline.send(market.addProduct, PRODUCT_METADATA_HASH, PRODUCT_PRICE)
+
+    with pytest.raises(TxPipelineError) as error:
+        pipeline.flush()
+
+    assert [tx.txid for tx in error.value.failed] == [reverted.txid]
+    assert reverted.status == 0
+    # the transactions sent after the reverted one are still mined
+    assert len(get_all_pages(market.getProducts)) == 2
+    assert pipeline.flush() == []
+
+
+def test_get_contract_reuses_handles(store_factory):
+    owner = get_account(1)
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+    store_factory.createStore("cached store", {"from": owner, "value": create_store_fee})
+    store_address = store_factory.getStoresByOwner(owner)[0]
+
+    store = get_contract(Store, store_address)
+    assert get_contract(Store, store_address.lower()) is store
+    assert store.owner() == owner
+
+
+def test_contract_cache_eviction():
+    class Container:
+        _name = "Store"
+        abi = [{"type": "function", "name": "owner"}]
+
+    built = []
+    cache = ContractCache(maxsize=2, factory=lambda name, address, abi: built.append(address) or (name, address))
+
+    first = cache.get(Container, "0x01")
+    cache.get(Container, "0x02")
+    assert cache.get(Container, "0x01") is first
+    # 0x02 is the least recently used handle
+    cache.get(Container, "0x03")
+    assert list(cache.handles) == [("Store", "0x01"), ("Store", "0x03")]
+    cache.get(Container, "0x02")
+
+    assert (cache.hits, cache.misses) == (1, 4)
+    # an evicted handle is built again
+    assert built == ["0x01", "0x02", "0x03", "0x02"]
+
+
+def test_split_to_fit():
+    estimates = []
+
+    def estimate_gas(part):
+        estimates.append(part)
+        return 100 * len(part)
+
+    assert split_to_fit(list(range(5)), estimate_gas, 250) == [[0, 1], [2], [3, 4]]
+    assert split_to_fit([0], estimate_gas, 50) == [[0]]
+    # single items are sent as they are, without an estimate
+    assert [0] not in estimates
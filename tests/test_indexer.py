@@ -0,0 +1,87 @@
+from brownie import Store, chain
+from scripts.indexer import MarketplaceIndexer
+from scripts.metadata import build_metadata, metadata_hash
+from scripts.helper_scripts import get_account, get_contract, toWei
+
+
+PRODUCT_METADATA_HASH = metadata_hash(build_metadata("test product", "test description", "test product image IPFS url"))
+PRODUCT_PRICE = toWei(100)
+AUCTION_DURATION = 3600
+
+
+def create_store(store_factory, owner):
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+    create_tx = store_factory.createStore("store meta data", {"from": owner, "value": create_store_fee})
+    create_tx.wait(1)
+    return get_contract(Store, create_tx.events["StoreCreated"]["storeAddress"])
+
+
+def test_indexer_end_to_end(market, store_factory, auction_market, tmp_path):
+    start_block = chain.height
+
+    seller = get_account(1)
+    buyer = get_account(2)
+    bidder = get_account(3)
+
+    database = str(tmp_path / "indexer.db")
+    indexer = MarketplaceIndexer(market, store_factory, auction_market, database, start_block)
+
+    # market products: one sold, one cancelled then still in sale, one removed
+    market.addProducts([PRODUCT_METADATA_HASH] * 3, [PRODUCT_PRICE] * 3, {"from": seller})
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
+    market.purchase(0, {"from": buyer, "value": price_in_eth})
+    market.sendProduct(0, {"from": seller})
+    market.confirmRecieved(0, {"from": buyer})
+    market.purchase(1, {"from": buyer, "value": price_in_eth})
+    market.cancelPurchase(1, {"from": buyer})
+    market.remove(2, {"from": seller})
+
+    store = create_store(store_factory, seller)
+    store.addProduct(PRODUCT_METADATA_HASH, PRODUCT_PRICE, 10, 0, {"from": seller})
+    store.createBuyOrder(0, 3, {"from": buyer, "value": store.quoteUSDToETH(PRODUCT_PRICE) * 3})
+
+    assert indexer.sync() > 0
+    assert indexer.checkpoint() == chain.height
+
+    catalog = indexer.catalog()
+    assert {(p["contract"], p["product_id"]) for p in catalog} == {(market.address, 1), (store.address, 0)}
+    assert [p["product_id"] for p in indexer.catalog(contract=market.address)] == [1]
+    assert indexer.catalog(contract=store.address)[0]["active_orders"] == 1
+    assert indexer.stores(seller)[0]["address"] == store.address
+
+    history = indexer.order_history(buyer.address)
+    assert [(p["product_id"], p["status"]) for p in history["purchases"]] == [(0, "SOLD"), (1, "CANCELLED")]
+    assert [(o["order_id"], o["quantity"], o["status"]) for o in history["orders"]] == [(0, 3, "PENDING")]
+
+    # incremental sync from the checkpoint: order lifecycle and an auction
+    store.fillOrder(0, {"from": seller})
+    store.confirmRecieved(0, {"from": buyer})
+    store.leaveReview(0, "5", "good product", {"from": buyer})
+
+    auction_market.startAuction("auction item uri", PRODUCT_PRICE, AUCTION_DURATION, {"from": seller})
+    start_bid = auction_market.quoteUSDToETH(PRODUCT_PRICE)
+    auction_market.bid(0, {"from": buyer, "value": start_bid + 1})
+    auction_market.bid(0, {"from": bidder, "value": start_bid + 2})
+    auction_market.withdrawBid(0, {"from": buyer})
+
+    indexer.sync()
+
+    store_product = indexer.catalog(contract=store.address)[0]
+    assert store_product["quantity"] == 7
+    assert store_product["active_orders"] == 0
+    assert indexer.store_orders(store.address, "COMPLETED")[0]["reviewed"] == 1
+    assert indexer.product_reviews(store.address, 0)[0]["review"] == "good product"
+
+    auction = indexer.auctions(status="OPEN")[0]
+    assert auction["highest_bidder"] == bidder.address
+    assert int(auction["highest_bid"]) == start_bid + 2
+    assert [b["bidder"] for b in indexer.bids(0)] == [bidder.address]
+
+    # a new indexer on the same database resumes from the checkpoint without replaying events
+    chain.sleep(AUCTION_DURATION + 1)
+    auction_market.endAuction(0, {"from": seller})
+
+    resumed = MarketplaceIndexer(market, store_factory, auction_market, database, start_block)
+    assert resumed.sync() == 1
+    assert resumed.auctions(status="ENDED")[0]["auction_id"] == 0
+    assert len(resumed.order_history(buyer.address)["purchases"]) == 2
@@ -0,0 +1,47 @@
+from scripts.load_generator import build_plan, parse_mix, percentile, run_load
+
+
+def test_build_plan_is_reproducible():
+    sellers, buyers = [0, 1], [2, 3, 4, 5]
+    plan = build_plan(7, 300, sellers, buyers)
+
+    assert build_plan(7, 300, sellers, buyers) == plan
+    assert build_plan(8, 300, sellers, buyers) != plan
+
+    # every operation only uses products, orders and auctions created earlier in the plan
+    shipped, confirmed = set(), set()
+    for action in plan:
+        key = (action["target"], action.get("store"), action["id"])
+        if action["op"] == "ship":
+            assert action["account"] in sellers
+            shipped.add(key)
+        elif action["op"] == "confirm":
+            assert key in shipped
+            confirmed.add(key)
+        elif action["op"] == "review":
+            assert key in confirmed
+        elif action["op"] in ["purchase", "bid"]:
+            assert action["account"] in buyers
+    assert {a["op"] for a in plan} == {"list", "purchase", "ship", "confirm", "review", "bid"}
+
+
+def test_parse_mix():
+    assert parse_mix("list=2, bid=1") == {"list": 2, "purchase": 0, "ship": 0, "confirm": 0, "review": 0, "bid": 1}
+    plan = build_plan(1, 50, [0], [1], "list=1,bid=1")
+    assert {a["op"] for a in plan} <= {"list", "bid"}
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 0.5) == 50
+    assert percentile(values, 0.99) == 99
+    assert percentile([], 0.5) is None
+
+
+def test_run_load(market, store_factory, auction_market):
+    stats = run_load(market, store_factory, auction_market, 60, seed=3, account_count=8)
+
+    summary = stats.summary()
+    assert summary["sent"] == 60
+    assert all(entry["errors"] == 0 for entry in summary["operations"].values())
+    assert all(entry["avg_gas"] > 0 for entry in summary["operations"].values())
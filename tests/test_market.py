@@ -1,74 +1,114 @@
-import pytest, brownie
-from brownie import Market, Administration, network
+import brownie
+from brownie import Administration
+from scripts.metadata import build_metadata, metadata_hash
 from scripts.helper_scripts import (
-    fromWei,
     get_account,
+    get_all_pages,
     get_contract,
-    deploy_mock,
     toWei,
-    LOCAL_BLOCKCHAINS,
     ZERO_ADDRESS,
 )
 
 # Product information used for testing
-PRODUCT_NAME = "test product"
-PRODUCT_DESCRIPTION = "test description"
-PRODUCT_IMAGE = "test product image"
+PRODUCT_METADATA_HASH = metadata_hash(build_metadata("test product", "test description", "test product image"))
 PRODUCT_PRICE = toWei(100) # 100$
 
 PRODUCT_STATUS = {"INSALE": 1, "PENDING": 2, "SENT": 3, "SOLD": 4}
 
 
-def test_add_product():
-
-    if network.show_active() not in LOCAL_BLOCKCHAINS:
-        pytest.skip()
-
-    admin, market = deploy()
-
+def test_add_product(market):
     seller = get_account(1)
 
     add_tx = market.addProduct(
-        PRODUCT_NAME, PRODUCT_DESCRIPTION, PRODUCT_IMAGE, PRODUCT_PRICE, {"from": seller}
+        PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": seller}
     )
     add_tx.wait(1)
 
     product_id = 0
-    products = market.getAllProducts()
+    products = get_all_pages(market.getProducts)
     product = products[product_id]
 
     assert product[0] == 0 # id
     assert product[1] == seller # seller
-    assert product[2] == PRODUCT_NAME
-    assert product[3] == PRODUCT_DESCRIPTION
-    assert product[4] == PRODUCT_IMAGE
-    assert product[5] == PRODUCT_PRICE
-    assert product[6] == 0
-    assert product[7] == ZERO_ADDRESS # buyer
-    assert product[8] == PRODUCT_STATUS["INSALE"]
-    assert len(market.getAllProducts()) == 1
+    assert product[2] == PRODUCT_METADATA_HASH
+    assert product[3] == PRODUCT_PRICE
+    assert product[4] == 0
+    assert product[5] == ZERO_ADDRESS # buyer
+    assert product[6] == PRODUCT_STATUS["INSALE"]
+    assert len(get_all_pages(market.getProducts)) == 1
+
+def test_add_products(market):
+    seller = get_account(1)
+
+    metadata_hashes = [metadata_hash(build_metadata("test product %d" % i, "", "")) for i in range(3)]
+    add_tx = market.addProducts(
+        metadata_hashes,
+        [PRODUCT_PRICE] * 3,
+        {"from": seller}
+    )
+    add_tx.wait(1)
+
+    products = get_all_pages(market.getProducts)
 
-def test_convert_price_to_eth():
+    assert [p[2] for p in products] == metadata_hashes
+    assert all(p[1] == seller and p[6] == PRODUCT_STATUS["INSALE"] for p in products)
+    assert market.getSellerProductsCount(seller) == 3
 
-    admin, market = deploy()
+    with brownie.reverts("invalid batch"):
+        add_tx = market.addProducts(metadata_hashes, [], {"from": seller})
+        add_tx.wait(1)
 
+def test_bulk_change_prices_and_remove(admin, market):
+    seller = get_account(1)
+
+    add_tx = market.addProducts(
+        [PRODUCT_METADATA_HASH] * 3,
+        [PRODUCT_PRICE] * 3,
+        {"from": seller}
+    )
+    add_tx.wait(1)
+
+    change_tx = market.changePrices([0, 2], [toWei(10), toWei(20)], {"from": seller})
+    change_tx.wait(1)
+
+    remove_tx = market.removeProducts([1], {"from": seller})
+    remove_tx.wait(1)
+
+    products = get_all_pages(market.getProducts)
+
+    # the last product is moved into the position of the removed one
+    assert [p[0] for p in products] == [0, 2]
+    assert products[0][3] == toWei(10)
+    assert products[1][3] == toWei(20)
+    # removed product is zeroed
+    assert market.products(1)[1] == ZERO_ADDRESS
+
+    with brownie.reverts("only seller call"):
+        change_tx = market.changePrices([0], [toWei(5)], {"from": admin})
+        change_tx.wait(1)
+
+    with brownie.reverts("only seller call"):
+        remove_tx = market.removeProducts([0, 2], {"from": admin})
+        remove_tx.wait(1)
+
+def test_convert_price_to_eth(market):
     amount_in_usd = 1500
 
     # for testing we put 1 ETH = 3000$ 
     converted_amount = market._convertUSDToETH.call(toWei(amount_in_usd))
+    quoted_amount = market.quoteUSDToETH(toWei(amount_in_usd))
 
     # 1500$ = 0.5 ETH
     expected_eth_price = toWei(0.5)
 
     assert converted_amount == expected_eth_price
+    assert quoted_amount == expected_eth_price
 
-def test_purchase_product():
-    admin, market = deploy()
-
+def test_purchase_product(market):
     seller = get_account(1)
 
     add_tx = market.addProduct(
-        PRODUCT_NAME, PRODUCT_DESCRIPTION, PRODUCT_IMAGE, PRODUCT_PRICE, {"from": seller}
+        PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": seller}
     )
     add_tx.wait(1)
 
@@ -76,24 +116,81 @@ def test_purchase_product():
 
     product_id = 0
 
-    price_in_eth = market._convertUSDToETH.call(PRODUCT_PRICE)
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
 
     purchase_tx = market.purchase(product_id, {"from": buyer, "value": price_in_eth})
     purchase_tx.wait(1)
 
-    product = market.getAllProducts()[product_id]
+    product = get_all_pages(market.getProducts)[product_id]
+
+    assert product[4] == price_in_eth
+    assert product[5] == buyer
+    assert product[6] == PRODUCT_STATUS["PENDING"]
 
-    assert product[6] == price_in_eth
-    assert product[7] == buyer
-    assert product[8] == PRODUCT_STATUS["PENDING"]
+def test_purchase_batch(market):
+    seller = get_account(1)
 
-def test_cancel_purchase():
-    admin, market = deploy()
+    for _ in range(3):
+        add_tx = market.addProduct(
+            PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": seller}
+        )
+        add_tx.wait(1)
 
+    buyer = get_account(2)
+    buyer_initial_balance = buyer.balance()
+
+    product_ids = [0, 2]
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
+    overpaid = toWei(0.1)
+
+    # amount sent above the batch total is credited back to the buyer
+    purchase_tx = market.purchaseBatch(
+        product_ids, {"from": buyer, "value": price_in_eth * len(product_ids) + overpaid}
+    )
+    purchase_tx.wait(1)
+
+    products = get_all_pages(market.getProducts)
+
+    assert market.credits(buyer) == overpaid
+    assert market.balance() == price_in_eth * len(product_ids) + overpaid
+
+    withdraw_tx = market.withdraw({"from": buyer})
+    withdraw_tx.wait(1)
+
+    assert buyer.balance() == buyer_initial_balance - price_in_eth * len(product_ids)
+    assert market.balance() == price_in_eth * len(product_ids)
+    for product_id in product_ids:
+        assert products[product_id][4] == price_in_eth
+        assert products[product_id][5] == buyer
+        assert products[product_id][6] == PRODUCT_STATUS["PENDING"]
+    assert products[1][6] == PRODUCT_STATUS["INSALE"]
+    assert market.getBuyerProductsCount(buyer) == 2
+
+def test_purchase_batch_insufficient_amount(market):
+    seller = get_account(1)
+
+    for _ in range(2):
+        add_tx = market.addProduct(
+            PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": seller}
+        )
+        add_tx.wait(1)
+
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
+
+    with brownie.reverts("insuffisant amount"):
+        purchase_tx = market.purchaseBatch([0, 1], {"from": get_account(2), "value": price_in_eth})
+        purchase_tx.wait(1)
+
+    # the same product can't be bought twice in a batch
+    with brownie.reverts("Invalid purchase"):
+        purchase_tx = market.purchaseBatch([0, 0], {"from": get_account(2), "value": price_in_eth * 2})
+        purchase_tx.wait(1)
+
+def test_cancel_purchase(market):
     seller = get_account(1)
 
     add_tx = market.addProduct(
-        PRODUCT_NAME, PRODUCT_DESCRIPTION, PRODUCT_IMAGE, PRODUCT_PRICE, {"from": seller}
+        PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": seller}
     )
     add_tx.wait(1)
 
@@ -101,7 +198,7 @@ def test_cancel_purchase():
 
     product_id = 0
 
-    price_in_eth = market._convertUSDToETH.call(PRODUCT_PRICE)
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
 
     purchase_tx = market.purchase(product_id, {"from": buyer, "value": price_in_eth})
     purchase_tx.wait(1)
@@ -109,20 +206,50 @@ def test_cancel_purchase():
     cancel_tx = market.cancelPurchase(product_id, {"from": buyer})
     cancel_tx.wait(1)
 
-    product = market.getAllProducts()[product_id]
+    product = get_all_pages(market.getProducts)[product_id]
+
+    assert product[4] == 0
+    assert product[5] == ZERO_ADDRESS # buyer == 0x0000
+    assert product[6] == PRODUCT_STATUS["INSALE"]
+
+    # the refund is credited to the buyer
+    assert market.credits(buyer) == price_in_eth
+
+def test_purchase_gas_with_cached_price(admin, market):
+    administration = get_contract(Administration, market.factory())
+
+    seller = get_account(1)
+
+    for _ in range(3):
+        add_tx = market.addProduct(
+            PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": seller}
+        )
+        add_tx.wait(1)
+
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
 
-    assert product[6] == 0
-    assert product[7] == ZERO_ADDRESS # buyer == 0x0000
-    assert product[8] == PRODUCT_STATUS["INSALE"]
+    # each product is bought by a new buyer so all purchases write the same storage slots
+    window_tx = administration.setPriceCacheWindow(0, {"from": admin})
+    window_tx.wait(1)
+    uncached_tx = market.purchase(0, {"from": get_account(2), "value": price_in_eth})
+    uncached_tx.wait(1)
 
-def test_send_product():
+    window_tx = administration.setPriceCacheWindow(3600, {"from": admin})
+    window_tx.wait(1)
+    refresh_tx = market.purchase(1, {"from": get_account(3), "value": price_in_eth})
+    refresh_tx.wait(1)
+    cached_tx = market.purchase(2, {"from": get_account(4), "value": price_in_eth})
+    cached_tx.wait(1)
 
-    admin, market = deploy()
+    # a cached price skips the cold price feed call (2600 gas for the account access
+    # alone, plus its storage reads) and the cache write
+    assert uncached_tx.gas_used - cached_tx.gas_used >= 5000
 
+def test_send_product(market):
     seller = get_account(1)
 
     add_tx = market.addProduct(
-        PRODUCT_NAME, PRODUCT_DESCRIPTION, PRODUCT_IMAGE, PRODUCT_PRICE, {"from": seller}
+        PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": seller}
     )
     add_tx.wait(1)
 
@@ -130,7 +257,7 @@ def test_send_product():
 
     product_id = 0
 
-    price_in_eth = market._convertUSDToETH.call(PRODUCT_PRICE)
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
 
     purchase_tx = market.purchase(product_id, {"from": buyer, "value": price_in_eth})
     purchase_tx.wait(1)
@@ -138,19 +265,16 @@ def test_send_product():
     send_tx = market.sendProduct(product_id, {"from": seller})
     send_tx.wait(1)
 
-    product = market.getAllProducts()[product_id]
-
-    assert product[8] == PRODUCT_STATUS["SENT"]
-
-def test_confirm_recieved():
+    product = get_all_pages(market.getProducts)[product_id]
 
-    admin, market = deploy()
+    assert product[6] == PRODUCT_STATUS["SENT"]
 
+def test_confirm_recieved(admin, market):
     seller = get_account(1)
     seller_before_sale_balance = seller.balance()
 
     add_tx = market.addProduct(
-        PRODUCT_NAME, PRODUCT_DESCRIPTION, PRODUCT_IMAGE, PRODUCT_PRICE, {"from": seller}
+        PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": seller}
     )
     add_tx.wait(1)
 
@@ -158,7 +282,7 @@ def test_confirm_recieved():
 
     product_id = 0
 
-    price_in_eth = market._convertUSDToETH.call(PRODUCT_PRICE)
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
 
     purchase_tx = market.purchase(product_id, {"from": buyer, "value": price_in_eth})
     purchase_tx.wait(1)
@@ -169,27 +293,39 @@ def test_confirm_recieved():
     confirm_tx = market.confirmRecieved(product_id, {"from": buyer})
     confirm_tx.wait(1)
 
-    seller_after_sale_balance = seller.balance()
-
-    product = market.getAllProducts()[product_id]
+    product = get_all_pages(market.getProducts)[product_id]
 
     administration = get_contract(Administration, market.factory())
 
-    assert product[8] == PRODUCT_STATUS["SOLD"]
+    assert product[6] == PRODUCT_STATUS["SOLD"]
+
+    # the sale is only credited, the seller pulls it with withdraw
+    assert seller.balance() == seller_before_sale_balance
+    assert float(market.credits(seller)) == float(price_in_eth) * 0.995
+
+    withdraw_tx = market.withdraw({"from": seller})
+    withdraw_tx.wait(1)
+
+    seller_after_sale_balance = seller.balance()
 
     assert float(seller_after_sale_balance) == float(seller_before_sale_balance) + float(price_in_eth) * 0.995
+    assert market.credits(seller) == 0
+
+    with brownie.reverts("nothing to withdraw"):
+        withdraw_tx = market.withdraw({"from": seller})
+        withdraw_tx.wait(1)
 
     # check that factory recieved the 0.5% fee
-    assert administration.balance() == float(price_in_eth) * 0.005
+    claim_tx = administration.claimPayments(administration, [market], {"from": admin})
+    claim_tx.wait(1)
 
-def test_remove_product():
-    
-    admin, market = deploy()
+    assert administration.balance() == float(price_in_eth) * 0.005
 
+def test_remove_product(market):
     seller = get_account(1)
 
     add_tx = market.addProduct(
-        PRODUCT_NAME, PRODUCT_DESCRIPTION, PRODUCT_IMAGE, PRODUCT_PRICE, {"from": seller}
+        PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": seller}
     )
     add_tx.wait(1)
 
@@ -198,21 +334,148 @@ def test_remove_product():
     remove_tx = market.remove(product_id, {"from": seller})
     remove_tx.wait(1)
 
-    product = market.getAllProducts()[product_id]
+    product = market.products(product_id)
 
     # seller is zero address
     assert product[1] == ZERO_ADDRESS
+    assert get_all_pages(market.getProducts) == []
+    assert market.getAllProducts() == []
 
-def test_admin_modifier():
-    if network.show_active() not in LOCAL_BLOCKCHAINS:
-        pytest.skip()
+def test_removed_products_compaction(market):
+    seller = get_account(1)
+    other_seller = get_account(2)
+    buyer = get_account(3)
+
+    for account in [seller, seller, other_seller, seller, seller]:
+        add_tx = market.addProduct(PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": account})
+        add_tx.wait(1)
+
+    remove_tx = market.removeProducts([1, 4], {"from": seller})
+    remove_tx.wait(1)
+
+    # each removal moves the last product into the freed position
+    assert [p[0] for p in market.getAllProducts()] == [0, 3, 2]
+    assert [p[0] for p in get_all_pages(market.getProducts, page_size=2)] == [0, 3, 2]
+    assert [p[0] for p in get_all_pages(market.getProductsByStatus, PRODUCT_STATUS["INSALE"])] == [0, 3, 2]
+    assert market.getActiveProductsCount() == 3
+    assert market.getProductsCount() == 5
+
+    # removed products stay in the seller index but are not returned,
+    # the scan is capped at the limit so pages can be short or empty
+    page, next_cursor = market.getProductsBySeller(seller, 0, 2)
+    assert [p[0] for p in page] == [0]
+    assert next_cursor == 2
+    page, next_cursor = market.getProductsBySeller(seller, 3, 1)
+    assert page == []
+    assert next_cursor == 4
+    assert [p[0] for p in get_all_pages(market.getProductsBySeller, seller, page_size=1)] == [0, 3]
+
+    # ids are stable, the moved product can still be bought
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
+    purchase_tx = market.purchase(3, {"from": buyer, "value": price_in_eth})
+    purchase_tx.wait(1)
+    assert market.products(3)[5] == buyer
+
+    with brownie.reverts("Invalid purchase"):
+        market.purchase(1, {"from": buyer, "value": price_in_eth})
 
-    admin = get_account()
+    remove_tx = market.remove(0, {"from": seller})
+    remove_tx.wait(1)
+    assert [p[0] for p in market.getAllProducts()] == [2, 3]
+
+def test_products_pagination(market):
+    seller = get_account(1)
+
+    for i in range(5):
+        add_tx = market.addProduct(
+            PRODUCT_METADATA_HASH, PRODUCT_PRICE + i, {"from": seller}
+        )
+        add_tx.wait(1)
+
+    page, next_cursor = market.getProducts(0, 2)
+    assert [p[0] for p in page] == [0, 1]
+    assert next_cursor == 2
+
+    page, next_cursor = market.getProducts(next_cursor, 2)
+    assert [p[0] for p in page] == [2, 3]
+
+    # last page is shorter than the limit
+    page, next_cursor = market.getProducts(next_cursor, 2)
+    assert [p[0] for p in page] == [4]
+    assert next_cursor == 5
+
+    # cursor past the end returns an empty page
+    page, next_cursor = market.getProducts(10, 2)
+    assert len(page) == 0
+    assert next_cursor == 10
+
+    assert market.getProductsCount() == 5
+    assert len(get_all_pages(market.getProducts, page_size=2)) == 5
+
+def test_products_filters(market):
+    seller_1 = get_account(1)
+    seller_2 = get_account(2)
+    buyer = get_account(3)
+
+    for seller in [seller_1, seller_2, seller_1, seller_2, seller_1]:
+        add_tx = market.addProduct(
+            PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": seller}
+        )
+        add_tx.wait(1)
+
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
+
+    purchase_tx = market.purchase(3, {"from": buyer, "value": price_in_eth})
+    purchase_tx.wait(1)
 
-    price_feed = deploy_mock()
+    # seller cursor is a position in the seller index
+    page, next_cursor = market.getProductsBySeller(seller_1, 0, 2)
+    assert [p[0] for p in page] == [0, 2]
+    assert next_cursor == 2
 
-    market = Market.deploy(price_feed.address, {"from": admin})
+    page, next_cursor = market.getProductsBySeller(seller_1, next_cursor, 2)
+    assert [p[0] for p in page] == [4]
+    assert next_cursor == 3
+    assert market.getSellerProductsCount(seller_1) == 3
 
+    seller_2_products = get_all_pages(market.getProductsBySeller, seller_2, page_size=1)
+    bought_products = get_all_pages(market.getProductsByBuyer, buyer)
+    insale_products = get_all_pages(market.getProductsByStatus, PRODUCT_STATUS["INSALE"])
+    pending_products = get_all_pages(market.getProductsByStatus, PRODUCT_STATUS["PENDING"])
+
+    assert [p[0] for p in seller_2_products] == [1, 3]
+    assert [p[0] for p in bought_products] == [3]
+    assert [p[0] for p in insale_products] == [0, 1, 2, 4]
+    assert [p[0] for p in pending_products] == [3]
+
+def test_buyer_index_after_cancel(market):
+    seller = get_account(1)
+    buyer = get_account(2)
+
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
+
+    for product_id in range(3):
+        add_tx = market.addProduct(
+            PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": seller}
+        )
+        add_tx.wait(1)
+
+        purchase_tx = market.purchase(product_id, {"from": buyer, "value": price_in_eth})
+        purchase_tx.wait(1)
+
+    # cancelling moves the last bought product into the freed position
+    cancel_tx = market.cancelPurchase(0, {"from": buyer})
+    cancel_tx.wait(1)
+
+    assert [p[0] for p in get_all_pages(market.getProductsByBuyer, buyer)] == [2, 1]
+    assert market.getBuyerProductsCount(buyer) == 2
+
+    cancel_tx = market.cancelPurchase(1, {"from": buyer})
+    cancel_tx.wait(1)
+
+    assert [p[0] for p in get_all_pages(market.getProductsByBuyer, buyer)] == [2]
+
+def test_admin_modifier(market):
     random_user = get_account(1)
 
     # check that only admin can change the fees
@@ -220,29 +483,24 @@ def test_admin_modifier():
         change_tx = market.changeFee(10, {"from": random_user})
         change_tx.wait(1)
 
-def test_not_seller():
-    admin, market = deploy()
-
+def test_not_seller(admin, market):
     add_tx = market.addProduct(
-        PRODUCT_NAME, PRODUCT_DESCRIPTION, PRODUCT_IMAGE, PRODUCT_PRICE, {"from": admin}
+        PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": admin}
     )
     add_tx.wait(1)
 
     product_id = 0
     
-    price_in_eth = market._convertUSDToETH.call(PRODUCT_PRICE)
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
 
     # get seller to buy it's own product and make sure that the market contract doesn't allow it
     with brownie.reverts("Invalid purchase"):
         purchase_tx = market.purchase(product_id, {"from": admin, "value": price_in_eth})
         purchase_tx.wait(1)
 
-def test_status_modifier():
-
-    admin, market = deploy()
-
+def test_status_modifier(admin, market):
     add_tx = market.addProduct(
-        PRODUCT_NAME, PRODUCT_DESCRIPTION, PRODUCT_IMAGE, PRODUCT_PRICE, {"from": admin}
+        PRODUCT_METADATA_HASH, PRODUCT_PRICE, {"from": admin}
     )
     add_tx.wait(1)
 
@@ -250,7 +508,7 @@ def test_status_modifier():
 
     product_id = 0
 
-    price_in_eth = market._convertUSDToETH.call(PRODUCT_PRICE)
+    price_in_eth = market.quoteUSDToETH(PRODUCT_PRICE)
 
     purchase_tx = market.purchase(product_id, {"from": user, "value": price_in_eth})
     purchase_tx.wait(1)
@@ -260,24 +518,3 @@ def test_status_modifier():
     with brownie.reverts("Wrong status"):
         remove_tx = market.remove(product_id, {"from": admin})
         remove_tx.wait(1)
-    
-
-def deploy():
-    if network.show_active() not in LOCAL_BLOCKCHAINS:
-        pytest.skip()
-
-    admin = get_account()
-
-    price_feed = deploy_mock()
-
-    administration = Administration.deploy(price_feed.address, {"from": admin})
-
-    market = Market.deploy(administration.address, {"from": admin})
-
-    set_tx = administration.setMarketContractAddress(market.address, {"from": admin})
-    set_tx.wait(1)
-
-    return admin, market       
-
-  
-
@@ -0,0 +1,45 @@
+import pytest
+from scripts.metadata import (
+    LocalIPFS,
+    build_metadata,
+    cid_to_hash,
+    get_product_metadata,
+    hash_to_cid,
+    metadata_hash,
+    pin_product_metadata,
+)
+
+
+def test_metadata_hash_to_cid(tmp_path):
+    content = build_metadata("product 1", "product 1 description", "ipfs://product-1-image")
+    _hash = metadata_hash(content)
+    cid = hash_to_cid(_hash)
+
+    assert cid.startswith("bafkrei")
+    assert cid_to_hash(cid) == _hash
+    # the same product metadata always gives the same hash
+    assert build_metadata("product 1", "product 1 description", "ipfs://product-1-image") == content
+
+
+def test_metadata_hash_non_ascii():
+    content = build_metadata("Thé vert 🍵", "Café crème, 日本語 ✓", "ipfs://image")
+
+    # hash of the same product built by the front end buildMetadata (JSON.stringify)
+    assert content.decode("utf-8") == '{"description":"Café crème, 日本語 ✓","image":"ipfs://image","name":"Thé vert 🍵"}'
+    assert metadata_hash(content) == "0x3ca93920c364bfcbcc6a297a4ab0b989425251b45bcc6aee20a122e0ee77971d"
+
+
+def test_pin_product_metadata(tmp_path):
+    ipfs = LocalIPFS(str(tmp_path / "ipfs"))
+    _hash = pin_product_metadata("product 1", "product 1 description", "ipfs://product-1-image", ipfs)
+
+    metadata = get_product_metadata(_hash, ipfs)
+    assert metadata["name"] == "product 1"
+    assert metadata["description"] == "product 1 description"
+    assert metadata["image"] == "ipfs://product-1-image"
+
+    # pinned content is checked against its CID
+    cid = hash_to_cid(_hash)
+    (tmp_path / "ipfs" / cid).write_bytes(b"{}")
+    with pytest.raises(ValueError):
+        ipfs.cat(cid)
@@ -0,0 +1,20 @@
+from scripts.migrate_metadata import select_store_products
+
+
+def legacy_product(product_id, name, active_orders):
+    return (product_id, name, "description", "ipfs://image", 100, 10, active_orders, 0, 1650000000)
+
+
+def test_select_store_products():
+    products = [
+        legacy_product(0, "product 0", 0),
+        legacy_product(1, "", 0),
+        legacy_product(2, "product 2", 3),
+        legacy_product(3, "product 3", 0),
+    ]
+
+    migrated, kept = select_store_products(products)
+
+    # removed products are dropped, products with active orders stay on the legacy store
+    assert [p[0] for p in migrated] == [0, 3]
+    assert [p[0] for p in kept] == [2]
@@ -0,0 +1,56 @@
+import json
+from brownie import web3
+from scripts.deploy import deploy
+from scripts.registry import (
+    build_registry,
+    get_abi,
+    get_address,
+    list_registries,
+    load_registry,
+    registries_from_build,
+    write_registry,
+)
+
+
+def test_registry_roundtrip(tmp_path):
+    registry = build_registry(5777, {"Market": ("0x01", [{"name": "addProduct"}]), "Store": (None, [])})
+    write_registry(registry, str(tmp_path))
+
+    loaded = load_registry(5777, str(tmp_path))
+    assert loaded == registry
+    assert get_address(loaded, "Market") == "0x01"
+    assert get_abi(loaded, "Store") == []
+    assert load_registry(1, str(tmp_path)) is None
+    assert list_registries(str(tmp_path)) == [registry]
+
+
+def test_registries_from_build(tmp_path):
+    build = tmp_path / "build"
+    (build / "contracts").mkdir(parents=True)
+    (build / "deployments").mkdir()
+    for name in ["Market", "Store"]:
+        (build / "contracts" / (name + ".json")).write_text(json.dumps({"abi": [{"name": name}], "bytecode": "0x00"}))
+    (build / "deployments" / "map.json").write_text(json.dumps({"5777": {"Market": ["0x02", "0x01"]}}))
+
+    # one ABI per contract name and only the newest address
+    assert registries_from_build(str(build)) == [
+        {
+            "chainId": "5777",
+            "contracts": {
+                "Market": {"address": "0x02", "abi": [{"name": "Market"}]},
+                "Store": {"address": None, "abi": [{"name": "Store"}]},
+            },
+        }
+    ]
+
+
+def test_deploy_writes_registry(marketplace, tmp_path):
+    administration, market, store_factory, auction_market = deploy(registry_folder=str(tmp_path))
+
+    registry = load_registry(web3.chain_id, str(tmp_path))
+    assert get_address(registry, "Administration") == administration.address
+    assert get_address(registry, "Market") == market.address
+    assert get_address(registry, "StoreFactory") == store_factory.address
+    assert get_address(registry, "AuctionMarket") == auction_market.address
+    assert get_address(registry, "Store") is None
+    assert get_abi(registry, "Market") == market.abi
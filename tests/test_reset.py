@@ -0,0 +1,85 @@
+import hashlib, json, os
+from scripts.reset import clean_deployments, reset_folder, stale_artifacts
+
+
+def write_json(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(content, f)
+
+
+def make_deployments(build, chain_id, addresses):
+    for address in addresses:
+        write_json(str(build / "deployments" / chain_id / (address + ".json")), {})
+
+
+def test_clean_deployments(tmp_path):
+    build = tmp_path / "build"
+    make_deployments(build, "5777", ["0x03", "0x02", "0x01", "0x13", "0x12"])
+    make_deployments(build, "4", ["0x21"])
+    write_json(
+        str(build / "deployments" / "map.json"),
+        {"5777": {"Market": ["0x03", "0x02", "0x01"], "StoreFactory": ["0x13", "0x12"]}, "4": {"Market": ["0x21"]}},
+    )
+    manifest_path = str(build / "deployments" / "manifest.json")
+    write_json(manifest_path, {"5777": {"Market": {"address": "0x03"}}, "4": {"Market": {"address": "0x21"}}})
+    for chain_id in ["5777", "4"]:
+        write_json(str(build / "registry" / (chain_id + ".json")), {"chainId": chain_id, "contracts": {}})
+
+    # only the latest deployment of each contract is kept
+    assert clean_deployments(5777, 1, str(build)) == 3
+    assert sorted(os.listdir(build / "deployments" / "5777")) == ["0x03.json", "0x13.json"]
+    with open(build / "deployments" / "map.json") as f:
+        assert json.load(f) == {"5777": {"Market": ["0x03"], "StoreFactory": ["0x13"]}, "4": {"Market": ["0x21"]}}
+    # the active deployments are kept so the manifest and the registry still point to them
+    assert sorted(os.listdir(build / "registry")) == ["4.json", "5777.json"]
+
+    # every deployment of the chain is removed, other chains are left untouched
+    assert clean_deployments(5777, build_folder=str(build)) == 2
+    assert not (build / "deployments" / "5777").exists()
+    assert os.listdir(build / "deployments" / "4") == ["0x21.json"]
+    with open(build / "deployments" / "map.json") as f:
+        assert json.load(f) == {"4": {"Market": ["0x21"]}}
+    with open(manifest_path) as f:
+        assert json.load(f) == {"4": {"Market": {"address": "0x21"}}}
+    assert os.listdir(build / "registry") == ["4.json"]
+
+
+def test_stale_artifacts(tmp_path):
+    (tmp_path / "contracts").mkdir()
+    sources = {"Pagination": "library Pagination {}", "Market": "contract Market {}", "Store": "contract Store {}"}
+    for name, source in sources.items():
+        (tmp_path / "contracts" / (name + ".sol")).write_text(source)
+    dependencies = {"Pagination": [], "Market": ["Pagination"], "Store": ["AggregatorV3Interface"]}
+    for name, source in sources.items():
+        write_json(
+            str(tmp_path / "build" / "contracts" / (name + ".json")),
+            {
+                "contractName": name,
+                "sourcePath": "contracts/%s.sol" % name,
+                "sha1": hashlib.sha1(source.encode()).hexdigest(),
+                "dependencies": dependencies[name],
+            },
+        )
+    # package artifacts are never stale
+    write_json(
+        str(tmp_path / "build" / "interfaces" / "AggregatorV3Interface.json"),
+        {"contractName": "AggregatorV3Interface", "sourcePath": "smartcontractkit/AggregatorV3Interface.sol", "sha1": "0"},
+    )
+
+    assert stale_artifacts(str(tmp_path / "build"), str(tmp_path)) == []
+
+    # Market is compiled with Pagination so both have to be recompiled
+    (tmp_path / "contracts" / "Pagination.sol").write_text("library Pagination { }")
+    assert stale_artifacts(str(tmp_path / "build"), str(tmp_path)) == [
+        str(tmp_path / "build" / "contracts" / "Market.json"),
+        str(tmp_path / "build" / "contracts" / "Pagination.json"),
+    ]
+
+
+def test_reset_folder(tmp_path):
+    make_deployments(tmp_path, "5777", ["0x%02x" % i for i in range(50)])
+    write_json(str(tmp_path / "deployments" / "map.json"), {})
+
+    assert reset_folder(str(tmp_path / "deployments")) == 51
+    assert os.listdir(tmp_path / "deployments") == []
@@ -1,41 +1,22 @@
-import pytest, brownie
-from brownie import StoreFactory, Administration, Store, network
+import brownie
+from brownie import Administration, Store
+from scripts.metadata import build_metadata, metadata_hash
 from scripts.helper_scripts import (
     fromWei,
     get_account,
+    get_all_pages,
     get_contract,
-    deploy_mock,
+    get_stores_summaries,
+    predict_store_address,
     toWei,
-    LOCAL_BLOCKCHAINS,
-    ZERO_ADDRESS,
 )
 
 
-def deploy_store_factory():
-    if network.show_active() not in LOCAL_BLOCKCHAINS:
-        pytest.skip()
-
-    admin = get_account()
-
-    price_feed = deploy_mock()
-
-    administration = Administration.deploy(price_feed.address, {"from": admin})
-
-    store_factory = StoreFactory.deploy(administration.address, {"from": admin})
-
-    set_tx = administration.setStoreFactoryAddress(store_factory.address, {"from": admin})
-    set_tx.wait(1)
-
-    return admin, store_factory    
-
 def create_store(store_factory , owner):
 
     STORE_META_DATA = "store test meta data"
-    # Get store creation fee in USD and convert it to ETH
-    create_store_fee =  store_factory._convertUSDToETH(store_factory.createStoreFee())
-    create_store_fee.wait(1)
-
-    create_store_fee = create_store_fee.return_value
+    # Get store creation fee in USD and quote it in ETH
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
 
     create_tx = store_factory.createStore(STORE_META_DATA, {"from": owner, "value": create_store_fee})
     create_tx.wait(1)
@@ -49,26 +30,65 @@ def create_store(store_factory , owner):
     return store
 
 
-PRODUCT_NAME = "test product"
-PRODUCT_DESCRIPTION = "test description"
-PRODUCT_IMAGE = "test product image IPFS url"
+PRODUCT_METADATA_HASH = metadata_hash(build_metadata("test product", "test description", "test product image IPFS url"))
 PRODUCT_PRICE = toWei(3000) # 100$
 PRODUCT_QUANTITY = 100
 PRODUCT_TYPE = {"FIXED": 0, "UNLIMITED": 1}
 
-ORDER_STATUS = {"PENDING": 0, "SENT": 1, "COMPLETED": 2}
+ZERO_HASH = "0x" + "00" * 32
+
+ORDER_STATUS = {"PENDING": 0, "SENT": 1, "COMPLETED": 2, "CANCELLED": 3}
+
+def test_create_store_clone(store_factory):
+    store_owner = get_account(1)
+
+    store = create_store(store_factory=store_factory, owner=store_owner)
+
+    assert store.owner() == store_owner
+    assert store.factory() == store_factory.factory()
+    assert store.storeMetaData() == "store test meta data"
+
+    # stores and their implementation can't be initialized again
+    with brownie.reverts("store already initialized"):
+        init_tx = store.initialize(store_factory.factory(), get_account(2), "", {"from": get_account(2)})
+        init_tx.wait(1)
+
+    implementation = get_contract(Store, store_factory.storeImplementation())
+    with brownie.reverts("store already initialized"):
+        init_tx = implementation.initialize(store_factory.factory(), get_account(2), "", {"from": get_account(2)})
+        init_tx.wait(1)
+
+def test_create_store_deterministic(store_factory):
+    store_owner = get_account(1)
+    salt = "0x" + "11" * 32
+
+    predicted_address = predict_store_address(store_factory, store_owner, salt)
+    assert store_factory.predictStoreAddress(store_owner, salt) == predicted_address
+    # the salt is bound to the owner
+    assert store_factory.predictStoreAddress(get_account(2), salt) != predicted_address
+
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+    create_tx = store_factory.createStoreDeterministic(
+        "deterministic store", salt, {"from": store_owner, "value": create_store_fee}
+    )
+    create_tx.wait(1)
+
+    assert create_tx.events["StoreCreated"]["storeAddress"] == predicted_address
+    assert get_contract(Store, predicted_address).owner() == store_owner
 
-def test_add_fixed_quantity_product():
-    _, store_factory = deploy_store_factory()
+    with brownie.reverts("clone failed"):
+        create_tx = store_factory.createStoreDeterministic(
+            "deterministic store", salt, {"from": store_owner, "value": create_store_fee}
+        )
+        create_tx.wait(1)
 
+def test_add_fixed_quantity_product(store_factory):
     store_owner = get_account(1)
 
     store = create_store(store_factory=store_factory , owner=store_owner)
 
     add_tx = store.addProduct(
-        PRODUCT_NAME,
-        PRODUCT_DESCRIPTION,
-        PRODUCT_IMAGE,
+        PRODUCT_METADATA_HASH,
         PRODUCT_PRICE,
         PRODUCT_QUANTITY,
         PRODUCT_TYPE["FIXED"],
@@ -77,27 +97,21 @@ def test_add_fixed_quantity_product():
     add_tx.wait(1)
 
     product_id = 0
-    product = store.listStoreProducts()[product_id]
-
-    assert product[1] == PRODUCT_NAME
-    assert product[2] == PRODUCT_DESCRIPTION
-    assert product[3] == PRODUCT_IMAGE
-    assert product[4] == PRODUCT_PRICE
-    assert product[5] == PRODUCT_QUANTITY
-    assert product[6] == 0
-    assert product[7] == PRODUCT_TYPE["FIXED"]
+    product = get_all_pages(store.getStoreProducts)[product_id]
 
-def test_add_unlimited_quantity_product():
-    _, store_factory = deploy_store_factory()
+    assert product[6] == PRODUCT_METADATA_HASH
+    assert product[1] == PRODUCT_PRICE
+    assert product[2] == PRODUCT_QUANTITY
+    assert product[3] == 0
+    assert product[4] == PRODUCT_TYPE["FIXED"]
 
+def test_add_unlimited_quantity_product(store_factory):
     store_owner = get_account(1)
 
     store = create_store(store_factory=store_factory , owner=store_owner)
 
     add_tx = store.addProduct(
-        PRODUCT_NAME,
-        PRODUCT_DESCRIPTION,
-        PRODUCT_IMAGE,
+        PRODUCT_METADATA_HASH,
         PRODUCT_PRICE,
         PRODUCT_QUANTITY,
         PRODUCT_TYPE["UNLIMITED"],
@@ -106,27 +120,75 @@ def test_add_unlimited_quantity_product():
     add_tx.wait(1)
 
     product_id = 0
-    product = store.listStoreProducts()[product_id]
+    product = get_all_pages(store.getStoreProducts)[product_id]
+
+    assert product[6] == PRODUCT_METADATA_HASH
+    assert product[1] == PRODUCT_PRICE
+    assert product[2] == 1
+    assert product[3] == 0
+    assert product[4] == PRODUCT_TYPE["UNLIMITED"]
+
+def test_bulk_seller_operations(store_factory):
+    store_owner = get_account(1)
 
-    assert product[1] == PRODUCT_NAME
-    assert product[2] == PRODUCT_DESCRIPTION
-    assert product[3] == PRODUCT_IMAGE
-    assert product[4] == PRODUCT_PRICE
-    assert product[5] == 1
-    assert product[6] == 0
-    assert product[7] == PRODUCT_TYPE["UNLIMITED"]
+    store = create_store(store_factory=store_factory , owner=store_owner)
+
+    add_tx = store.addProducts(
+        [PRODUCT_METADATA_HASH] * 3,
+        [PRODUCT_PRICE] * 3,
+        [PRODUCT_QUANTITY] * 3,
+        [PRODUCT_TYPE["FIXED"], PRODUCT_TYPE["FIXED"], PRODUCT_TYPE["UNLIMITED"]],
+        {"from": store_owner}
+    )
+    add_tx.wait(1)
 
-def test_remove_product():
-    _, store_factory = deploy_store_factory()
+    new_price = toWei(1500)
+    change_tx = store.changePrices([0, 1], [new_price, new_price], {"from": store_owner})
+    change_tx.wait(1)
 
+    buyer = get_account(2)
+    price_in_eth = store.quoteUSDToETH(new_price)
+
+    create_tx = store.createBuyOrders([0, 1], [2, 3], {"from": buyer, "value": price_in_eth * 5})
+    create_tx.wait(1)
+
+    fill_tx = store.fillOrders([0, 1], {"from": store_owner})
+    fill_tx.wait(1)
+
+    # product 0 has an active order so only product 2 is removed
+    remove_tx = store.removeProducts([0, 2], {"from": store_owner})
+    remove_tx.wait(1)
+
+    products = get_all_pages(store.getStoreProducts)
+    orders = get_all_pages(store.getStoreOrders)
+
+    assert products[0][1] == new_price
+    assert products[0][2] == PRODUCT_QUANTITY - 2
+    assert products[1][2] == PRODUCT_QUANTITY - 3
+    # removed products are not listed anymore
+    assert len(products) == 2
+    assert store.storeProducts(2)[6] == ZERO_HASH
+    assert all(o[6] == ORDER_STATUS["SENT"] for o in orders)
+
+    with brownie.reverts("only owner can call this"):
+        fill_tx = store.fillOrders([0], {"from": buyer})
+        fill_tx.wait(1)
+
+    # removed products can't be repriced or ordered, orders need a quantity
+    with brownie.reverts("wrong product id"):
+        store.changePrices([2], [new_price], {"from": store_owner})
+    with brownie.reverts("wrong product id"):
+        store.createBuyOrder(2, 1, {"from": buyer})
+    with brownie.reverts("invalid quantity"):
+        store.createBuyOrder(1, 0, {"from": buyer})
+
+def test_remove_product(store_factory):
     store_owner = get_account(1)
 
     store = create_store(store_factory=store_factory , owner=store_owner)
 
     add_tx = store.addProduct(
-        PRODUCT_NAME,
-        PRODUCT_DESCRIPTION,
-        PRODUCT_IMAGE,
+        PRODUCT_METADATA_HASH,
         PRODUCT_PRICE,
         PRODUCT_QUANTITY,
         PRODUCT_TYPE["FIXED"],
@@ -138,21 +200,70 @@ def test_remove_product():
     remove_tx.wait(1)
 
     product_id = 0
-    product = store.listStoreProducts()[product_id]
+    product = store.storeProducts(product_id)
+
+    assert product[6] == ZERO_HASH # removed product metadata is cleared
+    assert get_all_pages(store.getStoreProducts) == []
+    assert store.listStoreProducts() == []
+
+    # a zero hash would read as removed, it's rejected
+    with brownie.reverts("invalid metadata hash"):
+        store.addProduct(ZERO_HASH, PRODUCT_PRICE, PRODUCT_QUANTITY, PRODUCT_TYPE["FIXED"], {"from": store_owner})
 
-    assert product[1] == "" # name = ""
+    add_tx = store.addProduct(PRODUCT_METADATA_HASH, PRODUCT_PRICE, PRODUCT_QUANTITY, PRODUCT_TYPE["FIXED"], {"from": store_owner})
+    add_tx.wait(1)
+    assert store.activeProductsCount() == 1
 
-def test_create_buy_order():
-    _, store_factory = deploy_store_factory()
+    remove_tx = store.removeProduct(1, {"from": store_owner})
+    remove_tx.wait(1)
+    assert store.activeProductsCount() == 0
+    assert store.listStoreProducts() == []
 
+def test_removed_products_compaction(store_factory):
+    store_owner = get_account(1)
+    buyer = get_account(2)
+
+    store = create_store(store_factory=store_factory, owner=store_owner)
+
+    add_tx = store.addProducts(
+        [PRODUCT_METADATA_HASH] * 5,
+        [PRODUCT_PRICE] * 5,
+        [PRODUCT_QUANTITY] * 5,
+        [PRODUCT_TYPE["FIXED"]] * 5,
+        {"from": store_owner}
+    )
+    add_tx.wait(1)
+
+    # the last product is moved into the position of the removed one
+    remove_tx = store.removeProducts([1, 3], {"from": store_owner})
+    remove_tx.wait(1)
+
+    assert [p[0] for p in store.listStoreProducts()] == [0, 4, 2]
+    assert [p[0] for p in get_all_pages(store.getStoreProducts, page_size=2)] == [0, 4, 2]
+    assert store.activeProductsCount() == 3
+    assert store.productIds() == 5
+
+    # ids are stable, the moved product can still be bought
+    order_price_in_eth = store.quoteUSDToETH(PRODUCT_PRICE)
+    create_tx = store.createBuyOrder(4, 1, {"from": buyer, "value": order_price_in_eth})
+    create_tx.wait(1)
+    assert store.storeProducts(4)[3] == 1
+
+    with brownie.reverts("wrong product id"):
+        store.createBuyOrder(5, 0, {"from": buyer})
+
+    add_tx = store.addProduct(PRODUCT_METADATA_HASH, PRODUCT_PRICE, PRODUCT_QUANTITY, PRODUCT_TYPE["FIXED"], {"from": store_owner})
+    add_tx.wait(1)
+    assert add_tx.events["ProductAdded"]["productId"] == 5
+    assert [p[0] for p in store.listStoreProducts()] == [0, 4, 2, 5]
+
+def test_create_buy_order(store_factory):
     store_owner = get_account(1)
 
     store = create_store(store_factory=store_factory , owner=store_owner)
 
     add_tx = store.addProduct(
-        PRODUCT_NAME,
-        PRODUCT_DESCRIPTION,
-        PRODUCT_IMAGE,
+        PRODUCT_METADATA_HASH,
         PRODUCT_PRICE,
         PRODUCT_QUANTITY,
         PRODUCT_TYPE["FIXED"],
@@ -164,15 +275,15 @@ def test_create_buy_order():
 
     product_id = 0
     quantity = 5
-    product_price = store.listStoreProducts()[product_id][4]
+    product_price = get_all_pages(store.getStoreProducts)[product_id][1]
 
-    order_price_in_eth = store._convertUSDToETH.call(product_price) * quantity
+    order_price_in_eth = store.quoteUSDToETH(product_price) * quantity
 
     create_tx = store.createBuyOrder(product_id, quantity, {"from": buyer, "value": order_price_in_eth})
     create_tx.wait(1)
 
     order_id = 0
-    store_orders = store.listStoreOrders()
+    store_orders = get_all_pages(store.getStoreOrders)
     order = store_orders[order_id]
 
     assert len(store_orders) == 1
@@ -184,17 +295,60 @@ def test_create_buy_order():
     assert order[5] == False
     assert order[6] == ORDER_STATUS["PENDING"]
 
-def test_fill_order():
-    _, store_factory = deploy_store_factory()
+def test_create_buy_orders(store_factory):
+    store_owner = get_account(1)
+
+    store = create_store(store_factory=store_factory , owner=store_owner)
+
+    for product_type in [PRODUCT_TYPE["FIXED"], PRODUCT_TYPE["UNLIMITED"]]:
+        add_tx = store.addProduct(
+            PRODUCT_METADATA_HASH,
+            PRODUCT_PRICE,
+            PRODUCT_QUANTITY,
+            product_type,
+            {"from": store_owner}
+        )
+        add_tx.wait(1)
+
+    buyer = get_account(2)
+    buyer_initial_balance = buyer.balance()
+
+    product_ids = [0, 1]
+    quantities = [5, 3]
+    price_in_eth = store.quoteUSDToETH(PRODUCT_PRICE)
+    # unlimited products orders are priced for a single unit
+    orders_total = price_in_eth * 5 + price_in_eth
 
+    create_tx = store.createBuyOrders(
+        product_ids, quantities, {"from": buyer, "value": orders_total + toWei(1)}
+    )
+    create_tx.wait(1)
+
+    store_orders = get_all_pages(store.getStoreOrders)
+
+    assert len(store_orders) == 2
+    assert store_orders[0][3] == 5
+    assert store_orders[0][4] == price_in_eth * 5
+    assert store_orders[1][3] == 0
+    assert store_orders[1][4] == price_in_eth
+    # the amount sent above the total is credited back to the buyer
+    assert store.credits(buyer) == toWei(1)
+    withdraw_tx = store.withdraw({"from": buyer})
+    withdraw_tx.wait(1)
+    assert buyer.balance() == buyer_initial_balance - orders_total
+    assert store.getBuyerOrdersCount(buyer) == 2
+
+    with brownie.reverts("invalid batch"):
+        create_tx = store.createBuyOrders([0, 1], [1], {"from": buyer, "value": orders_total})
+        create_tx.wait(1)
+
+def test_fill_order(store_factory):
     store_owner = get_account(1)
 
     store = create_store(store_factory=store_factory , owner=store_owner)
 
     add_tx = store.addProduct(
-        PRODUCT_NAME,
-        PRODUCT_DESCRIPTION,
-        PRODUCT_IMAGE,
+        PRODUCT_METADATA_HASH,
         PRODUCT_PRICE,
         PRODUCT_QUANTITY,
         PRODUCT_TYPE["FIXED"],
@@ -206,9 +360,9 @@ def test_fill_order():
 
     product_id = 0
     quantity = 5
-    product_price = store.listStoreProducts()[product_id][4]
+    product_price = get_all_pages(store.getStoreProducts)[product_id][1]
 
-    order_price_in_eth = store._convertUSDToETH.call(product_price) * quantity
+    order_price_in_eth = store.quoteUSDToETH(product_price) * quantity
 
     create_tx = store.createBuyOrder(product_id, quantity, {"from": buyer, "value": order_price_in_eth})
     create_tx.wait(1)
@@ -218,16 +372,15 @@ def test_fill_order():
     fill_tx = store.fillOrder(order_id, {"from": store_owner})
     fill_tx.wait(1)
 
-    order = store.listStoreOrders()[order_id]
+    order = get_all_pages(store.getStoreOrders)[order_id]
 
-    product = store.listStoreProducts()[product_id]
+    product = get_all_pages(store.getStoreProducts)[product_id]
 
     assert order[6] == ORDER_STATUS["SENT"]
-    assert product[6] == 1
-    assert product[5] == PRODUCT_QUANTITY - quantity
+    assert product[3] == 1
+    assert product[2] == PRODUCT_QUANTITY - quantity
 
-def test_confirm_recieved():
-    admin, store_factory = deploy_store_factory()
+def test_confirm_recieved(store_factory):
     factory_contract = get_contract(Administration, store_factory.factory())
 
     store_owner = get_account(1)
@@ -237,9 +390,7 @@ def test_confirm_recieved():
     factory_initial_balance = factory_contract.balance() 
 
     add_tx = store.addProduct(
-        PRODUCT_NAME,
-        PRODUCT_DESCRIPTION,
-        PRODUCT_IMAGE,
+        PRODUCT_METADATA_HASH,
         PRODUCT_PRICE,
         PRODUCT_QUANTITY,
         PRODUCT_TYPE["FIXED"],
@@ -251,9 +402,9 @@ def test_confirm_recieved():
 
     product_id = 0
     quantity = 5
-    product_price = store.listStoreProducts()[product_id][4]
+    product_price = get_all_pages(store.getStoreProducts)[product_id][1]
 
-    order_price_in_eth = store._convertUSDToETH.call(product_price) * quantity
+    order_price_in_eth = store.quoteUSDToETH(product_price) * quantity
 
     create_tx = store.createBuyOrder(product_id, quantity, {"from": buyer, "value": order_price_in_eth})
     create_tx.wait(1)
@@ -268,32 +419,34 @@ def test_confirm_recieved():
     confirm_tx = store.confirmRecieved(order_id, {"from": buyer})
     confirm_tx.wait(1)
 
+    # owner and fee payments are credited then claimed in one transaction each
+    claim_tx = factory_contract.claimPayments(store_owner, [store], {"from": buyer})
+    claim_tx.wait(1)
+    claim_tx = factory_contract.claimPayments(factory_contract, [store], {"from": buyer})
+    claim_tx.wait(1)
+
     store_owner_final_balance = store_owner.balance()
     factory_final_balance = factory_contract.balance() 
 
-    order = store.listStoreOrders()[order_id]
+    order = get_all_pages(store.getStoreOrders)[order_id]
 
-    product = store.listStoreProducts()[product_id]
+    product = get_all_pages(store.getStoreProducts)[product_id]
 
     assert fromWei(order_price_in_eth) ==  5
-    assert product[6] == 0
+    assert product[3] == 0
     assert order[6] == ORDER_STATUS["COMPLETED"]
     assert float(store_owner_final_balance) == float(store_owner_initial_balance) + float(order_price_in_eth) * 0.997
 
     # check that factory recieved the 0.3% fee
     assert factory_final_balance == float(order_price_in_eth) * 0.003 + float(factory_initial_balance)
 
-def test_cancel_order():
-    _, store_factory  = deploy_store_factory()
-
+def test_cancel_order(store_factory):
     store_owner = get_account(1)
 
     store = create_store(store_factory=store_factory , owner=store_owner)
 
     add_tx = store.addProduct(
-        PRODUCT_NAME,
-        PRODUCT_DESCRIPTION,
-        PRODUCT_IMAGE,
+        PRODUCT_METADATA_HASH,
         PRODUCT_PRICE,
         PRODUCT_QUANTITY,
         PRODUCT_TYPE["FIXED"],
@@ -305,9 +458,9 @@ def test_cancel_order():
 
     product_id = 0
     quantity = 5
-    product_price = store.listStoreProducts()[product_id][4]
+    product_price = get_all_pages(store.getStoreProducts)[product_id][1]
 
-    order_price_in_eth = store._convertUSDToETH.call(product_price) * quantity
+    order_price_in_eth = store.quoteUSDToETH(product_price) * quantity
 
     create_tx = store.createBuyOrder(product_id, quantity, {"from": buyer, "value": order_price_in_eth})
     create_tx.wait(1)
@@ -316,21 +469,52 @@ def test_cancel_order():
     cancel_tx = store.cancelOrder(order_id, {"from": buyer})
     cancel_tx.wait(1)
 
-    order = store.listStoreOrders()[order_id]
+    order = get_all_pages(store.getStoreOrders)[order_id]
 
-    assert order[2] == ZERO_ADDRESS # order buyer
+    # the order keeps its data, only its status changes
+    assert order[2] == buyer
+    assert order[6] == ORDER_STATUS["CANCELLED"]
+    assert store.credits(buyer) == order_price_in_eth
+    # the reserved quantity is back in stock
+    assert store.storeProducts(product_id)[2] == PRODUCT_QUANTITY
 
-def test_leave_review():
-    _, store_factory  = deploy_store_factory()
+def test_orders_reserve_stock(store_factory):
+    store_owner = get_account(1)
+    buyer = get_account(2)
+
+    store = create_store(store_factory=store_factory, owner=store_owner)
+
+    stock = 10
+    add_tx = store.addProduct(PRODUCT_METADATA_HASH, PRODUCT_PRICE, stock, PRODUCT_TYPE["FIXED"], {"from": store_owner})
+    add_tx.wait(1)
+    unit_price_in_eth = store.quoteUSDToETH(PRODUCT_PRICE)
+
+    create_tx = store.createBuyOrder(0, 6, {"from": buyer, "value": unit_price_in_eth * 6})
+    create_tx.wait(1)
+    assert store.storeProducts(0)[2] == stock - 6
+
+    # both orders together exceed the stock, the second one is refused when it's created
+    with brownie.reverts("unsuffisant quantity"):
+        store.createBuyOrder(0, 6, {"from": buyer, "value": unit_price_in_eth * 6})
+
+    create_tx = store.createBuyOrder(0, 4, {"from": buyer, "value": unit_price_in_eth * 4})
+    create_tx.wait(1)
 
+    # every queued order can be filled, nothing blocks the head of the queue
+    fill_tx = store.fillNextOrders(10, {"from": store_owner})
+    fill_tx.wait(1)
+
+    assert [o[6] for o in get_all_pages(store.getStoreOrders)] == [ORDER_STATUS["SENT"]] * 2
+    assert store.storeProducts(0)[2] == 0
+    assert store.getOrderQueueLength(ORDER_STATUS["PENDING"]) == 0
+
+def test_leave_review(store_factory):
     store_owner = get_account(1)
 
     store = create_store(store_factory=store_factory , owner=store_owner)
 
     add_tx = store.addProduct(
-        PRODUCT_NAME,
-        PRODUCT_DESCRIPTION,
-        PRODUCT_IMAGE,
+        PRODUCT_METADATA_HASH,
         PRODUCT_PRICE,
         PRODUCT_QUANTITY,
         PRODUCT_TYPE["FIXED"],
@@ -342,9 +526,9 @@ def test_leave_review():
 
     product_id = 0
     quantity = 5
-    product_price = store.listStoreProducts()[product_id][4]
+    product_price = get_all_pages(store.getStoreProducts)[product_id][1]
 
-    order_price_in_eth = store._convertUSDToETH.call(product_price) * quantity
+    order_price_in_eth = store.quoteUSDToETH(product_price) * quantity
 
     create_tx = store.createBuyOrder(product_id, quantity, {"from": buyer, "value": order_price_in_eth})
     create_tx.wait(1)
@@ -365,9 +549,213 @@ def test_leave_review():
 
     review = store.listProductReviews(product_id)[0]
 
-    order = store.listStoreOrders()[order_id]
+    order = get_all_pages(store.getStoreOrders)[order_id]
 
     assert review[0] == buyer
     assert review[1] == PRODUCT_RATING
     assert review[2] == PRODUCT_REVIEW
     assert order[5] == True
+
+def test_orders_filters(store_factory):
+    store_owner = get_account(1)
+
+    store = create_store(store_factory=store_factory , owner=store_owner)
+
+    add_tx = store.addProduct(
+        PRODUCT_METADATA_HASH,
+        PRODUCT_PRICE,
+        PRODUCT_QUANTITY,
+        PRODUCT_TYPE["FIXED"],
+        {"from": store_owner}
+    )
+    add_tx.wait(1)
+
+    buyer_1 = get_account(2)
+    buyer_2 = get_account(3)
+
+    product_id = 0
+    quantity = 1
+    product_price = get_all_pages(store.getStoreProducts)[product_id][1]
+
+    order_price_in_eth = store.quoteUSDToETH(product_price) * quantity
+
+    for buyer in [buyer_1, buyer_2, buyer_1, buyer_1]:
+        create_tx = store.createBuyOrder(product_id, quantity, {"from": buyer, "value": order_price_in_eth})
+        create_tx.wait(1)
+
+    fill_tx = store.fillOrder(0, {"from": store_owner})
+    fill_tx.wait(1)
+
+    # cancelled orders keep their data and are only matched by their own status
+    cancel_tx = store.cancelOrder(3, {"from": buyer_1})
+    cancel_tx.wait(1)
+    assert [o[0] for o in get_all_pages(store.getOrdersByStatus, ORDER_STATUS["CANCELLED"])] == [3]
+
+    page, next_cursor = store.getStoreOrders(1, 2)
+    assert [o[0] for o in page] == [1, 2]
+    assert next_cursor == 3
+
+    buyer_1_orders = get_all_pages(store.getOrdersByBuyer, buyer_1, page_size=1)
+    pending_orders = get_all_pages(store.getOrdersByStatus, ORDER_STATUS["PENDING"])
+    sent_orders = get_all_pages(store.getOrdersByStatus, ORDER_STATUS["SENT"])
+
+    assert [o[0] for o in buyer_1_orders] == [0, 2]
+    assert store.getBuyerOrdersCount(buyer_1) == 2
+    assert store.getBuyerOrdersCount(buyer_2) == 1
+    assert [o[0] for o in pending_orders] == [1, 2]
+    assert [o[0] for o in sent_orders] == [0]
+
+    # the status scan is capped at the limit, a window without matches gives an empty page
+    page, next_cursor = store.getOrdersByStatus(ORDER_STATUS["PENDING"], 0, 1)
+    assert page == []
+    assert next_cursor == 1
+
+
+def test_order_queues(store_factory):
+    store_owner = get_account(1)
+    buyer = get_account(2)
+
+    store = create_store(store_factory=store_factory, owner=store_owner)
+
+    add_tx = store.addProduct(PRODUCT_METADATA_HASH, PRODUCT_PRICE, PRODUCT_QUANTITY, PRODUCT_TYPE["FIXED"], {"from": store_owner})
+    add_tx.wait(1)
+    order_price_in_eth = store.quoteUSDToETH(PRODUCT_PRICE)
+
+    for _ in range(5):
+        create_tx = store.createBuyOrder(0, 1, {"from": buyer, "value": order_price_in_eth})
+        create_tx.wait(1)
+
+    def queue(status, page_size=2):
+        return [o[0] for o in get_all_pages(store.getOrderQueue, ORDER_STATUS[status], page_size=page_size)]
+
+    assert queue("PENDING") == [0, 1, 2, 3, 4]
+
+    # pending orders are filled oldest first
+    fill_tx = store.fillNextOrders(2, {"from": store_owner})
+    fill_tx.wait(1)
+    fill_tx = store.fillOrder(3, {"from": store_owner})
+    fill_tx.wait(1)
+    cancel_tx = store.cancelOrder(4, {"from": buyer})
+    cancel_tx.wait(1)
+
+    assert queue("PENDING") == [2]
+    assert queue("SENT", page_size=1) == [0, 1, 3]
+
+    with brownie.reverts("invalid order status"):
+        store.fillOrder(4, {"from": store_owner})
+
+    # the cursor is the last order of the previous page, when it leaves the queue
+    # in between the next page is empty and the walk stops instead of reverting
+    page, cursor = store.getOrderQueue(ORDER_STATUS["SENT"], 0, 1)
+    assert [o[0] for o in page] == [0]
+    confirm_tx = store.confirmRecieved(0, {"from": buyer})
+    confirm_tx.wait(1)
+    assert store.getOrderQueue(ORDER_STATUS["SENT"], cursor, 1) == ([], cursor)
+
+    confirm_tx = store.confirmRecieved(3, {"from": buyer})
+    confirm_tx.wait(1)
+    assert queue("SENT") == [1]
+    assert queue("COMPLETED") == [0, 3]
+
+    review_tx = store.leaveReview(0, "5", "review", {"from": buyer})
+    review_tx.wait(1)
+    assert queue("COMPLETED") == [3]
+
+    fill_tx = store.fillNextOrders(10, {"from": store_owner})
+    fill_tx.wait(1)
+    assert queue("PENDING") == []
+    assert queue("SENT") == [1, 2]
+    assert [store.getOrderQueueLength(status) for status in range(3)] == [0, 2, 1]
+
+
+def test_stores_summaries(store_factory):
+    owner_1 = get_account(1)
+    owner_2 = get_account(2)
+    buyer = get_account(3)
+
+    store_1 = create_store(store_factory, owner_1)
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+    create_tx = store_factory.createStore("second store meta data", {"from": owner_2, "value": create_store_fee})
+    create_tx.wait(1)
+
+    add_tx = store_1.addProduct(PRODUCT_METADATA_HASH, PRODUCT_PRICE, PRODUCT_QUANTITY, PRODUCT_TYPE["FIXED"], {"from": owner_1})
+    add_tx.wait(1)
+
+    order_price_in_eth = store_1.quoteUSDToETH(PRODUCT_PRICE)
+    for _ in range(3):
+        create_tx = store_1.createBuyOrder(0, 1, {"from": buyer, "value": order_price_in_eth})
+        create_tx.wait(1)
+
+    summaries = get_stores_summaries(store_factory, buyer, max_orders=2, page_size=1)
+
+    assert store_factory.getStoresCount() == 2
+    assert [s["owner"] for s in summaries] == [owner_1, owner_2]
+    assert summaries[0]["storeAddress"] == store_1.address
+    assert summaries[0]["storeMetaData"] == "store test meta data"
+    assert summaries[0]["productsCount"] == 1
+    assert summaries[0]["ordersCount"] == 3
+    assert summaries[0]["activeProductsCount"] == 1
+    assert summaries[0]["openOrdersCount"] == 3
+    assert [o[0] for o in summaries[0]["buyerOrders"]] == [0, 1]
+    assert summaries[0]["buyerOrdersMetadata"] == [PRODUCT_METADATA_HASH] * 2
+    assert summaries[1]["storeMetaData"] == "second store meta data"
+    assert summaries[1]["buyerOrders"] == []
+
+    # no orders are collected without a buyer
+    assert get_stores_summaries(store_factory)[0]["buyerOrders"] == []
+
+
+def test_stores_directory(store_factory):
+    owner_1 = get_account(1)
+    owner_2 = get_account(2)
+
+    create_store_fee = store_factory.quoteUSDToETH(store_factory.createStoreFee())
+    for owner in [owner_1, owner_2, owner_1]:
+        create_tx = store_factory.createStore("store meta data", {"from": owner, "value": create_store_fee})
+        create_tx.wait(1)
+
+    all_stores = store_factory.getAllStores()
+
+    assert store_factory.getStoresByOwner(owner_1) == [all_stores[0][0], all_stores[2][0]]
+    assert store_factory.getStoresByOwner(owner_2) == [all_stores[1][0]]
+    assert store_factory.getStoresByOwner(get_account(3)) == []
+
+    page, next_cursor = store_factory.getStores(1, 1)
+    assert [s[0] for s in page] == [all_stores[1][0]]
+    assert next_cursor == 2
+    assert get_all_pages(store_factory.getStores, page_size=2) == list(all_stores)
+
+
+def test_store_live_counters(store_factory):
+    store_owner = get_account(1)
+    buyer = get_account(2)
+
+    store = create_store(store_factory=store_factory, owner=store_owner)
+
+    for _ in range(2):
+        add_tx = store.addProduct(PRODUCT_METADATA_HASH, PRODUCT_PRICE, PRODUCT_QUANTITY, PRODUCT_TYPE["FIXED"], {"from": store_owner})
+        add_tx.wait(1)
+    assert store.activeProductsCount() == 2
+
+    order_price_in_eth = store.quoteUSDToETH(PRODUCT_PRICE)
+    for _ in range(3):
+        create_tx = store.createBuyOrder(0, 1, {"from": buyer, "value": order_price_in_eth})
+        create_tx.wait(1)
+    assert store.openOrdersCount() == 3
+
+    fill_tx = store.fillOrder(0, {"from": store_owner})
+    fill_tx.wait(1)
+    confirm_tx = store.confirmRecieved(0, {"from": buyer})
+    confirm_tx.wait(1)
+    cancel_tx = store.cancelOrder(1, {"from": buyer})
+    cancel_tx.wait(1)
+    assert store.openOrdersCount() == 1
+
+    # product 0 still has an open order, product 1 is removed only once
+    remove_tx = store.removeProducts([0, 1, 1], {"from": store_owner})
+    remove_tx.wait(1)
+    assert store.activeProductsCount() == 1
+
+    summary = get_stores_summaries(store_factory)[0]
+    assert summary["activeProductsCount"] == 1
+    assert summary["openOrdersCount"] == 1
@@ -0,0 +1,70 @@
+import json, os
+from scripts.registry import build_registry, write_registry
+from scripts.update_front_end import front_end_artifacts, sync_artifacts, write_if_changed
+
+
+def make_build_folder(root):
+    build = root / "build"
+    (build / "contracts" / "dependencies").mkdir(parents=True)
+    (build / "deployments" / "5777").mkdir(parents=True)
+    (build / "contracts" / "Market.json").write_text(
+        json.dumps({"contractName": "Market", "abi": [{"name": "addProduct"}], "bytecode": "0x00"})
+    )
+    (build / "contracts" / "dependencies" / "AggregatorV3Interface.json").write_text(json.dumps({"abi": []}))
+    (build / "deployments" / "5777" / "0x02.json").write_text("{}")
+    (build / "deployments" / "map.json").write_text(json.dumps({"5777": {"Market": ["0x02", "0x01"]}}))
+    return build
+
+
+def test_front_end_artifacts(tmp_path):
+    build = make_build_folder(tmp_path)
+    artifacts = front_end_artifacts(str(build))
+
+    # a single registry per network with the ABIs and the active addresses
+    assert sorted(artifacts) == ["deployments/5777.json"]
+    assert json.loads(artifacts["deployments/5777.json"]) == {
+        "chainId": "5777",
+        "contracts": {"Market": {"address": "0x02", "abi": [{"name": "addProduct"}]}},
+    }
+
+    # registries written by deploy.py take precedence over the deployments map
+    write_registry(build_registry(5777, {"Market": ("0x03", [])}), str(build / "registry"))
+    artifacts = front_end_artifacts(str(build))
+    assert json.loads(artifacts["deployments/5777.json"])["contracts"]["Market"]["address"] == "0x03"
+
+
+def test_sync_artifacts(tmp_path):
+    build = make_build_folder(tmp_path)
+    des = tmp_path / "artifacts"
+    (des / "deployments" / "5777").mkdir(parents=True)
+    (des / "deployments" / "5777" / "0x01.json").write_text("{}")
+
+    written, removed = sync_artifacts(front_end_artifacts(str(build)), str(des))
+    assert len(written) == 1
+    assert removed == [os.path.normpath(str(des / "deployments" / "5777" / "0x01.json"))]
+    assert not (des / "deployments" / "5777").exists()
+
+    # unchanged artifacts are not written again
+    registry_mtime = os.path.getmtime(des / "deployments" / "5777.json")
+    assert sync_artifacts(front_end_artifacts(str(build)), str(des)) == ([], [])
+    assert os.path.getmtime(des / "deployments" / "5777.json") == registry_mtime
+
+    # a new deployment rewrites the registry of its network only
+    (build / "deployments" / "map.json").write_text(
+        json.dumps({"5777": {"Market": ["0x03", "0x02"]}, "4": {"Market": ["0x11"]}})
+    )
+    sync_artifacts(front_end_artifacts(str(build)), str(des))
+    (build / "deployments" / "map.json").write_text(
+        json.dumps({"5777": {"Market": ["0x04", "0x03"]}, "4": {"Market": ["0x11"]}})
+    )
+    written, removed = sync_artifacts(front_end_artifacts(str(build)), str(des))
+    assert written == [str(des / "deployments/5777.json")]
+    assert removed == []
+
+
+def test_write_if_changed(tmp_path):
+    path = str(tmp_path / "utils" / "brownie-config.json")
+
+    assert write_if_changed(path, b'{"networks": {}}')
+    assert not write_if_changed(path, b'{"networks": {}}')
+    assert write_if_changed(path, b'{"networks": {"default": "development"}}')